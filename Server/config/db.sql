@@ -12,17 +12,47 @@ CREATE TABLE announcements (
   filed_at TIMESTAMP NOT NULL,          -- exchange filing time
   scraped_at TIMESTAMP DEFAULT NOW(),   -- when your system saw it
 
-  pdf_url TEXT NOT NULL,
+  pdf_url TEXT,                        -- NULL for filings without an attachment
   screenshot_url TEXT,
 
   source_page TEXT,                    -- BSE page URL
   exchange TEXT DEFAULT 'BSE',
-  index_name TEXT DEFAULT 'BANKEX',
+  index_name TEXT DEFAULT 'BANKEX',    -- primary index (first one it was seen under)
+  indices TEXT[],                      -- every index listing it appeared on
+  pdf_text TEXT,                       -- text extracted from the filing PDF
 
+  -- duplicate detection (dedupe.py): a new filing with the same PDF or a
+  -- near-identical description reuses the earlier row's work and links to it
+  pdf_sha256 TEXT,
+  text_simhash BIGINT,
+  text_numbers TEXT,                   -- numeric tokens that must agree for a text match
+  duplicate_of TEXT,                   -- id of the announcement it duplicates
+
+  -- full-text search over headline, company, summary and PDF text
+  search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(company_name, '') || ' ' || coalesce(summary, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(pdf_text, '')), 'C')
+  ) STORED,
+
+  enriched BOOLEAN NOT NULL DEFAULT TRUE, -- false until queue workers add images and summary
+  fanned_out BOOLEAN NOT NULL DEFAULT FALSE, -- subscriber deliveries/digests written (fanout.py)
   uploaded BOOLEAN DEFAULT FALSE,       -- if sent to feeds/emails
   created_at TIMESTAMP DEFAULT NOW()
 );
 
+CREATE INDEX idx_announcements_indices ON announcements USING GIN (indices);
+CREATE INDEX idx_announcements_search ON announcements USING GIN (search_vector);
+CREATE INDEX idx_announcements_filed_at ON announcements (filed_at DESC);
+CREATE INDEX idx_announcements_pdf_sha256 ON announcements (pdf_sha256);
+CREATE INDEX idx_announcements_scraped_at ON announcements (scraped_at);
+CREATE INDEX idx_announcements_fanout ON announcements (scraped_at) WHERE NOT fanned_out;
+
+-- substring company search (ILIKE '%x%') via trigrams
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX idx_announcements_company_name_trgm ON announcements USING GIN (company_name gin_trgm_ops);
+CREATE INDEX idx_announcements_company_code_trgm ON announcements USING GIN (company_code gin_trgm_ops);
+
 
 CREATE TABLE subscribers (
   id SERIAL PRIMARY KEY,
@@ -33,3 +63,79 @@ CREATE TABLE subscribers (
   is_active BOOLEAN DEFAULT TRUE,
   created_at TIMESTAMP DEFAULT NOW()
 );
+
+-- Written by fanout.py for each announcement a subscriber's watchlist
+-- matches: one delivery per announcement for 'instant' subscribers, one
+-- digest per subscriber and period (IST day / week from Monday) otherwise
+CREATE TABLE subscriber_deliveries (
+  id BIGSERIAL PRIMARY KEY,
+  subscriber_id INTEGER NOT NULL REFERENCES subscribers(id) ON DELETE CASCADE,
+  announcement_id TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending', -- pending / sent / failed
+  created_at TIMESTAMP DEFAULT NOW(),
+  sent_at TIMESTAMP,
+  UNIQUE (subscriber_id, announcement_id)
+);
+
+CREATE TABLE subscriber_digests (
+  id BIGSERIAL PRIMARY KEY,
+  subscriber_id INTEGER NOT NULL REFERENCES subscribers(id) ON DELETE CASCADE,
+  digest_mode TEXT NOT NULL,             -- daily / weekly
+  period_start DATE NOT NULL,
+  announcement_ids TEXT[] NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending', -- pending / sent / failed
+  created_at TIMESTAMP DEFAULT NOW(),
+  updated_at TIMESTAMP DEFAULT NOW(),
+  sent_at TIMESTAMP,
+  UNIQUE (subscriber_id, digest_mode, period_start)
+);
+
+CREATE INDEX idx_subscriber_deliveries_pending ON subscriber_deliveries (created_at) WHERE status = 'pending';
+CREATE INDEX idx_subscriber_digests_pending ON subscriber_digests (period_start) WHERE status = 'pending';
+
+
+-- Progress of archive backfills (finalscraper.py --backfill), one row per
+-- company and date window; next_page is the first archive page not yet stored
+CREATE TABLE backfill_checkpoints (
+  job TEXT NOT NULL,
+  company_code TEXT NOT NULL,
+  window_start DATE NOT NULL,
+  window_end DATE NOT NULL,
+  next_page INTEGER NOT NULL DEFAULT 1,
+  done BOOLEAN NOT NULL DEFAULT FALSE,
+  items_seen INTEGER NOT NULL DEFAULT 0,
+  items_inserted INTEGER NOT NULL DEFAULT 0,
+  failed_newsids TEXT[] NOT NULL DEFAULT '{}',
+  updated_at TIMESTAMP DEFAULT NOW(),
+  PRIMARY KEY (job, company_code, window_start)
+);
+
+
+-- Work queue for queue_worker.py: one row per announcement per stage
+-- (detail, enrich, summarize), leased by workers with FOR UPDATE SKIP LOCKED
+CREATE TABLE scrape_jobs (
+  id BIGSERIAL PRIMARY KEY,
+  stage TEXT NOT NULL,
+  newsid TEXT NOT NULL,
+  payload JSONB NOT NULL DEFAULT '{}',  -- stage input, e.g. page HTML for enrich
+  status TEXT NOT NULL DEFAULT 'pending', -- pending / leased / done / failed
+  attempts INTEGER NOT NULL DEFAULT 0,
+  max_attempts INTEGER NOT NULL DEFAULT 5,
+  available_at TIMESTAMP NOT NULL DEFAULT NOW(),
+  leased_by TEXT,                       -- host:pid of the worker holding the lease
+  lease_expires_at TIMESTAMP,
+  last_error TEXT,
+  created_at TIMESTAMP DEFAULT NOW(),
+  updated_at TIMESTAMP DEFAULT NOW(),
+  UNIQUE (stage, newsid)
+);
+
+CREATE INDEX idx_scrape_jobs_ready ON scrape_jobs (stage, available_at) WHERE status = 'pending';
+CREATE INDEX idx_scrape_jobs_leased ON scrape_jobs (stage, lease_expires_at) WHERE status = 'leased';
+
+
+-- Number of db.py SCHEMA_UPGRADES applied; ensure_schema() runs only newer
+-- ones. A database created from this file fills it on first start.
+CREATE TABLE schema_version (
+  version INTEGER NOT NULL
+);
@@ -1,12 +1,26 @@
 const pool = require('../config/db');
 
+// Everything except pdf_text and search_vector, which can run to hundreds of KB per row
+const LIST_COLUMNS = `id, company_code, company_name, title, subject, summary, category,
+  filed_at, scraped_at, pdf_url, screenshot_url, source_page, exchange, index_name,
+  indices, duplicate_of, uploaded, created_at`;
+
 exports.getAnnouncements = async (req, res) => {
   try {
-    const { limit = 50, offset = 0, category, company } = req.query;
+    const { limit = 50, offset = 0, category, company, q } = req.query;
     
-    let query = 'SELECT * FROM announcements WHERE 1=1';
+    let query = `SELECT ${LIST_COLUMNS} FROM announcements WHERE 1=1`;
     const params = [];
     let paramCount = 1;
+    let searchParam = null;
+
+    // Full-text search over title, company, summary and PDF text (GIN index)
+    if (q) {
+      query += ` AND search_vector @@ websearch_to_tsquery('english', $${paramCount})`;
+      params.push(q);
+      searchParam = paramCount;
+      paramCount++;
+    }
 
     if (category) {
       query += ` AND category = $${paramCount}`;
@@ -20,7 +34,12 @@ exports.getAnnouncements = async (req, res) => {
       paramCount++;
     }
 
-    query += ` ORDER BY filed_at DESC LIMIT $${paramCount} OFFSET $${paramCount + 1}`;
+    if (searchParam) {
+      query += ` ORDER BY ts_rank_cd(search_vector, websearch_to_tsquery('english', $${searchParam})) DESC, filed_at DESC`;
+    } else {
+      query += ' ORDER BY filed_at DESC';
+    }
+    query += ` LIMIT $${paramCount} OFFSET $${paramCount + 1}`;
     params.push(limit, offset);
 
     const result = await pool.query(query, params);
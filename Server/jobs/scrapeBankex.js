@@ -4,12 +4,154 @@ const path = require('path');
 const { processUnsentAnnouncements } = require('../services/emailService');
 
 const SCRAPER_PATH = path.join(__dirname, '..', 'services', 'finalscraper.py');
+const QUEUE_WORKER_PATH = path.join(__dirname, '..', 'services', 'queue_worker.py');
+const FANOUT_PATH = path.join(__dirname, '..', 'services', 'fanout.py');
 const PYTHON_CMD = 'python'; // Use 'python3' on Linux/Mac if needed
 
+// Set SCRAPER_DAEMON=true to keep one warm scraper process (browser + DB
+// connection) alive and trigger runs over its stdin instead of spawning
+// a fresh process every tick.
+const USE_DAEMON = process.env.SCRAPER_DAEMON === 'true';
+const RESULT_PREFIX = '[RESULT] ';
+
+// Set SCRAPER_QUEUE=true to only discover new announcements each tick and
+// leave detail/enrich/summarize to queue_worker.py processes draining the
+// scrape_jobs table. QUEUE_WORKERS of them are kept running here; set it
+// to 0 when the workers run elsewhere (other boxes or services).
+const USE_QUEUE = process.env.SCRAPER_QUEUE === 'true';
+const QUEUE_WORKERS = parseInt(process.env.QUEUE_WORKERS || '1', 10);
+
+// Set SUBSCRIBER_FANOUT=true to write per-subscriber delivery and digest
+// rows (fanout.py) for new announcements after every scrape.
+const USE_FANOUT = process.env.SUBSCRIBER_FANOUT === 'true';
+
 let isRunning = false;
 let isJobRunning = false;
 
+let daemon = null;
+let daemonBuffer = '';
+let pendingRun = null;
+
+function startDaemon() {
+    console.log('[Scraper] Starting scraper daemon...');
+    daemon = spawn(PYTHON_CMD, [SCRAPER_PATH, '--daemon'], {
+        cwd: path.join(__dirname, '..', 'services')
+    });
+    daemonBuffer = '';
+
+    daemon.stdout.on('data', (data) => {
+        daemonBuffer += data.toString();
+        const lines = daemonBuffer.split('\n');
+        daemonBuffer = lines.pop();
+
+        for (const line of lines) {
+            if (line.startsWith(RESULT_PREFIX)) {
+                let result;
+                try {
+                    result = JSON.parse(line.slice(RESULT_PREFIX.length));
+                } catch (err) {
+                    result = { status: 'error', error: `Unparseable result: ${err.message}` };
+                }
+                if (pendingRun) {
+                    const finish = pendingRun;
+                    pendingRun = null;
+                    finish(result);
+                }
+            } else if (line.trim()) {
+                console.log(`[Scraper] ${line.trim()}`);
+            }
+        }
+    });
+
+    daemon.stderr.on('data', (data) => {
+        console.error(`[Scraper Error] ${data.toString().trim()}`);
+    });
+
+    daemon.on('close', (code) => {
+        console.error(`[Scraper] Daemon exited with code ${code}`);
+        daemon = null;
+        if (pendingRun) {
+            const finish = pendingRun;
+            pendingRun = null;
+            finish({ status: 'error', error: `Daemon exited with code ${code}` });
+        }
+    });
+
+    daemon.on('error', (err) => {
+        console.error(`[Scraper] Failed to start daemon: ${err.message}`);
+    });
+
+    daemon.stdin.on('error', (err) => {
+        console.error(`[Scraper] Daemon stdin error: ${err.message}`);
+    });
+}
+
+function runScraperDaemon() {
+    return new Promise((resolve) => {
+        if (isRunning) {
+            console.log('[Scraper] Previous job still running, skipping...');
+            resolve();
+            return;
+        }
+
+        if (!daemon) {
+            startDaemon();
+        }
+
+        isRunning = true;
+        const startTime = new Date();
+        console.log(`\n[Scraper] Triggering daemon run at ${startTime.toLocaleString()}`);
+
+        pendingRun = (result) => {
+            isRunning = false;
+            const duration = ((new Date() - startTime) / 1000).toFixed(2);
+
+            if (result.status === 'ok') {
+                console.log(`[Scraper] Run completed in ${duration}s - Found: ${result.found}, Inserted: ${result.inserted}, Skipped: ${result.skipped}, Errors: ${result.errors}`);
+            } else if (result.status === 'unchanged') {
+                console.log(`[Scraper] Listing unchanged, skipped run (${duration}s)`);
+            } else {
+                console.error(`[Scraper] Run failed after ${duration}s: ${result.error}`);
+            }
+            resolve(result);
+        };
+
+        daemon.stdin.write('scrape\n');
+    });
+}
+
+function startQueueWorkers() {
+    if (QUEUE_WORKERS <= 0) {
+        return;
+    }
+    console.log(`[Queue] Starting ${QUEUE_WORKERS} queue worker process(es)...`);
+    const worker = spawn(PYTHON_CMD, [QUEUE_WORKER_PATH, 'worker', '--processes', String(QUEUE_WORKERS)], {
+        cwd: path.join(__dirname, '..', 'services')
+    });
+
+    worker.stdout.on('data', (data) => {
+        console.log(`[Queue] ${data.toString().trim()}`);
+    });
+
+    worker.stderr.on('data', (data) => {
+        console.error(`[Queue Error] ${data.toString().trim()}`);
+    });
+
+    worker.on('close', (code) => {
+        console.error(`[Queue] Workers exited with code ${code}, restarting in 30s`);
+        setTimeout(startQueueWorkers, 30000);
+    });
+
+    worker.on('error', (err) => {
+        console.error(`[Queue] Failed to start workers: ${err.message}`);
+    });
+}
+
 function runScraper() {
+    if (USE_DAEMON && !USE_QUEUE) {
+        return runScraperDaemon();
+    }
+
     return new Promise((resolve, reject) => {
         if (isRunning) {
             console.log('[Scraper] Previous job still running, skipping...');
@@ -21,7 +163,8 @@ function runScraper() {
         const startTime = new Date();
         console.log(`\n[Scraper] Starting at ${startTime.toLocaleString()}`);
 
-        const process = spawn(PYTHON_CMD, [SCRAPER_PATH], {
+        const args = USE_QUEUE ? [QUEUE_WORKER_PATH, 'discover'] : [SCRAPER_PATH];
+        const process = spawn(PYTHON_CMD, args, {
             cwd: path.join(__dirname, '..', 'services')
         });
 
@@ -55,6 +198,36 @@ function runScraper() {
     });
 }
 
+function runFanout() {
+    return new Promise((resolve) => {
+        const startTime = new Date();
+        const fanout = spawn(PYTHON_CMD, [FANOUT_PATH], {
+            cwd: path.join(__dirname, '..', 'services')
+        });
+
+        fanout.stdout.on('data', (data) => {
+            console.log(`[Fanout] ${data.toString().trim()}`);
+        });
+
+        fanout.stderr.on('data', (data) => {
+            console.error(`[Fanout Error] ${data.toString().trim()}`);
+        });
+
+        fanout.on('close', (code) => {
+            const duration = ((new Date() - startTime) / 1000).toFixed(2);
+            if (code !== 0) {
+                console.error(`[Fanout] Exited with code ${code} after ${duration}s`);
+            }
+            resolve();
+        });
+
+        fanout.on('error', (err) => {
+            console.error(`[Fanout] Failed to start: ${err.message}`);
+            resolve();
+        });
+    });
+}
+
 async function runScraperAndEmail() {
     if (isJobRunning) {
         console.log('[Job] Previous scraper+email job still running, skipping...');
@@ -70,6 +243,10 @@ async function runScraperAndEmail() {
         
         // Small delay to ensure DB commits are complete
         await new Promise(resolve => setTimeout(resolve, 2000));
+
+        if (USE_FANOUT) {
+            await runFanout();
+        }
         
         // Then run email service
         await processUnsentAnnouncements();
@@ -95,6 +272,10 @@ function startScheduler() {
     console.log('[Scheduler] Timezone: Asia/Kolkata (IST)');
     console.log('[Scheduler] Next run in 5 minutes or less...\n');
 
+    if (USE_QUEUE) {
+        startQueueWorkers();
+    }
+
     // Run immediately on startup
     console.log('[Scheduler] Running initial scrape and email check...');
     runScraperAndEmail();
@@ -1,6 +1,7 @@
 require('dotenv').config();
 const express = require('express');
 const cors = require('cors');
+const path = require('path');
 const pool = require('./config/db');
 const announcementRoutes = require('./routes/announcementRoutes');
 const { startScheduler, manualRun } = require('./jobs/scrapeBankex');
@@ -18,13 +19,20 @@ process.on('uncaughtException', (err) => {
 app.use(cors());
 app.use(express.json());
 
+// Images from the scraper's local image store (IMAGE_STORE=local, or auto
+// without Cloudinary credentials). Files are named by their sha256, so a URL
+// never changes content and can be cached for good.
+const IMAGE_STORE_DIR = process.env.IMAGE_STORE_DIR || path.join(__dirname, 'services', 'image_store');
+app.use('/images', express.static(IMAGE_STORE_DIR, { immutable: true, maxAge: '365d', index: false }));
+
 // Debug: environment summary
 console.log('ENV DEBUG:', {
   PORT: process.env.PORT || 5000,
   NODE_ENV: process.env.NODE_ENV || 'undefined',
   HAS_DATABASE_URL: !!process.env.DATABASE_URL,
   EMAIL_USER_SET: !!process.env.EMAIL_USER,
-  CLOUDINARY_CONFIGURED: !!(process.env.CLOUDINARY_API_KEY && process.env.CLOUDINARY_API_SECRET)
+  CLOUDINARY_CONFIGURED: !!(process.env.CLOUDINARY_API_KEY && process.env.CLOUDINARY_API_SECRET),
+  IMAGE_STORE: process.env.IMAGE_STORE || 'auto'
 });
 
 // Request logger (simple)
@@ -0,0 +1,418 @@
+"""Offline throughput benchmark for the BANKEX scraper.
+
+Serves the listing, AnnDet_new.aspx pages and PDFs from bench_fixtures/ on a
+local HTTP server, next to fake Groq and Cloudinary endpoints with
+configurable latency, then runs scrape_bankex (or the concurrent scraper)
+against it and reports items/sec, p50/p95 per-item latency and peak RSS.
+
+    python benchmark.py run --items 20 [--concurrency 4] [--json out.json]
+    python benchmark.py serve --items 20      # stand-ins only, for manual runs
+    python benchmark.py record NEWSID ...     # save real pages/PDFs as fixtures
+
+Needs DATABASE_URL (rows it inserts are deleted afterwards) and a
+Playwright Chromium install.
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import resource
+import tempfile
+import threading
+from string import Template
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "bench_fixtures")
+LISTING_PATH = "/sensex/code/53/"
+
+COMPANIES = [
+    ("HDFC Bank Ltd", "500180"),
+    ("ICICI Bank Ltd", "532174"),
+    ("State Bank of India", "500112"),
+    ("Kotak Mahindra Bank Ltd", "500247"),
+    ("Axis Bank Ltd", "532215"),
+]
+TITLES = [
+    "Board Meeting Intimation for Quarterly Results",
+    "Outcome of Board Meeting",
+    "Record Date for Interim Dividend",
+    "Disclosure under Regulation 30 - Press Release",
+    "Intimation of Trading Window Closure",
+]
+
+
+def load_template(name):
+    with open(os.path.join(FIXTURES_DIR, name)) as f:
+        return Template(f.read())
+
+
+def sample_pdf(pages=3):
+    """A small text PDF standing in for a filing attachment"""
+    import fitz  # PyMuPDF
+
+    document = fitz.open()
+    for page_num in range(pages):
+        page = document.new_page()
+        page.insert_text((72, 72), f"Benchmark filing - page {page_num + 1}", fontsize=18)
+        body = "The Board of Directors at its meeting held today has approved the following. " * 40
+        page.insert_textbox(fitz.Rect(72, 110, 520, 780), body, fontsize=10)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+class Fixtures:
+    """Listing, detail pages and PDFs for a set of newsids.
+
+    Recorded files (details/<newsid>.html, pdfs/<name>.pdf under the
+    fixtures directory) are served as-is; other newsids are filled in from
+    the detail.html template and a generated PDF.
+    """
+
+    def __init__(self, items, pdf_pages=3, fixtures_dir=FIXTURES_DIR, seed=0):
+        rng = random.Random(seed)
+        self.fixtures_dir = fixtures_dir
+        self.recorded = {}
+        details_dir = os.path.join(fixtures_dir, "details")
+        if os.path.isdir(details_dir):
+            for name in sorted(os.listdir(details_dir)):
+                if name.endswith(".html"):
+                    with open(os.path.join(details_dir, name)) as f:
+                        self.recorded[name[:-5]] = f.read()
+
+        synthetic = max(0, items - len(self.recorded))
+        self.newsids = list(self.recorded)[:items] + [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(synthetic)]
+        self.listing = load_template("listing.html").substitute(items="\n".join(
+            f'      <li><a href="/corporates/AnnDet_new.aspx?newsid={newsid}">Announcement {idx}</a></li>'
+            for idx, newsid in enumerate(self.newsids, start=1)
+        ))
+        self.detail_template = load_template("detail.html")
+        self.pdf = sample_pdf(pdf_pages)
+        self.rng = rng
+
+    def detail(self, newsid):
+        if newsid in self.recorded:
+            return self.recorded[newsid]
+        if newsid not in self.newsids:
+            return None
+        idx = self.newsids.index(newsid)
+        company, code = COMPANIES[idx % len(COMPANIES)]
+        return self.detail_template.substitute(
+            newsid=newsid,
+            company=company,
+            code=code,
+            slug=company.lower().replace(" ", "-"),
+            title=TITLES[idx % len(TITLES)],
+            description=("The bank has informed the exchange that the board of directors will meet to consider "
+                         "and approve the unaudited financial results for the quarter. ") * 3,
+            received="01-10-2026 18:15:42",
+            disseminated="01-10-2026 18:15:47",
+        )
+
+    def pdf_bytes(self, name):
+        path = os.path.join(self.fixtures_dir, "pdfs", os.path.basename(name))
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                return f.read()
+        return self.pdf
+
+
+class StandInServer:
+    """BSE, Groq and Cloudinary stand-ins on one local ThreadingHTTPServer"""
+
+    def __init__(self, fixtures, bse_latency=0.0, groq_latency=0.3, upload_latency=0.2):
+        self.fixtures = fixtures
+        self.bse_latency = bse_latency
+        self.groq_latency = groq_latency
+        self.upload_latency = upload_latency
+        self.requests = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+        self.origin = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _count(self, kind):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type):
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                time.sleep(server.bse_latency)
+                if url.path == LISTING_PATH:
+                    server._count("listing")
+                    return self._send(200, server.fixtures.listing, "text/html; charset=utf-8")
+                if url.path.endswith("/AnnDet_new.aspx"):
+                    server._count("detail")
+                    html = server.fixtures.detail((parse_qs(url.query).get("newsid") or [""])[0])
+                    if html is None:
+                        return self._send(404, "not found", "text/plain")
+                    return self._send(200, html, "text/html; charset=utf-8")
+                if url.path.endswith(".pdf"):
+                    server._count("pdf")
+                    return self._send(200, server.fixtures.pdf_bytes(url.path), "application/pdf")
+                return self._send(404, "not found", "text/plain")
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if url.path.endswith("/chat/completions"):
+                    server._count("groq")
+                    time.sleep(server.groq_latency)
+                    prompt_tokens = len(body) // 4
+                    return self._send(200, json.dumps({
+                        "choices": [{"message": {"content": "Benchmark summary of the announcement."}}],
+                        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 12,
+                                  "total_tokens": prompt_tokens + 12},
+                    }), "application/json")
+                if "/image/upload" in url.path:
+                    server._count("upload")
+                    time.sleep(server.upload_latency)
+                    asset = f"{server.origin}/cdn/{uuid.uuid4().hex}"
+                    return self._send(200, json.dumps({"secure_url": asset, "bytes": len(body)}),
+                                      "application/json")
+                return self._send(404, "not found", "text/plain")
+
+        return Handler
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its reaped children (the browser)"""
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(self_kb / 1024, 1), round(children_kb / 1024, 1)
+
+
+def configure_environment(args):
+    """Point the scraper's config at the stand-ins; must run before finalscraper is imported"""
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ["GROQ_RPM"] = str(args.groq_rpm)
+    os.environ["GROQ_TPM"] = str(args.groq_rpm * 1000)
+    os.environ["SUMMARY_CACHE"] = "false"
+    os.environ["LISTING_PROBE"] = "false"
+    os.environ.setdefault("CLOUDINARY_CLOUD_NAME", "benchmark")
+    os.environ.setdefault("CLOUDINARY_API_KEY", "benchmark")
+    os.environ.setdefault("CLOUDINARY_API_SECRET", "benchmark")
+    # Cloudinary stand-in with a fresh known-hash index, so every run uploads the same bytes
+    os.environ["IMAGE_STORE"] = "cloudinary"
+    os.environ["IMAGE_STORE_INDEX"] = os.path.join(tempfile.mkdtemp(prefix="bench_images_"), "index.sqlite3")
+
+
+def run_benchmark(args):
+    configure_environment(args)
+    fixtures = Fixtures(args.items, args.pdf_pages)
+    server = StandInServer(fixtures, args.bse_latency, args.groq_latency, args.upload_latency).start()
+
+    import cloudinary
+    import summarizer
+    import finalscraper
+    import metrics
+
+    finalscraper.BASE_URL = server.origin
+    finalscraper.SCRAPER_INDICES = [("BANKEX", server.origin + LISTING_PATH)]
+    finalscraper.WARMUP_SECONDS = args.warmup
+    summarizer.GROQ_URL = server.origin + "/openai/v1/chat/completions"
+    cloudinary.config(upload_prefix=server.origin + "/cloudinary")
+
+    # Time every item through the same function the scraper calls
+    latencies = []
+    if args.concurrency > 1:
+        original = finalscraper.scrape_detail_async
+
+        async def timed_detail(*a, **kw):
+            started = time.perf_counter()
+            result = await original(*a, **kw)
+            latencies.append(time.perf_counter() - started)
+            return result
+
+        finalscraper.scrape_detail_async = timed_detail
+    else:
+        original = finalscraper.scrape_detail
+
+        def timed_detail(*a, **kw):
+            started = time.perf_counter()
+            result = original(*a, **kw)
+            latencies.append(time.perf_counter() - started)
+            return result
+
+        finalscraper.scrape_detail = timed_detail
+
+    conn = finalscraper.get_db()
+    finalscraper.ensure_schema(conn)
+
+    def clear_rows():
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM announcements WHERE id = ANY(%s)", (fixtures.newsids,))
+        conn.commit()
+
+    clear_rows()
+    started = time.perf_counter()
+    try:
+        if args.concurrency > 1:
+            asyncio.run(finalscraper.scrape_bankex_async(args.concurrency))
+        else:
+            finalscraper.scrape_bankex()
+        elapsed = time.perf_counter() - started - args.warmup
+    finally:
+        clear_rows()
+        conn.close()
+        server.stop()
+
+    rss_self, rss_children = peak_rss_mb()
+    report = {
+        "items": len(latencies),
+        "expected_items": args.items,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "items_per_sec": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+        "p50_s": round(percentile(latencies, 50), 3) if latencies else None,
+        "p95_s": round(percentile(latencies, 95), 3) if latencies else None,
+        "peak_rss_mb": rss_self,
+        "peak_rss_children_mb": rss_children,
+        "latency": {"bse_s": args.bse_latency, "groq_s": args.groq_latency, "upload_s": args.upload_latency},
+        "requests": dict(server.requests),
+        "stages": metrics.run_metrics.snapshot()["stages"],
+    }
+    return report
+
+
+def print_report(report):
+    print("\n" + "=" * 60)
+    print(f" BENCHMARK (concurrency {report['concurrency']})")
+    print("=" * 60)
+    print(f"  Items:        {report['items']}/{report['expected_items']} in {report['elapsed_s']}s")
+    print(f"  Throughput:   {report['items_per_sec']} items/s")
+    print(f"  Item latency: p50 {report['p50_s']}s, p95 {report['p95_s']}s")
+    print(f"  Peak RSS:     {report['peak_rss_mb']} MB scraper, {report['peak_rss_children_mb']} MB browser")
+    print(f"  Requests:     {report['requests']}")
+    for stage, entry in report["stages"].items():
+        print(f"  {stage:22s} n={entry['count']:<4d} total {entry['total_s']:8.2f}s  avg {entry['avg_s']:.3f}s")
+    print("=" * 60 + "\n")
+
+
+def record_fixtures(newsids, fixtures_dir=FIXTURES_DIR):
+    """Save live AnnDet_new.aspx pages and their PDFs as benchmark fixtures"""
+    import finalscraper
+
+    session = finalscraper.get_http_session()
+    os.makedirs(os.path.join(fixtures_dir, "details"), exist_ok=True)
+    os.makedirs(os.path.join(fixtures_dir, "pdfs"), exist_ok=True)
+    for newsid in newsids:
+        response = session.get(finalscraper.detail_url_for(newsid), timeout=30)
+        response.raise_for_status()
+        # Relative links so the page resolves against whatever origin serves it
+        html = re.sub(r"https?://(www\.)?bseindia\.com", "", response.text)
+        with open(os.path.join(fixtures_dir, "details", f"{newsid}.html"), "w") as f:
+            f.write(html)
+        fields = finalscraper.parse_detail_html(html)
+        pdf_href = fields and fields.get("pdf_href")
+        if pdf_href:
+            pdf = session.get(finalscraper.BASE_URL + pdf_href if pdf_href.startswith("/") else pdf_href, timeout=60)
+            if pdf.status_code == 200:
+                with open(os.path.join(fixtures_dir, "pdfs", os.path.basename(pdf_href)), "wb") as f:
+                    f.write(pdf.content)
+        print(f"[RECORD] {newsid}: detail{' + pdf' if pdf_href else ''}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline scraper benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_server_options(sub):
+        sub.add_argument("--items", type=int, default=20, help="Announcements on the fake listing")
+        sub.add_argument("--pdf-pages", type=int, default=3)
+        sub.add_argument("--bse-latency", type=float, default=0.05, help="Seconds added to every BSE response")
+        sub.add_argument("--groq-latency", type=float, default=0.3)
+        sub.add_argument("--upload-latency", type=float, default=0.2)
+
+    run_parser = subparsers.add_parser("run", help="Run the scraper against the stand-ins and report")
+    add_server_options(run_parser)
+    run_parser.add_argument("--concurrency", type=int, default=1)
+    run_parser.add_argument("--warmup", type=float, default=0.0, help="Browser warm-up seconds (SCRAPER_WARMUP_SECONDS)")
+    run_parser.add_argument("--groq-rpm", type=int, default=100000, help="Groq limiter RPM (lifted so Groq isn't the bottleneck)")
+    run_parser.add_argument("--json", metavar="PATH", help="Also write the report as JSON")
+    run_parser.add_argument("--min-rate", type=float, help="Exit 1 if items/sec falls below this")
+    run_parser.add_argument("--max-p95", type=float, help="Exit 1 if p95 item latency exceeds this")
+
+    serve_parser = subparsers.add_parser("serve", help="Only run the stand-in server")
+    add_server_options(serve_parser)
+
+    record_parser = subparsers.add_parser("record", help="Save live detail pages and PDFs as fixtures")
+    record_parser.add_argument("newsids", nargs="+")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record_fixtures(args.newsids)
+        return 0
+
+    if args.command == "serve":
+        fixtures = Fixtures(args.items, args.pdf_pages)
+        server = StandInServer(fixtures, args.bse_latency, args.groq_latency, args.upload_latency).start()
+        print(f"[BENCH] Listing:    {server.origin}{LISTING_PATH}")
+        print(f"[BENCH] Groq:       {server.origin}/openai/v1/chat/completions")
+        print(f"[BENCH] Cloudinary: upload_prefix={server.origin}/cloudinary")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.stop()
+        return 0
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = report["items"] < args.items
+    if args.min_rate is not None and report["items_per_sec"] < args.min_rate:
+        print(f"[BENCH] FAIL: {report['items_per_sec']} items/s is below --min-rate {args.min_rate}")
+        failed = True
+    if args.max_p95 is not None and (report["p95_s"] is None or report["p95_s"] > args.max_p95):
+        print(f"[BENCH] FAIL: p95 {report['p95_s']}s is above --max-p95 {args.max_p95}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
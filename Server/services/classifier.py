@@ -0,0 +1,218 @@
+import sys
+import time
+import random
+import argparse
+
+# pyahocorasick finds every keyword in one pass; without it classify() falls
+# back to scanning each rule's keywords in priority order
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+# (category, keywords) in priority order: the first category with any keyword
+# present in the lowercased text wins
+CATEGORY_RULES = [
+    ("agm_egm", ["agm", "egm", "general meeting", "annual general meeting"]),
+    ("board_meeting", ["board meeting", "board meet"]),
+    ("results", ["financial result", "quarterly result", "results", "unaudited", "audited financial"]),
+    ("corp_action", ["dividend", "bonus", "split", "buyback", "corporate action", "record date"]),
+    ("insider_trading", ["insider", "sast", "substantial acquisition", "continual disclosure"]),
+    ("company_update", ["update", "clarification", "announcement", "press release"]),
+    ("new_listing", ["listing", "ipo", "public offer", "initial public"]),
+    ("integrated_filing", ["filing", "compliance", "trading window", "outcome"]),
+]
+DEFAULT_CATEGORY = "other"
+
+RECLASSIFY_BATCH_SIZE = 1000
+
+
+class KeywordClassifier:
+    """CATEGORY_RULES compiled into a single Aho-Corasick automaton.
+
+    Every keyword occurrence is reported in one pass over the text and the
+    lowest-numbered rule among them is returned, which gives the same
+    answer as checking the rules one after another.
+    """
+
+    def __init__(self, rules=CATEGORY_RULES, default=DEFAULT_CATEGORY):
+        self.rules = rules
+        self.categories = [category for category, _ in rules]
+        self.default = default
+        self._automaton = None
+        if HAS_AHOCORASICK:
+            priorities = {}
+            for priority, (_, keywords) in enumerate(rules):
+                for keyword in keywords:
+                    priorities.setdefault(keyword, priority)
+            automaton = ahocorasick.Automaton()
+            for keyword, priority in priorities.items():
+                automaton.add_word(keyword, priority)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def classify_text(self, text):
+        if self._automaton is None:
+            return self.scan_text(text)
+        best = None
+        for _, priority in self._automaton.iter(text):
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return self.default if best is None else self.categories[best]
+
+    def scan_text(self, text):
+        """Rule-by-rule substring scan (the original classify logic)"""
+        for category, keywords in self.rules:
+            if any(keyword in text for keyword in keywords):
+                return category
+        return self.default
+
+
+_classifier = KeywordClassifier()
+
+
+def classify(title, description):
+    """Classify announcement based on title and description"""
+    return _classifier.classify_text(f"{title or ''} {description or ''}".lower())
+
+
+def reclassify(conn, write_conn, batch_size=RECLASSIFY_BATCH_SIZE, dry_run=True):
+    """Re-run the rules over stored titles and update categories the title decides.
+
+    Live rows were classified on title plus description, and the description
+    isn't stored (the summary is model output, not the filing), so only the
+    title is trusted here: a row changes only when its title alone matches a
+    rule that outranks the stored category (or the stored one is `other` or
+    unknown). A lower-priority title match or no match at all keeps the
+    category, which may have come from a stronger keyword in the description. Rows
+    stream through a server-side cursor on `conn` and updates go out in
+    batches on `write_conn`, so memory stays flat however big the table is.
+    Nothing is written unless dry_run is False.
+    Returns {"scanned", "changed", "kept", "moves": {(old, new): count}}.
+    """
+    from psycopg2.extras import execute_values
+
+    scanned = 0
+    changed = 0
+    kept = 0
+    moves = {}
+    started = time.monotonic()
+    priorities = {category: priority for priority, (category, _) in enumerate(CATEGORY_RULES)}
+
+    with conn.cursor(name="reclassify_announcements") as cur:
+        cur.itersize = batch_size
+        cur.execute("SELECT id, title, category FROM announcements")
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            updates = []
+            for newsid, title, category in rows:
+                new_category = classify(title, None)
+                stored_priority = priorities.get(category, len(priorities))
+                if new_category == DEFAULT_CATEGORY or priorities[new_category] >= stored_priority:
+                    # The title says nothing the stored category doesn't already outrank
+                    kept += new_category != category
+                else:
+                    updates.append((newsid, new_category))
+                    moves[(category, new_category)] = moves.get((category, new_category), 0) + 1
+            scanned += len(rows)
+            changed += len(updates)
+
+            if updates and not dry_run:
+                with write_conn.cursor() as write_cur:
+                    execute_values(write_cur, """
+                        UPDATE announcements AS a
+                        SET category = v.category
+                        FROM (VALUES %s) AS v(id, category)
+                        WHERE a.id = v.id
+                    """, updates, page_size=len(updates))
+                write_conn.commit()
+            print(f"[RECLASSIFY] {scanned} scanned, {changed} {'would change' if dry_run else 'updated'}")
+    conn.rollback()
+
+    print(f"[RECLASSIFY] Done in {time.monotonic() - started:.1f}s: {changed} categor"
+          f"{'y' if changed == 1 else 'ies'} {'would change' if dry_run else 'changed'}, "
+          f"{kept} row(s) kept (the title matches no rule, or a lower-priority one)")
+    if dry_run and changed:
+        print("[RECLASSIFY] Dry run, nothing written; re-run with --apply to update")
+    for (old, new), count in sorted(moves.items(), key=lambda item: -item[1]):
+        print(f"  {old} -> {new}: {count}")
+    return {"scanned": scanned, "changed": changed, "kept": kept, "moves": moves}
+
+
+def benchmark(samples=5000, repeat=5, seed=0):
+    """Time the compiled matcher against the rule-by-rule scan on synthetic announcements"""
+    rng = random.Random(seed)
+    filler = ("the bank has informed the exchange regarding intimation under regulation 30 of sebi "
+              "lodr copy of newspaper advertisement analyst investor call schedule of the company "
+              "please find enclosed herewith the disclosure").split()
+    keywords = [keyword for _, rule_keywords in CATEGORY_RULES for keyword in rule_keywords]
+    texts = []
+    for _ in range(samples):
+        words = [rng.choice(filler) for _ in range(rng.randint(10, 150))]
+        for _ in range(rng.randint(0, 2)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        texts.append(" ".join(words))
+
+    mismatches = sum(1 for text in texts if _classifier.classify_text(text) != _classifier.scan_text(text))
+
+    def best_of(fn):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for text in texts:
+                fn(text)
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    scan = best_of(_classifier.scan_text)
+    compiled = best_of(_classifier.classify_text)
+    return {
+        "samples": samples,
+        "mismatches": mismatches,
+        "scan_us": scan / samples * 1e6,
+        "compiled_us": compiled / samples * 1e6,
+        "compiled_backend": "aho-corasick" if _classifier._automaton is not None else "scan",
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Announcement category rules")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reclassify_parser = subparsers.add_parser("reclassify", help="Re-run the rules over stored announcements")
+    reclassify_parser.add_argument("--batch-size", type=int, default=RECLASSIFY_BATCH_SIZE)
+    reclassify_parser.add_argument("--apply", action="store_true",
+                                   help="Write the changes (default: report what would change)")
+
+    bench_parser = subparsers.add_parser("bench", help="Compare the compiled matcher with the rule-by-rule scan")
+    bench_parser.add_argument("--samples", type=int, default=5000)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        result = benchmark(args.samples)
+        print(f"[BENCH] {result['samples']} texts, {result['mismatches']} mismatches")
+        print(f"[BENCH] rule scan:  {result['scan_us']:.2f} us/text")
+        print(f"[BENCH] compiled:   {result['compiled_us']:.2f} us/text ({result['compiled_backend']})")
+        print(f"[BENCH] speedup:    {result['scan_us'] / result['compiled_us']:.2f}x")
+        return 1 if result["mismatches"] else 0
+
+    from db import get_db
+
+    conn = get_db()
+    write_conn = get_db()
+    try:
+        reclassify(conn, write_conn, max(1, args.batch_size), dry_run=not args.apply)
+    finally:
+        conn.close()
+        write_conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,3 +6,143 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
 def get_db():
     return psycopg2.connect(os.getenv('DATABASE_URL'))
+
+# Additive changes to config/db.sql for databases created before them. Each
+# statement is idempotent; schema_version records how many have been applied,
+# so a process start runs only the ones that are new (DDL takes an ACCESS
+# EXCLUSIVE lock on announcements even when it changes nothing). Append only:
+# a statement's position is its version.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE announcements ADD COLUMN IF NOT EXISTS indices TEXT[]",
+    "CREATE INDEX IF NOT EXISTS idx_announcements_indices ON announcements USING GIN (indices)",
+    """CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+        job TEXT NOT NULL,
+        company_code TEXT NOT NULL,
+        window_start DATE NOT NULL,
+        window_end DATE NOT NULL,
+        next_page INTEGER NOT NULL DEFAULT 1,
+        done BOOLEAN NOT NULL DEFAULT FALSE,
+        items_seen INTEGER NOT NULL DEFAULT 0,
+        items_inserted INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT NOW(),
+        PRIMARY KEY (job, company_code, window_start)
+    )""",
+    "ALTER TABLE announcements ADD COLUMN IF NOT EXISTS pdf_text TEXT",
+    """ALTER TABLE announcements ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(company_name, '') || ' ' || coalesce(summary, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(pdf_text, '')), 'C')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS idx_announcements_search ON announcements USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS idx_announcements_filed_at ON announcements (filed_at DESC)",
+    "ALTER TABLE announcements ADD COLUMN IF NOT EXISTS pdf_sha256 TEXT",
+    "ALTER TABLE announcements ADD COLUMN IF NOT EXISTS text_simhash BIGINT",
+    "ALTER TABLE announcements ADD COLUMN IF NOT EXISTS text_numbers TEXT",
+    "ALTER TABLE announcements ADD COLUMN IF NOT EXISTS duplicate_of TEXT",
+    "CREATE INDEX IF NOT EXISTS idx_announcements_pdf_sha256 ON announcements (pdf_sha256)",
+    "CREATE INDEX IF NOT EXISTS idx_announcements_scraped_at ON announcements (scraped_at)",
+    "ALTER TABLE announcements ADD COLUMN IF NOT EXISTS enriched BOOLEAN NOT NULL DEFAULT TRUE",
+    """CREATE TABLE IF NOT EXISTS scrape_jobs (
+        id BIGSERIAL PRIMARY KEY,
+        stage TEXT NOT NULL,
+        newsid TEXT NOT NULL,
+        payload JSONB NOT NULL DEFAULT '{}',
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 5,
+        available_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        leased_by TEXT,
+        lease_expires_at TIMESTAMP,
+        last_error TEXT,
+        created_at TIMESTAMP DEFAULT NOW(),
+        updated_at TIMESTAMP DEFAULT NOW(),
+        UNIQUE (stage, newsid)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_scrape_jobs_ready ON scrape_jobs (stage, available_at) WHERE status = 'pending'",
+    "CREATE INDEX IF NOT EXISTS idx_scrape_jobs_leased ON scrape_jobs (stage, lease_expires_at) WHERE status = 'leased'",
+    # Rows that predate fan-out count as fanned out, so the first run doesn't
+    # send the whole archive; rows inserted afterwards start out false
+    "ALTER TABLE announcements ADD COLUMN IF NOT EXISTS fanned_out BOOLEAN NOT NULL DEFAULT TRUE",
+    "ALTER TABLE announcements ALTER COLUMN fanned_out SET DEFAULT FALSE",
+    "CREATE INDEX IF NOT EXISTS idx_announcements_fanout ON announcements (scraped_at) WHERE NOT fanned_out",
+    """CREATE TABLE IF NOT EXISTS subscribers (
+        id SERIAL PRIMARY KEY,
+        email TEXT NOT NULL UNIQUE,
+        companies TEXT[],
+        categories TEXT[],
+        digest_mode TEXT DEFAULT 'daily',
+        is_active BOOLEAN DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT NOW()
+    )""",
+    """CREATE TABLE IF NOT EXISTS subscriber_deliveries (
+        id BIGSERIAL PRIMARY KEY,
+        subscriber_id INTEGER NOT NULL REFERENCES subscribers(id) ON DELETE CASCADE,
+        announcement_id TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT NOW(),
+        sent_at TIMESTAMP,
+        UNIQUE (subscriber_id, announcement_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS subscriber_digests (
+        id BIGSERIAL PRIMARY KEY,
+        subscriber_id INTEGER NOT NULL REFERENCES subscribers(id) ON DELETE CASCADE,
+        digest_mode TEXT NOT NULL,
+        period_start DATE NOT NULL,
+        announcement_ids TEXT[] NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT NOW(),
+        updated_at TIMESTAMP DEFAULT NOW(),
+        sent_at TIMESTAMP,
+        UNIQUE (subscriber_id, digest_mode, period_start)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_subscriber_deliveries_pending ON subscriber_deliveries (created_at) WHERE status = 'pending'",
+    "CREATE INDEX IF NOT EXISTS idx_subscriber_digests_pending ON subscriber_digests (period_start) WHERE status = 'pending'",
+    "ALTER TABLE backfill_checkpoints ADD COLUMN IF NOT EXISTS failed_newsids TEXT[] NOT NULL DEFAULT '{}'",
+    # Some filings have no attachment
+    "ALTER TABLE announcements ALTER COLUMN pdf_url DROP NOT NULL",
+]
+# Upgrades that need something the server may not offer (pg_trgm is a
+# contrib extension); a failure is logged and the rest of the schema stands
+OPTIONAL_SCHEMA_UPGRADES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_announcements_company_name_trgm ON announcements USING GIN (company_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_announcements_company_code_trgm ON announcements USING GIN (company_code gin_trgm_ops)",
+]
+# Held while upgrading, so processes starting together don't both run DDL
+SCHEMA_LOCK_ID = 7262011
+_schema_ready = False
+
+def schema_version(cur):
+    """Number of SCHEMA_UPGRADES applied (0 before schema_version existed)"""
+    cur.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return 0
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cur.fetchone()[0]
+
+def ensure_schema(conn):
+    global _schema_ready
+    if _schema_ready:
+        return
+    with conn.cursor() as cur:
+        current = schema_version(cur)
+        if current < len(SCHEMA_UPGRADES):
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_ID,))
+            current = schema_version(cur)
+        if current < len(SCHEMA_UPGRADES):
+            for statement in SCHEMA_UPGRADES[current:]:
+                cur.execute(statement)
+            for statement in OPTIONAL_SCHEMA_UPGRADES:
+                cur.execute("SAVEPOINT optional_upgrade")
+                try:
+                    cur.execute(statement)
+                except psycopg2.Error as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT optional_upgrade")
+                    print(f"[DB] Skipped optional upgrade: {str(e).strip().splitlines()[0]}")
+            cur.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+            cur.execute("DELETE FROM schema_version")
+            cur.execute("INSERT INTO schema_version (version) VALUES (%s)", (len(SCHEMA_UPGRADES),))
+            print(f"[DB] Schema upgraded from version {current} to {len(SCHEMA_UPGRADES)}")
+    conn.commit()
+    _schema_ready = True
@@ -0,0 +1,135 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict, deque
+
+# Revised filings and the same intimation posted under several newsids are
+# matched against recent announcements, so their images and summary are
+# reused instead of rendered, uploaded and summarized again:
+# - same PDF bytes (sha256): images, summary and PDF text are reused
+# - near-identical description (SimHash within DEDUPE_MAX_DISTANCE bits)
+#   from the same company with the same figures: the summary is reused
+DEDUPE = os.getenv("DEDUPE", "true").lower() != "false"
+DEDUPE_WINDOW_DAYS = int(os.getenv("DEDUPE_WINDOW_DAYS", "30"))
+# Announcement descriptions are a sentence or two, where one added word moves
+# the hash 4-9 bits and an unrelated filing sits about 20 bits away
+DEDUPE_MAX_DISTANCE = int(os.getenv("DEDUPE_MAX_DISTANCE", "10"))
+DEDUPE_MIN_TOKENS = int(os.getenv("DEDUPE_MIN_TOKENS", "8"))
+# The index keeps the most recent entries only, so a long backfill can't grow
+# it without bound: this many descriptions per company, this many PDF hashes
+DEDUPE_MAX_PER_COMPANY = int(os.getenv("DEDUPE_MAX_PER_COMPANY", "200"))
+DEDUPE_MAX_PDFS = int(os.getenv("DEDUPE_MAX_PDFS", "20000"))
+
+SIMHASH_BITS = 64
+_MASK = (1 << SIMHASH_BITS) - 1
+_TOKEN = re.compile(r"[a-z0-9]+(?:[./-][a-z0-9]+)*")
+_NUMBER = re.compile(r"\d")
+
+
+def tokenize(text):
+    return _TOKEN.findall((text or "").lower())
+
+
+def simhash(text):
+    """64-bit SimHash of word unigrams and bigrams, as a signed int (fits BIGINT); None for short text"""
+    tokens = tokenize(text)
+    if len(tokens) < DEDUPE_MIN_TOKENS:
+        return None
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    fingerprint = sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+    return fingerprint - (1 << SIMHASH_BITS) if fingerprint >> (SIMHASH_BITS - 1) else fingerprint
+
+
+def hamming(a, b):
+    return bin((a ^ b) & _MASK).count("1")
+
+
+def number_signature(text):
+    """Sorted numeric tokens (dates, amounts, ratios); two filings only match if these agree"""
+    return " ".join(sorted({token for token in tokenize(text) if _NUMBER.search(token)}))[:500]
+
+
+def text_fingerprint(title, description):
+    """(simhash, number signature) for an announcement's title and description"""
+    text = f"{title or ''} {description or ''}"
+    return simhash(text), number_signature(text)
+
+
+class FingerprintIndex:
+    """Recent announcements keyed by PDF hash and by company, for duplicate lookups.
+
+    Loaded from the DB at the start of a run and extended as rows are
+    scraped, so duplicates inside one listing are caught too; rows queue
+    workers are still enriching are left out. Only the newest
+    max_per_company descriptions per company and max_pdfs PDF hashes are
+    kept. Lookups come from the PDF download threads as well as the
+    scraper, hence the lock.
+    """
+
+    FIELDS = ("id", "company_code", "summary", "screenshot_url", "pdf_sha256", "text_simhash", "text_numbers")
+
+    def __init__(self, max_distance=DEDUPE_MAX_DISTANCE, max_per_company=DEDUPE_MAX_PER_COMPANY,
+                 max_pdfs=DEDUPE_MAX_PDFS):
+        self.max_distance = max_distance
+        self.max_per_company = max_per_company
+        self.max_pdfs = max_pdfs
+        self._by_pdf = OrderedDict()
+        self._by_company = {}
+        self._lock = threading.Lock()
+
+    def load(self, conn, window_days=DEDUPE_WINDOW_DAYS):
+        """Index announcements scraped in the last `window_days`; returns rows loaded"""
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT {', '.join(self.FIELDS)}
+                FROM announcements
+                WHERE scraped_at > NOW() - make_interval(days => %s)
+                  AND (pdf_sha256 IS NOT NULL OR text_simhash IS NOT NULL)
+                  AND enriched
+                ORDER BY scraped_at
+            """, (window_days,))
+            rows = cur.fetchall()
+        conn.commit()
+        for row in rows:
+            self.add(dict(zip(self.FIELDS, row)))
+        return len(rows)
+
+    def add(self, row):
+        entry = {field: row.get(field) for field in self.FIELDS}
+        with self._lock:
+            digest = entry["pdf_sha256"]
+            if digest and digest not in self._by_pdf:
+                self._by_pdf[digest] = entry
+                if len(self._by_pdf) > self.max_pdfs:
+                    self._by_pdf.popitem(last=False)
+            if entry["text_simhash"] is not None and entry["company_code"]:
+                entries = self._by_company.get(entry["company_code"])
+                if entries is None:
+                    entries = self._by_company[entry["company_code"]] = deque(maxlen=self.max_per_company)
+                entries.append(entry)
+
+    def match_pdf(self, digest):
+        if not digest:
+            return None
+        with self._lock:
+            return self._by_pdf.get(digest)
+
+    def match_text(self, company_code, fingerprint, numbers):
+        """Closest same-company entry within max_distance bits whose figures agree"""
+        if fingerprint is None or not company_code:
+            return None
+        best = None
+        with self._lock:
+            for entry in self._by_company.get(company_code, ()):
+                if entry["text_numbers"] != numbers:
+                    continue
+                distance = hamming(entry["text_simhash"], fingerprint)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, entry)
+        return best[1] if best else None
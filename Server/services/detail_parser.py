@@ -0,0 +1,165 @@
+"""
+Browser-free parser for BSE's server-rendered AnnDet_new.aspx pages.
+
+Builds a small element tree with the stdlib HTMLParser and pulls out the
+same fields scrape_detail reads through Playwright locators. Returns None
+when the markup doesn't match, so callers can fall back to rendering.
+"""
+import re
+from html.parser import HTMLParser
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+# Tags whose boundaries become line breaks in extracted text
+BLOCK_TAGS = {"p", "div", "tr", "li", "table", "tbody", "ul", "ol", "h1", "h2", "h3", "h4"}
+CELL_TAGS = {"td", "th"}
+SKIP_TEXT_TAGS = {"script", "style", "noscript"}
+
+
+class Element:
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        self.parent = parent
+
+    @property
+    def classes(self):
+        return (self.attrs.get("class") or "").split()
+
+    def iter(self):
+        """Yield this element and all descendant elements in document order"""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed([c for c in node.children if isinstance(c, Element)]))
+
+    def find(self, predicate):
+        for node in self.iter():
+            if predicate(node):
+                return node
+        return None
+
+    def find_all(self, predicate):
+        return [node for node in self.iter() if predicate(node)]
+
+    def _collect(self, parts):
+        if self.tag in SKIP_TEXT_TAGS:
+            return
+        if self.tag == "br":
+            parts.append("\n")
+        elif self.tag in BLOCK_TAGS:
+            parts.append("\n")
+        for child in self.children:
+            if isinstance(child, Element):
+                child._collect(parts)
+            else:
+                parts.append(child)
+        if self.tag in BLOCK_TAGS:
+            parts.append("\n")
+        elif self.tag in CELL_TAGS:
+            parts.append(" ")
+
+    def text(self):
+        """Approximate Playwright's inner_text(): collapsed spaces, kept line breaks"""
+        parts = []
+        self._collect(parts)
+        lines = [re.sub(r"[ \t\r\f\v\xa0]+", " ", line).strip() for line in "".join(parts).split("\n")]
+        text = "\n".join(lines)
+        return re.sub(r"\n{2,}", "\n", text).strip()
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("#document", {})
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        element = Element(tag, {k: (v or "") for k, v in attrs}, self.stack[-1])
+        self.stack[-1].children.append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        element = Element(tag, {k: (v or "") for k, v in attrs}, self.stack[-1])
+        self.stack[-1].children.append(element)
+
+    def handle_endtag(self, tag):
+        # Tolerate unclosed tags: pop back to the nearest matching open element
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+def parse_html(html):
+    """Parse an HTML document into an Element tree"""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def _has_class(name):
+    return lambda el: name in el.classes
+
+
+def parse_detail_html(html):
+    """Extract announcement fields from an AnnDet_new.aspx document.
+
+    Returns a dict with company, security_code, title, description, pdf_href
+    and time_text, or None if any required element is missing.
+    """
+    root = parse_html(html)
+
+    company_cell = root.find(lambda el: el.attrs.get("id") == "ContentPlaceHolder1_tdCompNm")
+    if company_cell is None:
+        return None
+    company_link = company_cell.find(lambda el: el.tag == "a")
+    code_span = company_cell.find(_has_class("spn02"))
+    title_cell = root.find(lambda el: el.tag == "td" and "TTHeadergrey" in el.classes)
+    description_cells = root.find_all(lambda el: el.tag == "td" and "TTRow_leftnotices" in el.classes)
+    # Playwright's strict locator fails on zero or several matches; so do we
+    if company_link is None or code_span is None or title_cell is None or len(description_cells) != 1:
+        return None
+
+    company = company_link.text()
+    if not company:
+        return None
+
+    pdf_link = root.find(
+        lambda el: el.tag == "a" and "tablebluelink" in el.classes
+        and el.attrs.get("href", "").endswith(".pdf")
+    )
+
+    # Equivalent of locator("text=Exchange Received Time").locator("xpath=.."),
+    # climbing a little further when the label is wrapped in inline markup
+    time_text = None
+    label = root.find(
+        lambda el: any(isinstance(c, str) and "Exchange Received Time" in c for c in el.children)
+    )
+    if label is not None:
+        row = label.parent or label
+        for _ in range(3):
+            if "Exchange Disseminated" in row.text() or row.parent is None:
+                break
+            row = row.parent
+        time_text = row.text()
+
+    return {
+        "company": company,
+        "security_code": code_span.text(),
+        "title": title_cell.text(),
+        "description": description_cells[0].text(),
+        "pdf_href": pdf_link.attrs.get("href") if pdf_link is not None else None,
+        "time_text": time_text,
+    }
@@ -291,7 +291,8 @@ async function processUnsentAnnouncements() {
     try {
         // Get all unsent announcements
         const result = await pool.query(
-            'SELECT * FROM announcements WHERE uploaded = false ORDER BY filed_at DESC'
+            // Rows still being enriched by queue workers wait for their images and summary
+            'SELECT * FROM announcements WHERE uploaded = false AND enriched ORDER BY filed_at DESC'
         );
 
         const unsent = result.rows;
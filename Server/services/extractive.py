@@ -0,0 +1,195 @@
+import os
+import re
+import math
+
+# Extractive pre-summarizer: sentences of the description and PDF text are
+# ranked with TextRank over TF-IDF vectors, biased towards the lead and the
+# title. It trims what is sent to Groq to SUMMARY_INPUT_TOKENS, and its top
+# sentences are the summary when Groq is unavailable.
+SUMMARY_INPUT_TOKENS = int(os.getenv("SUMMARY_INPUT_TOKENS", "700"))
+SUMMARY_EXTRACTIVE_SENTENCES = int(os.getenv("SUMMARY_EXTRACTIVE_SENTENCES", "3"))
+# Offline summaries longer than this are cut at a word boundary
+SUMMARY_EXTRACTIVE_CHARS = int(os.getenv("SUMMARY_EXTRACTIVE_CHARS", "600"))
+
+# Ranking is quadratic in sentences; later ones are rarely the material part
+MAX_SENTENCES = 250
+MAX_SENTENCE_CHARS = 500
+MIN_SENTENCE_WORDS = 4
+DAMPING = 0.85
+ITERATIONS = 30
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers him his how i if in into is it its itself just me more most my no nor not
+now of off on once only or other our ours out over own same she should so some such than that the
+their them then there these they this those through to too under until up upon very was we were
+what when where which while who whom why will with would you your shall may per said such via
+""".split()) | frozenset("""
+pursuant regulation regulations sebi listing obligations disclosure requirements hereby inform
+informed intimate intimation enclosed enclose attached please find kindly take note record thanking
+thank yours faithfully truly sir madam dear limited ltd bse nse exchange exchanges scrip code
+symbol company secretary compliance officer phiroze jeejeebhoy towers dalal street mumbai floor
+bandra kurla complex respect reference refer request same herewith above-mentioned aforesaid
+""".split())
+
+# A period after these doesn't end a sentence
+ABBREVIATIONS = frozenset("""
+rs no nos ltd pvt co inc corp mr mrs ms dr sr jr st vs viz ie eg etc reg dt fy approx govt dept
+""".split())
+
+_WORD = re.compile(r"[a-z][a-z0-9&'-]*|\d[\d,.]*%?")
+_BOUNDARY = re.compile(r"(?<=[.!?;])\s+(?=[\"'(\[]?[A-Z0-9])")
+
+
+def estimate_tokens(text):
+    """~4 characters per token, the same estimate the Groq limiter uses"""
+    return len(text or "") // 4
+
+
+def _clip(text, limit):
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0].rstrip(",;:") + "..."
+
+
+def split_sentences(text):
+    """Sentences of `text`; PDF line breaks are joined, blank lines end a sentence"""
+    sentences = []
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        pieces = _BOUNDARY.split(paragraph)
+        merged = []
+        for piece in pieces:
+            last_word = merged[-1].rsplit(" ", 1)[-1].rstrip(".").lower().replace(".", "") if merged else ""
+            if merged and merged[-1].endswith(".") and (last_word in ABBREVIATIONS or len(last_word) == 1):
+                merged[-1] = f"{merged[-1]} {piece}"
+            else:
+                merged.append(piece)
+        sentences.extend(_clip(s, MAX_SENTENCE_CHARS) for s in merged)
+    return sentences
+
+
+def terms(sentence):
+    return [w for w in _WORD.findall(sentence.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def _tfidf(term_lists):
+    df = {}
+    for words in term_lists:
+        for word in set(words):
+            df[word] = df.get(word, 0) + 1
+    n = len(term_lists)
+    vectors = []
+    for words in term_lists:
+        counts = {}
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+        vector = {w: (1 + math.log(c)) * math.log(1 + n / df[w]) for w, c in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        vectors.append({w: v / norm for w, v in vector.items()})
+    return vectors
+
+
+def _cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b[w] for w, v in a.items() if w in b)
+
+
+def rank(sentences, title="", lead=0):
+    """TextRank score per sentence; the first `lead` sentences and ones sharing
+    words with the title get a larger share of the teleport probability."""
+    term_lists = [terms(s) for s in sentences]
+    vectors = _tfidf(term_lists)
+    title_terms = set(terms(title))
+    n = len(sentences)
+
+    prior = []
+    for i, words in enumerate(term_lists):
+        if len(words) < MIN_SENTENCE_WORDS // 2 or len(sentences[i].split()) < MIN_SENTENCE_WORDS:
+            prior.append(0.0)
+            continue
+        overlap = len(title_terms & set(words)) / len(title_terms) if title_terms else 0.0
+        prior.append(1.0 + 2.0 * overlap + (1.0 if i < lead else 0.0) + 1.0 / (1 + i))
+    total = sum(prior)
+    if not total:
+        return [0.0] * n
+    prior = [p / total for p in prior]
+
+    weights = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        if not prior[i]:
+            continue
+        for j in range(i + 1, n):
+            if prior[j]:
+                weights[i][j] = weights[j][i] = _cosine(vectors[i], vectors[j])
+    out_sums = [sum(row) for row in weights]
+    # (j, share of j's score passed to i) for every sentence j linked to i
+    incoming = [[(j, weights[j][i] / out_sums[j]) for j in range(n) if weights[j][i]] for i in range(n)]
+
+    scores = prior[:]
+    for _ in range(ITERATIONS):
+        scores = [
+            (1 - DAMPING) * prior[i] + DAMPING * sum(share * scores[j] for j, share in incoming[i])
+            for i in range(n)
+        ]
+        # Isolated sentences keep their prior instead of draining to zero
+        scores = [s if out_sums[i] else prior[i] for i, s in enumerate(scores)]
+    return scores
+
+
+def _candidates(title, description, pdf_text):
+    lead = split_sentences(description)
+    sentences = (lead + split_sentences(pdf_text))[:MAX_SENTENCES]
+    # The same sentence often appears in the description and again in the PDF
+    seen = set()
+    unique = []
+    for sentence in sentences:
+        key = sentence.lower()
+        if key not in seen:
+            seen.add(key)
+            unique.append(sentence)
+    return unique, rank(unique, title, lead=len(lead))
+
+
+def _pick(sentences, scores, fits):
+    chosen = []
+    for i in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        if scores[i] <= 0:
+            break
+        if fits(chosen, sentences[i]):
+            chosen.append(i)
+    return [sentences[i] for i in sorted(chosen)]
+
+
+def condense(title, description, pdf_text="", token_budget=SUMMARY_INPUT_TOKENS):
+    """Description and PDF text trimmed to about `token_budget` tokens.
+
+    Text that already fits is returned whole; otherwise the highest-ranked
+    sentences that fit are kept, in document order.
+    """
+    full = "\n\n".join(part for part in (description, pdf_text) if part)
+    if token_budget <= 0 or estimate_tokens(full) <= token_budget:
+        return full
+    sentences, scores = _candidates(title, description, pdf_text)
+    budget_chars = token_budget * 4
+
+    def fits(chosen, sentence):
+        used = sum(len(sentences[i]) + 1 for i in chosen)
+        return used + len(sentence) <= budget_chars
+
+    picked = _pick(sentences, scores, fits)
+    return " ".join(picked) if picked else _clip(full, budget_chars)
+
+
+def summarize(title, description, pdf_text="", max_sentences=SUMMARY_EXTRACTIVE_SENTENCES,
+              max_chars=SUMMARY_EXTRACTIVE_CHARS):
+    """Offline summary: the top `max_sentences` sentences in document order"""
+    sentences, scores = _candidates(title, description, pdf_text)
+    picked = _pick(sentences, scores, lambda chosen, _: len(chosen) < max_sentences)
+    if not picked:
+        return _clip(" ".join((description or title or "").split()), max_chars)
+    return _clip(" ".join(picked), max_chars)
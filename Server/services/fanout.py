@@ -0,0 +1,243 @@
+"""Subscriber fan-out: turns newly scraped announcements into per-subscriber
+delivery rows (digest_mode 'instant') and digest rows (daily / weekly).
+
+Active subscribers are loaded once per run into an inverted index keyed by
+watchlist company and category, so each announcement only touches the
+subscribers it matches. Announcements are claimed with FOR UPDATE SKIP
+LOCKED and marked fanned_out in the same transaction as their rows.
+
+    python fanout.py                 # fan out everything pending
+    python fanout.py --dry-run       # report matches, write nothing
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import metrics
+
+# Announcements claimed per transaction
+FANOUT_BATCH_SIZE = int(os.getenv("FANOUT_BATCH_SIZE", "200"))
+# Rows per multi-row INSERT
+FANOUT_WRITE_PAGE_SIZE = int(os.getenv("FANOUT_WRITE_PAGE_SIZE", "5000"))
+# Older filings (backfills, a long outage) are marked fanned out unsent
+FANOUT_MAX_AGE_HOURS = int(os.getenv("FANOUT_MAX_AGE_HOURS", "48"))
+
+DIGEST_MODES = ("instant", "daily", "weekly")
+DEFAULT_DIGEST_MODE = "daily"
+DIGEST_TIMEZONE = ZoneInfo("Asia/Kolkata")
+
+
+def normalize(value):
+    return " ".join(str(value).split()).lower() if value else ""
+
+
+class SubscriberIndex:
+    """Inverted index from watchlist company / category to subscriber ids.
+
+    A subscriber with both filters sits under each (company, category)
+    pair, one with a single filter under each of its values, and one with
+    neither in `everyone`. The four groups don't overlap, so match() reads
+    exactly the matching ids. A watchlist entry may be a BSE code or a
+    company name.
+    """
+
+    def __init__(self):
+        self.by_pair = {}
+        self.by_company = {}
+        self.by_category = {}
+        self.everyone = []
+        self.modes = {}
+
+    def __len__(self):
+        return len(self.modes)
+
+    def add(self, subscriber_id, companies=None, categories=None, digest_mode=None):
+        companies = {normalize(c) for c in companies or ()} - {""}
+        categories = {normalize(c) for c in categories or ()} - {""}
+        mode = normalize(digest_mode)
+        self.modes[subscriber_id] = mode if mode in DIGEST_MODES else DEFAULT_DIGEST_MODE
+
+        if companies and categories:
+            for company in companies:
+                for category in categories:
+                    self.by_pair.setdefault((company, category), []).append(subscriber_id)
+        elif companies:
+            for company in companies:
+                self.by_company.setdefault(company, []).append(subscriber_id)
+        elif categories:
+            for category in categories:
+                self.by_category.setdefault(category, []).append(subscriber_id)
+        else:
+            self.everyone.append(subscriber_id)
+
+    def match(self, company_keys, category):
+        """Ids of subscribers whose watchlist covers the announcement"""
+        category = normalize(category)
+        matched = set(self.everyone)
+        matched.update(self.by_category.get(category, ()))
+        for company in company_keys:
+            matched.update(self.by_company.get(company, ()))
+            matched.update(self.by_pair.get((company, category), ()))
+        return matched
+
+    @classmethod
+    def load(cls, conn, batch_size=5000):
+        """Index of all active subscribers, streamed through a server-side cursor"""
+        index = cls()
+        with conn.cursor(name="fanout_subscribers") as cur:
+            cur.itersize = batch_size
+            cur.execute("""
+                SELECT id, companies, categories, digest_mode
+                FROM subscribers
+                WHERE is_active
+            """)
+            for subscriber_id, companies, categories, digest_mode in cur:
+                index.add(subscriber_id, companies, categories, digest_mode)
+        conn.commit()
+        return index
+
+
+def company_keys(company_code, company_name):
+    return {normalize(company_code), normalize(company_name)} - {""}
+
+
+def period_start(mode, now):
+    """First day of the digest period `now` falls in (IST)"""
+    today = now.astimezone(DIGEST_TIMEZONE).date()
+    if mode == "weekly":
+        return today - timedelta(days=today.weekday())
+    return today
+
+
+def plan(index, announcements, now):
+    """Rows to write for (id, company_code, company_name, category) tuples.
+
+    Returns (deliveries, digests): (subscriber_id, announcement_id) pairs for
+    instant subscribers, and {(subscriber_id, mode, period_start): [ids]}.
+    """
+    periods = {mode: period_start(mode, now) for mode in DIGEST_MODES}
+    deliveries = []
+    digests = {}
+    for newsid, company_code, company_name, category in announcements:
+        for subscriber_id in index.match(company_keys(company_code, company_name), category):
+            mode = index.modes[subscriber_id]
+            if mode == "instant":
+                deliveries.append((subscriber_id, newsid))
+            else:
+                digests.setdefault((subscriber_id, mode, periods[mode]), []).append(newsid)
+    return deliveries, digests
+
+
+def _write_pages(cur, sql, rows, page_size=FANOUT_WRITE_PAGE_SIZE):
+    from psycopg2.extras import execute_values
+
+    written = 0
+    for start in range(0, len(rows), page_size):
+        page = rows[start:start + page_size]
+        execute_values(cur, sql, page, page_size=len(page))
+        written += cur.rowcount
+    return written
+
+
+def write_rows(cur, deliveries, digests):
+    """Insert delivery rows and merge items into pending digests; returns rows written"""
+    delivered = _write_pages(cur, """
+        INSERT INTO subscriber_deliveries (subscriber_id, announcement_id)
+        VALUES %s
+        ON CONFLICT (subscriber_id, announcement_id) DO NOTHING
+    """, deliveries)
+    digested = _write_pages(cur, """
+        INSERT INTO subscriber_digests (subscriber_id, digest_mode, period_start, announcement_ids)
+        VALUES %s
+        ON CONFLICT (subscriber_id, digest_mode, period_start) DO UPDATE
+        SET announcement_ids = ARRAY(
+                SELECT DISTINCT unnest(subscriber_digests.announcement_ids || EXCLUDED.announcement_ids)
+            ),
+            updated_at = NOW()
+    """, [(sid, mode, period, ids) for (sid, mode, period), ids in digests.items()])
+    return delivered, digested
+
+
+def fan_out_batch(conn, index, now=None, batch_size=FANOUT_BATCH_SIZE,
+                  max_age_hours=FANOUT_MAX_AGE_HOURS, dry_run=False):
+    """Claim up to `batch_size` enriched announcements not yet fanned out and
+    write their subscriber rows. Returns the batch's counts."""
+    now = now or datetime.now(DIGEST_TIMEZONE)
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT id, company_code, company_name, category,
+                   filed_at >= NOW() - make_interval(hours => %s)
+            FROM announcements
+            WHERE NOT fanned_out AND enriched
+            ORDER BY scraped_at, id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (max_age_hours, batch_size))
+        rows = cur.fetchall()
+        fresh = [row[:4] for row in rows if row[4]]
+        deliveries, digests = plan(index, fresh, now)
+        delivered = digested = 0
+        if rows and not dry_run:
+            delivered, digested = write_rows(cur, deliveries, digests)
+            cur.execute("UPDATE announcements SET fanned_out = TRUE WHERE id = ANY(%s)",
+                        ([row[0] for row in rows],))
+    if dry_run:
+        conn.rollback()
+    else:
+        conn.commit()
+    return {
+        "announcements": len(rows),
+        "stale": len(rows) - len(fresh),
+        "deliveries": len(deliveries) if dry_run else delivered,
+        "digest_items": sum(len(ids) for ids in digests.values()),
+        "digest_upserts": len(digests) if dry_run else digested,
+    }
+
+
+def fan_out(conn, index=None, batch_size=FANOUT_BATCH_SIZE, dry_run=False):
+    """Fan out every pending announcement; returns the totals"""
+    started = time.monotonic()
+    if index is None:
+        index = SubscriberIndex.load(conn)
+    print(f"[FANOUT] {len(index)} active subscriber(s) indexed in {time.monotonic() - started:.2f}s")
+
+    totals = {"announcements": 0, "stale": 0, "deliveries": 0, "digest_items": 0, "digest_upserts": 0}
+    while True:
+        with metrics.stage("fanout_batch"):
+            batch = fan_out_batch(conn, index, batch_size=batch_size, dry_run=dry_run)
+        for key, value in batch.items():
+            totals[key] += value
+        # A dry run doesn't mark anything, so the next batch would be the same one
+        if batch["announcements"] < batch_size or dry_run:
+            break
+
+    for key in ("deliveries", "digest_items"):
+        metrics.count(f"fanout_{key}", totals[key])
+    print(f"[FANOUT] {totals['announcements']} announcement(s) ({totals['stale']} too old to send): "
+          f"{totals['deliveries']} instant deliveries, {totals['digest_items']} digest item(s)"
+          f"{' (dry run)' if dry_run else ''} in {time.monotonic() - started:.2f}s")
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write subscriber deliveries and digests for new announcements")
+    parser.add_argument("--batch-size", type=int, default=FANOUT_BATCH_SIZE, help="Announcements per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Match the first batch without writing")
+    args = parser.parse_args(argv)
+
+    from db import get_db, ensure_schema
+
+    conn = get_db()
+    try:
+        ensure_schema(conn)
+        fan_out(conn, batch_size=args.batch_size, dry_run=args.dry_run)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,42 +1,75 @@
 import os
+import re
+import sys
 import json
 import requests
-import io
 import time
-import random
-from datetime import datetime
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from db import get_db
-from summarizer import summarize_text
+import asyncio
+import argparse
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+from importlib.util import find_spec
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from psycopg2.extras import execute_values
+from db import get_db, ensure_schema
+from summarizer import offline_summary, summarize_many, summarize_text
+from detail_parser import parse_detail_html
+from classifier import classify
+from pdf_pipeline import PdfPipeline, PDF_MAX_PAGES, download_pdf, process_pdf
+from listing_probe import BANKEX_SCRIPS, LISTING_FEED_URL, probe_listing
+import image_profiles
+import image_store
+from image_store import get_image_store
+import metrics
+from pacing import PacingController, BlockedError, looks_blocked, PACING_MIN_INTERVAL
+from resource_policy import default_policy
+from dedupe import DEDUPE, FingerprintIndex, text_fingerprint
+from memory_guard import MemoryGuard
 from zoneinfo import ZoneInfo
 
 IST = ZoneInfo("Asia/Kolkata")
 
-now_ist = datetime.now(IST)
-
-# Add stealth import for anti-detection
-try:
-    from playwright_stealth import stealth_sync
-    STEALTH_AVAILABLE = True
-except ImportError:
-    STEALTH_AVAILABLE = False
+# Playwright, playwright-stealth and PyMuPDF (and Cloudinary, in image_store)
+# are imported by the code that uses them, so a run the change probe ends
+# early (and the list / detail / render commands) never pays for loading
+# them. Here we only check that they are installed; see import_report.py
+# for the cold-start budget.
+STEALTH_AVAILABLE = find_spec("playwright_stealth") is not None
+if not STEALTH_AVAILABLE:
     print("[WARNING] playwright-stealth not installed")
 
-# Optional Cloudinary support
-try:
-    import cloudinary
-    import cloudinary.uploader
-    CLOUDINARY_AVAILABLE = True
-except Exception:
-    CLOUDINARY_AVAILABLE = False
-
-try:
-    import fitz  # PyMuPDF
-    HAS_PYMUPDF = True
-except ImportError:
-    HAS_PYMUPDF = False
+HAS_PYMUPDF = find_spec("fitz") is not None
+if not HAS_PYMUPDF:
     print("[WARNING] PyMuPDF not installed - PDF conversion disabled")
 
+
+def sync_playwright():
+    from playwright.sync_api import sync_playwright as start_playwright
+    return start_playwright()
+
+
+def async_playwright():
+    from playwright.async_api import async_playwright as start_playwright
+    return start_playwright()
+
+
+def playwright_timeout_error():
+    """Playwright's TimeoutError class, for except clauses (Playwright is loaded by then)"""
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+    return PlaywrightTimeoutError
+
+
+def stealth_sync(page):
+    from playwright_stealth import stealth_sync as apply_stealth
+    apply_stealth(page)
+
+
+async def stealth_async(page):
+    from playwright_stealth import stealth_async as apply_stealth
+    await apply_stealth(page)
+
 BANKEX_URL = "https://www.bseindia.com/sensex/code/53/"
 BASE_URL = "https://www.bseindia.com"
 HEADERS = {
@@ -49,111 +82,437 @@ HEADERS = {
     "Referer": "https://www.bseindia.com/"
 }
 
-# Cloudinary configuration
-CLOUDINARY_CONFIGURED = False
-if CLOUDINARY_AVAILABLE:
-    CLOUD_NAME = os.environ.get('CLOUDINARY_CLOUD_NAME')
-    CLOUD_KEY = os.environ.get('CLOUDINARY_API_KEY')
-    CLOUD_SECRET = os.environ.get('CLOUDINARY_API_SECRET')
+# Index listing pages one run walks with a shared browser. SCRAPER_INDEX_URLS
+# adds entries as NAME=url pairs (comma separated); SCRAPER_INDICES picks which
+# to walk, first one being the primary index_name (default: all, BANKEX first)
+INDEX_REGISTRY = {
+    "BANKEX": BANKEX_URL,
+}
+
+
+def load_index_registry():
+    """Active [(name, url)] pairs from INDEX_REGISTRY and the env overrides"""
+    registry = dict(INDEX_REGISTRY)
+    for entry in os.environ.get('SCRAPER_INDEX_URLS', '').split(','):
+        name, sep, url = entry.partition('=')
+        if sep and name.strip() and url.strip():
+            registry[name.strip().upper()] = url.strip()
     
-    if CLOUD_NAME and CLOUD_KEY and CLOUD_SECRET:
-        try:
-            cloudinary.config(
-                cloud_name=CLOUD_NAME,
-                api_key=CLOUD_KEY,
-                api_secret=CLOUD_SECRET,
-                secure=True
-            )
-            CLOUDINARY_CONFIGURED = True
-            print(f"[CLOUDINARY] Configured (cloud_name={CLOUD_NAME})")
-        except Exception as e:
-            print(f"[CLOUDINARY] Configuration failed: {e}")
+    selected = [name.strip().upper() for name in os.environ.get('SCRAPER_INDICES', '').split(',') if name.strip()]
+    indices = []
+    for name in selected or registry:
+        if name not in registry:
+            print(f"[WARNING] Unknown index '{name}' in SCRAPER_INDICES, skipping")
+        elif name not in dict(indices):
+            indices.append((name, registry[name]))
+    return indices or [("BANKEX", BANKEX_URL)]
+
+
+SCRAPER_INDICES = load_index_registry()
+PRIMARY_INDEX = SCRAPER_INDICES[0][0]
+
+# Browser settings shared by the sequential and concurrent scrapers
+BROWSER_ARGS = [
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-gpu',
+    '--disable-software-rasterizer',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-features=IsolateOrigins,site-per-process',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor'
+]
+CONTEXT_OPTIONS = {
+    "user_agent": HEADERS["User-Agent"],
+    "viewport": {'width': 1920, 'height': 1080},
+    "extra_http_headers": {
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    },
+    "java_script_enabled": True,
+    "ignore_https_errors": True
+}
+LISTING_SELECTOR = "div.cannn ul.ullist li a"
+DETAIL_SELECTOR = "#ContentPlaceHolder1_tdDet"
+# Fields read off a rendered detail page; waited for instead of a fixed sleep
+DETAIL_FIELD_SELECTORS = ["#ContentPlaceHolder1_tdCompNm a", "td.TTRow_leftnotices"]
+# Request spacing is handled by the pacing controllers, so no warm-up is
+# needed; SCRAPER_WARMUP_SECONDS restores a fixed pause after launch
+WARMUP_SECONDS = float(os.environ.get('SCRAPER_WARMUP_SECONDS', '0'))
+
+# Concurrent mode: detail pages in flight, and per-host politeness limits
+SCRAPER_CONCURRENCY = int(os.environ.get('SCRAPER_CONCURRENCY', '1'))
+SCRAPER_HOST_CONCURRENCY = int(os.environ.get('SCRAPER_HOST_CONCURRENCY', '3'))
+SCRAPER_HOST_MIN_INTERVAL = float(os.environ.get('SCRAPER_HOST_MIN_INTERVAL', str(PACING_MIN_INTERVAL)))
+
+# Characters of extracted PDF text the summarizer picks sentences from; what
+# is sent to Groq is trimmed to SUMMARY_INPUT_TOKENS (see extractive.py)
+SUMMARY_PDF_CHARS = int(os.environ.get('SUMMARY_PDF_CHARS', '20000'))
+
+# Scraped rows are written in multi-row inserts of this many announcements
+INSERT_BATCH_SIZE = int(os.environ.get('SCRAPER_INSERT_BATCH_SIZE', '10'))
+
+# Fetch AnnDet_new.aspx over plain HTTP first; render with Playwright only
+# when the markup doesn't parse. DETAIL_SCREENSHOT=false skips the
+# announcement screenshot so fast-path items never touch the browser.
+DETAIL_HTTP_FAST_PATH = os.environ.get('DETAIL_HTTP_FAST_PATH', 'true').lower() != 'false'
+DETAIL_SCREENSHOT = os.environ.get('DETAIL_SCREENSHOT', 'true').lower() != 'false'
+HTTP_POOL_SIZE = int(os.environ.get('SCRAPER_HTTP_POOL_SIZE', '10'))
+
+# Captured images go to the image store (see image_store.py) from memory in
+# parallel; SCRAPER_SAVE_IMAGES=true also writes them to bankex_data/<newsid>/
+# for debugging
+UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS', '6'))
+UPLOAD_RETRIES = int(os.environ.get('UPLOAD_RETRIES', '2'))
+SAVE_IMAGES = os.environ.get('SCRAPER_SAVE_IMAGES', 'false').lower() == 'true'
+
+# Before launching Chromium, fetch LISTING_FEED_URL over plain HTTP and skip
+# the run when every announcement it lists is already stored
+LISTING_PROBE = os.environ.get('LISTING_PROBE', 'true').lower() != 'false'
+
+# Archive backfill (--backfill): BSE's announcement search API, walked per
+# company in date windows with its own, gentler concurrency and pacing
+BSE_ARCHIVE_URL = os.environ.get('BSE_ARCHIVE_URL', "https://api.bseindia.com/BseIndiaAPI/api/AnnSubCategoryGetData/w")
+BACKFILL_COMPANIES = [code.strip() for code in os.environ.get('BACKFILL_COMPANIES', BANKEX_SCRIPS).split(',')
+                      if code.strip()]
+BACKFILL_CONCURRENCY = int(os.environ.get('BACKFILL_CONCURRENCY', '2'))
+BACKFILL_HOST_CONCURRENCY = int(os.environ.get('BACKFILL_HOST_CONCURRENCY', '2'))
+BACKFILL_HOST_MIN_INTERVAL = float(os.environ.get('BACKFILL_HOST_MIN_INTERVAL', '2.0'))
+BACKFILL_WINDOW_DAYS = int(os.environ.get('BACKFILL_WINDOW_DAYS', '30'))
+BACKFILL_MAX_PAGES = int(os.environ.get('BACKFILL_MAX_PAGES', '200'))
+
+# Encoding profiles (see image_profiles.IMAGE_PROFILES) for the two image kinds
+SCREENSHOT_PROFILE = image_profiles.get_profile(image_profiles.SCREENSHOT_PROFILE)
+
+_http_session = None
+
+# Recent announcements for duplicate detection, refreshed at the start of each run
+_fingerprints = None
+
+# Context-level request rules and BSE asset cache (see resource_policy.py)
+_resource_policy = None
 
+# Adaptive request spacing for the sequential scraper (the concurrent one
+# keeps a controller per host in HostLimiter)
+bse_pacer = PacingController()
 
-def upload_to_cloudinary(file_path, newsid, image_type, page_number=None):
-    """Upload a file to Cloudinary and return the secure URL"""
-    if not CLOUDINARY_CONFIGURED or not os.path.exists(file_path):
+
+def get_http_session():
+    """Shared requests.Session with a connection pool sized for concurrent use"""
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        # requests can't decode brotli without an extra package
+        session.headers["Accept-Encoding"] = "gzip, deflate"
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _http_session = session
+    return _http_session
+
+
+def get_resource_policy():
+    """Process-wide ResourcePolicy, built on first use"""
+    global _resource_policy
+    if _resource_policy is None:
+        _resource_policy = default_policy()
+    return _resource_policy
+
+
+def new_context(browser):
+    """Fresh browser context with the resource policy installed"""
+    context = browser.new_context(**CONTEXT_OPTIONS)
+    get_resource_policy().install(context)
+    return context
+
+
+async def new_context_async(browser):
+    """Async counterpart of new_context"""
+    context = await browser.new_context(**CONTEXT_OPTIONS)
+    await get_resource_policy().install_async(context)
+    return context
+
+
+def store_image(image_bytes, filename):
+    """Put image bytes in the image store with retries; returns the URL or None"""
+    store = get_image_store()
+    if store is None or not image_bytes:
         return None
+    ext = filename.rsplit(".", 1)[-1]
     
+    for attempt in range(UPLOAD_RETRIES + 1):
+        try:
+            with metrics.stage("upload"):
+                return store.put(image_bytes, ext)
+            
+        except Exception as e:
+            if attempt < UPLOAD_RETRIES:
+                metrics.retry("upload")
+                print(f"  [IMAGE STORE] Storing {filename} failed ({e}), retrying...")
+                time.sleep(2 ** attempt)
+            else:
+                print(f"  [IMAGE STORE] Storing {filename} failed: {e}")
+                return None
+
+
+def extract_newsids(hrefs):
+    """Pull newsids out of listing link hrefs, preserving listing order"""
+    newsids = []
+    for href in hrefs:
+        if href and "newsid=" in href:
+            newsids.append(href.split("newsid=")[1])
+    return newsids
+
+
+def parse_filed_at(time_text):
+    """Parse the 'Exchange Received Time' row text into an IST datetime"""
     try:
-        folder = f"bankex/{newsid}"
-        public_id = f"{folder}/pdf_page_{page_number}" if page_number else f"{folder}/{image_type}"
-        
-        result = cloudinary.uploader.upload(
-            file_path,
-            public_id=public_id,
-            folder=folder,
-            resource_type="image",
-            overwrite=True
-        )
-        
-        return result.get('secure_url')
+        time_str = time_text.split("Exchange Received Time")[1].split("Exchange Disseminated")[0].strip()
+        time_str_normalized = time_str.replace('-', '/')
         
+        try:
+            filed_naive = datetime.strptime(time_str_normalized, "%d/%m/%Y %H:%M:%S")
+        except ValueError:
+            filed_naive = datetime.strptime(time_str_normalized, "%d/%m/%Y  %H:%M:%S")
+        # Attach IST tzinfo to parsed datetime
+        return filed_naive.replace(tzinfo=IST)
+    except:
+        return datetime.now(IST)
+
+
+def fallback_summary(title, description, pdf_text=""):
+    """Stand-in summary when the summarizer fails: the top-ranked sentences"""
+    return offline_summary(title, title, description, pdf_text[:SUMMARY_PDF_CHARS] if pdf_text else "")
+
+
+def summary_pdf_text(pdf_text):
+    return pdf_text[:SUMMARY_PDF_CHARS] if pdf_text and SUMMARY_PDF_CHARS > 0 else ""
+
+
+def summarize_announcement(title, description, pdf_text, raise_on_failure=False):
+    """Summarize a filing; the PDF's own text says more than the one-line description"""
+    with metrics.stage("summarize"):
+        return summarize_text(title, title, description, raise_on_failure=raise_on_failure,
+                              pdf_text=summary_pdf_text(pdf_text))
+
+
+def summarize_rows(rows):
+    """Fill in the summaries build_announcement deferred, as one concurrent Groq batch"""
+    pending = [row for row in rows if "summary_input" in row]
+    if not pending:
+        return
+    inputs = [row.pop("summary_input") for row in pending]
+    try:
+        with metrics.stage("summarize_batch"):
+            summaries = summarize_many([(title, title, description, summary_pdf_text(pdf_text))
+                                        for title, description, pdf_text in inputs])
     except Exception as e:
-        print(f"  [CLOUDINARY] Upload failed: {e}")
+        print(f"  [WARN] Batch summary generation failed: {e}")
+        summaries = [fallback_summary(*summary_input) for summary_input in inputs]
+    for row, summary in zip(pending, summaries):
+        row["summary"] = summary
+        if _fingerprints is not None:
+            _fingerprints.add(row)
+
+
+def text_duplicate(security_code, text_simhash, text_numbers):
+    """Announcement already stored with a near-identical description, if any"""
+    if _fingerprints is None:
         return None
+    duplicate = _fingerprints.match_text(security_code, text_simhash, text_numbers)
+    if duplicate is not None:
+        metrics.count("dedupe_text_hits")
+        print(f"  [DEDUPE] Description matches {duplicate['id']}, reusing its summary")
+    return duplicate
 
 
-def classify(title, description):
-    """Classify announcement based on title and description"""
-    text = (title + " " + description).lower()
-    
-    if any(term in text for term in ["agm", "egm", "general meeting", "annual general meeting"]):
-        return "agm_egm"
-    
-    if "board meeting" in text or "board meet" in text:
-        return "board_meeting"
-    
-    if any(term in text for term in ["financial result", "quarterly result", "results", "unaudited", "audited financial"]):
-        return "results"
+def filed_at_iso(filed_at):
+    """Normalize filed_at to an IST ISO8601 string for DB/storage"""
+    try:
+        if isinstance(filed_at, datetime):
+            if filed_at.tzinfo is None:
+                filed_at = filed_at.replace(tzinfo=IST)
+            else:
+                filed_at = filed_at.astimezone(IST)
+
+        return filed_at.isoformat()
+    except Exception:
+        return datetime.now(IST).isoformat()
+
+
+def core_announcement(newsid, detail_url, company, security_code, title, description, pdf_url, filed_at):
+    """Announcement record from the detail page alone: no summary, images or PDF data yet"""
+    text_simhash, text_numbers = text_fingerprint(title, description)
+    return {
+        "id": newsid,
+        "company_code": security_code,
+        "company_name": company,
+        "title": title,
+        "subject": title,
+        "summary": None,
+        "category": classify(title, description),
+        "filed_at": filed_at_iso(filed_at),
+        "pdf_url": pdf_url,
+        "screenshot_url": None,
+        "source_page": detail_url,
+        "pdf_text": None,
+        "pdf_sha256": None,
+        "text_simhash": text_simhash,
+        "text_numbers": text_numbers,
+        "duplicate_of": None
+    }
+
+
+def build_announcement(newsid, detail_url, company, security_code, title, description,
+                       pdf_url, filed_at, screenshot_json, pdf=None, defer_summary=False):
+    """Summarize and assemble the announcement record from extracted fields.
+
+    `pdf` is what capture_images returned for the filing PDF; a duplicate
+    found there, or a near-identical description, supplies the summary.
+    With `defer_summary` the row is left for summarize_rows to summarize
+    together with the rest of its insert batch.
+    """
+    pdf = pdf or {}
+    pdf_text = pdf.get("text") or ""
+    row = core_announcement(newsid, detail_url, company, security_code, title, description, pdf_url, filed_at)
+    duplicate = pdf.get("duplicate")
+    if duplicate is None:
+        duplicate = text_duplicate(security_code, row["text_simhash"], row["text_numbers"])
     
-    if any(term in text for term in ["dividend", "bonus", "split", "buyback", "corporate action", "record date"]):
-        return "corp_action"
+    summary = None
+    if duplicate is not None and duplicate["summary"]:
+        summary = duplicate["summary"]
+    elif defer_summary:
+        row["summary_input"] = (title, description, pdf_text)
+    else:
+        try:
+            summary = summarize_announcement(title, description, pdf_text)
+        except Exception as e:
+            print(f"  [WARN] Summary generation failed: {e}")
+            summary = fallback_summary(title, description, pdf_text)
     
-    if any(term in text for term in ["insider", "sast", "substantial acquisition", "continual disclosure"]):
-        return "insider_trading"
+    row.update({
+        "summary": summary,
+        "screenshot_url": screenshot_json,
+        "pdf_text": pdf_text or None,
+        "pdf_sha256": pdf.get("sha256"),
+        "duplicate_of": duplicate["id"] if duplicate is not None else None
+    })
+    if _fingerprints is not None and "summary_input" not in row:
+        _fingerprints.add(row)
+    return row
+
+
+def detail_url_for(newsid):
+    return f"{BASE_URL}/corporates/AnnDet_new.aspx?newsid={newsid}"
+
+
+def fetch_detail_http(newsid, pacer=None):
+    """Fetch and parse a detail page without a browser; None means fall back to Playwright.
+
+    The response's speed, or a block page, is fed back to `pacer`.
+    """
+    try:
+        started = time.monotonic()
+        with metrics.stage("detail_http"):
+            response = get_http_session().get(detail_url_for(newsid), timeout=30)
+        if looks_blocked(response.status_code, response.text):
+            metrics.count("blocked_responses")
+            if pacer is not None:
+                pacer.failure()
+            print(f"  [FAST PATH] Blocked (HTTP {response.status_code}) for {newsid}, falling back to browser")
+            return None
+        if pacer is not None:
+            pacer.success(time.monotonic() - started)
+        if response.status_code != 200:
+            print(f"  [FAST PATH] HTTP {response.status_code} for {newsid}, falling back to browser")
+            return None
+        fields = parse_detail_html(response.text)
+    except Exception as e:
+        if pacer is not None:
+            pacer.failure()
+        print(f"  [FAST PATH] {newsid} failed ({type(e).__name__}: {e}), falling back to browser")
+        return None
     
-    if any(term in text for term in ["update", "clarification", "announcement", "press release"]):
-        return "company_update"
+    if fields is None:
+        print(f"  [FAST PATH] Markup not recognised for {newsid}, falling back to browser")
+        return None
     
-    if any(term in text for term in ["listing", "ipo", "public offer", "initial public"]):
-        return "new_listing"
+    pdf_url = fields.pop("pdf_href")
+    if pdf_url and not pdf_url.startswith("http"):
+        pdf_url = BASE_URL + pdf_url
+    fields["pdf_url"] = pdf_url
+    fields["html"] = response.text
+    return fields
+
+
+def screenshot_ready_html(html, detail_url):
+    """Strip scripts and add a <base> tag so fetched HTML renders with its own assets"""
+    html = re.sub(r"<script\b.*?</script>", "", html, flags=re.IGNORECASE | re.DOTALL)
+    base_tag = f'<base href="{detail_url}">'
+    html, count = re.subn(r"<head[^>]*>", lambda m: m.group(0) + base_tag, html, count=1, flags=re.IGNORECASE)
+    return html if count else base_tag + html
+
+
+def scrape_detail_fast(page, newsid, fields, defer_summary=False):
+    """Finish a detail scrape from HTTP-parsed fields, rendering only for the screenshot"""
+    detail_url = detail_url_for(newsid)
+    screenshot_page = None
+    if DETAIL_SCREENSHOT and page is not None:
+        try:
+            page.set_content(screenshot_ready_html(fields["html"], detail_url),
+                             wait_until="domcontentloaded", timeout=30000)
+            screenshot_page = page
+        except Exception as e:
+            print(f"  [SCREENSHOT] Could not render fetched HTML: {e}")
     
-    if any(term in text for term in ["filing", "compliance", "trading window", "outcome"]):
-        return "integrated_filing"
+    screenshot_json, pdf = capture_images(screenshot_page, newsid, fields["pdf_url"])
     
-    return "other"
+    return build_announcement(newsid, detail_url, fields["company"], fields["security_code"],
+                              fields["title"], fields["description"], fields["pdf_url"],
+                              parse_filed_at(fields["time_text"]), screenshot_json, pdf, defer_summary)
 
 
-def scrape_detail(page, newsid, max_retries=3):
-    """Scrape detailed information for a specific announcement with retries"""
-    detail_url = f"{BASE_URL}/corporates/AnnDet_new.aspx?newsid={newsid}"
+def open_detail_page(page, newsid, max_retries=3):
+    """Load the detail page in `page` and wait for the fields read_detail_fields needs"""
+    detail_url = detail_url_for(newsid)
     
-    # Retry logic for detail page
+    # Retry logic for detail page; the pacer spaces attempts and backs off on failures
     for attempt in range(max_retries):
         try:
-            # Add random delay to appear more human-like
-            time.sleep(random.uniform(1.5, 3.5))
-            
-            page.goto(detail_url, timeout=90000, wait_until="domcontentloaded")
+            bse_pacer.wait()
+            started = time.monotonic()
             
-            # Wait for the main content with longer timeout
-            page.wait_for_selector("#ContentPlaceHolder1_tdDet", timeout=45000)
+            with metrics.stage("detail_goto"):
+                response = page.goto(detail_url, timeout=90000, wait_until="domcontentloaded")
+            if response is not None and looks_blocked(response.status):
+                raise BlockedError(f"HTTP {response.status}")
             
-            # Additional wait for dynamic content to load
-            time.sleep(2)
+            # Wait for the main content, then for the fields read below
+            with metrics.stage("detail_selector_wait"):
+                page.wait_for_selector(DETAIL_SELECTOR, timeout=45000)
+                for selector in DETAIL_FIELD_SELECTORS:
+                    page.wait_for_selector(selector, state="attached", timeout=10000)
             
-            break
+            bse_pacer.success(time.monotonic() - started)
+            return
             
-        except PlaywrightTimeoutError:
+        except (playwright_timeout_error(), BlockedError) as e:
+            bse_pacer.failure()
             if attempt < max_retries - 1:
-                wait_time = 5 * (2 ** attempt)  # Exponential backoff: 5s, 10s, 20s
-                print(f"  [RETRY] Attempt {attempt + 1} failed, waiting {wait_time}s before retry...")
-                time.sleep(wait_time)
+                metrics.retry("detail_goto")
+                print(f"  [RETRY] Attempt {attempt + 1} failed ({type(e).__name__}), "
+                      f"request spacing now {bse_pacer.interval:.1f}s")
             else:
                 print(f"  [FATAL] All {max_retries} attempts failed for newsid {newsid}")
                 raise
-    
+
+
+def read_detail_fields(page):
+    """Fields of a loaded detail page, in the shape fetch_detail_http returns"""
     # Extract basic information
     company = page.locator("#ContentPlaceHolder1_tdCompNm a").inner_text().strip()
     security_code = page.locator("#ContentPlaceHolder1_tdCompNm .spn02").first.inner_text().strip()
@@ -173,232 +532,587 @@ def scrape_detail(page, newsid, max_retries=3):
     # Extract filing timestamp
     try:
         time_text = page.locator("text=Exchange Received Time").locator("xpath=..").inner_text()
-        time_str = time_text.split("Exchange Received Time")[1].split("Exchange Disseminated")[0].strip()
-        time_str_normalized = time_str.replace('-', '/')
-        
-        try:
-            filed_naive = datetime.strptime(time_str_normalized, "%d/%m/%Y %H:%M:%S")
-        except ValueError:
-            filed_naive = datetime.strptime(time_str_normalized, "%d/%m/%Y  %H:%M:%S")
-        # Attach IST tzinfo to parsed datetime
-        filed_at = filed_naive.replace(tzinfo=IST)
     except:
-        filed_at = datetime.now(IST)
+        time_text = None
     
-    # Capture screenshots and images
-    screenshot_json = capture_images(page, newsid, pdf_url)
-    
-    # Generate summary
-    try:
-        summary = summarize_text(title, title, description)
-    except Exception as e:
-        print(f"  [WARN] Summary generation failed: {e}")
-        summary = description[:200] + "..." if len(description) > 200 else description
-    
-    # Normalize filed_at to an IST ISO8601 string for DB/storage
-    try:
-        if isinstance(filed_at, datetime):
-            if filed_at.tzinfo is None:
-                filed_at = filed_at.replace(tzinfo=IST)
-            else:
-                filed_at = filed_at.astimezone(IST)
-
-        filed_at_iso = filed_at.isoformat()
-    except Exception:
-        filed_at_iso = datetime.now(IST).isoformat()
-
     return {
-        "id": newsid,
-        "company_code": security_code,
-        "company_name": company,
+        "company": company,
+        "security_code": security_code,
         "title": title,
-        "subject": title,
-        "summary": summary,
-        "category": classify(title, description),
-        "filed_at": filed_at_iso,
+        "description": description,
         "pdf_url": pdf_url,
-        "screenshot_url": screenshot_json,
-        "source_page": detail_url
+        "time_text": time_text,
+        "html": page.content()
     }
 
 
-def capture_images(page, newsid, pdf_url):
-    """Capture announcement screenshot and PDF page images"""
+def fetch_detail_fields(page, newsid, max_retries=3, open_page=None):
+    """Detail fields over HTTP when possible, else by loading the page in the browser.
+
+    Returns (fields, rendered); rendered means the page now shows the detail
+    page. Without a `page`, `open_page()` supplies one only if it is needed.
+    """
+    if DETAIL_HTTP_FAST_PATH:
+        bse_pacer.wait()
+        fields = fetch_detail_http(newsid, bse_pacer)
+        if fields is not None:
+            metrics.count("fast_path_hits")
+            print("  [FAST PATH] Parsed detail page over HTTP")
+            return fields, False
+        metrics.count("fast_path_fallbacks")
+    
+    if page is None:
+        page = open_page()
+    open_detail_page(page, newsid, max_retries)
+    return read_detail_fields(page), True
+
+
+def scrape_detail(page, newsid, max_retries=3, defer_summary=False):
+    """Scrape detailed information for a specific announcement with retries"""
+    fields, rendered = fetch_detail_fields(page, newsid, max_retries)
+    if not rendered:
+        return scrape_detail_fast(page, newsid, fields, defer_summary)
+    
+    # Capture screenshots and images
+    screenshot_json, pdf = capture_images(page, newsid, fields["pdf_url"])
+    
+    return build_announcement(newsid, detail_url_for(newsid), fields["company"], fields["security_code"],
+                              fields["title"], fields["description"], fields["pdf_url"],
+                              parse_filed_at(fields["time_text"]), screenshot_json, pdf, defer_summary)
+
+
+def save_debug_images(newsid, uploads):
+    """Write captured images under bankex_data/<newsid>/ (SCRAPER_SAVE_IMAGES debug option)"""
+    image_dir = os.path.join(os.path.dirname(__file__), 'bankex_data', newsid)
+    os.makedirs(image_dir, exist_ok=True)
+    for item in uploads:
+        with open(os.path.join(image_dir, item['filename']), 'wb') as f:
+            f.write(item['data'])
+        if item.get('thumb'):
+            stem, ext = os.path.splitext(item['filename'])
+            with open(os.path.join(image_dir, f"{stem}_thumb{ext}"), 'wb') as f:
+                f.write(item['thumb'])
+
+
+_upload_pool = None
+
+
+def get_upload_pool():
+    global _upload_pool
+    if _upload_pool is None:
+        _upload_pool = ThreadPoolExecutor(max_workers=max(1, UPLOAD_WORKERS), thread_name_prefix="upload")
+    return _upload_pool
+
+
+def announcement_upload(rendition, profile):
+    ext = image_profiles.extension(profile)
+    return {'data': rendition['full'], 'thumb': rendition['thumb'],
+            'filename': f'announcement_details.{ext}', 'type': 'announcement'}
+
+
+def pdf_page_uploads(pages, profile):
+    ext = image_profiles.extension(profile)
+    return [
+        {'data': rendition['full'], 'thumb': rendition['thumb'],
+         'filename': f'pdf_page_{page_number}.{ext}', 'type': 'pdf_page', 'page_number': page_number}
+        for page_number, rendition in enumerate(pages, start=1)
+    ]
+
+
+def format_bytes(size):
+    return f"{size / 1024:.1f} KB" if size < 1024 * 1024 else f"{size / (1024 * 1024):.2f} MB"
+
+
+class UploadError(Exception):
+    """Some images of an announcement could not be uploaded"""
+
+
+def upload_images(newsid, uploads, strict=False):
+    """Upload in-memory images as one parallel batch; returns image entries in capture order.
+
+    Each entry records its encoded size in 'bytes' (and 'thumbnail_bytes' /
+    'thumbnail_url' when the profile produces thumbnails). Failed uploads
+    are left out, or raise UploadError when `strict` is set.
+    """
+    uploads = [item for item in uploads if item['data']]
+    if not uploads:
+        return []
+    if SAVE_IMAGES:
+        save_debug_images(newsid, uploads)
+    
+    pool = get_upload_pool()
+    futures = []
+    for item in uploads:
+        full = pool.submit(store_image, item['data'], item['filename'])
+        thumb = None
+        if item.get('thumb'):
+            thumb = pool.submit(store_image, item['thumb'], item['filename'])
+        futures.append((full, thumb))
+    
     images = []
-    screenshot_dir = os.path.join(os.path.dirname(__file__), 'bankex_data', newsid)
-    os.makedirs(screenshot_dir, exist_ok=True)
+    total_bytes = 0
+    for item, (full, thumb) in zip(uploads, futures):
+        size = len(item['data'])
+        thumb_size = len(item['thumb']) if item.get('thumb') else 0
+        total_bytes += size + thumb_size
+        print(f"  [IMAGES] {item['filename']}: {format_bytes(size)}"
+              + (f" + thumbnail {format_bytes(thumb_size)}" if thumb_size else ""))
+        
+        image_url = full.result()
+        if image_url:
+            entry = {'filename': item['filename'], 'url': image_url, 'type': item['type'], 'bytes': size}
+            if 'page_number' in item:
+                entry['page_number'] = item['page_number']
+            thumbnail_url = thumb.result() if thumb is not None else None
+            if thumbnail_url:
+                entry['thumbnail_url'] = thumbnail_url
+                entry['thumbnail_bytes'] = thumb_size
+            images.append(entry)
     
-    # 1. Screenshot of announcement
-    announcement_screenshot_path = os.path.join(screenshot_dir, 'announcement.png')
+    print(f"  [IMAGES] {len(uploads)} image(s), {format_bytes(total_bytes)} total")
+    if strict and get_image_store() is not None and len(images) < len(uploads):
+        raise UploadError(f"{len(uploads) - len(images)} of {len(uploads)} upload(s) failed")
+    return images
+
+
+_pdf_pipeline = None
+
+
+def get_pdf_pipeline():
+    global _pdf_pipeline
+    if _pdf_pipeline is None:
+        _pdf_pipeline = PdfPipeline(get_http_session, is_known=known_pdf)
+    return _pdf_pipeline
+
+
+def load_fingerprints(conn):
+    """Rebuild the duplicate index from recently stored announcements"""
+    global _fingerprints
+    if not DEDUPE:
+        return
+    index = FingerprintIndex()
     try:
-        page.locator("#ContentPlaceHolder1_tdDet").screenshot(path=announcement_screenshot_path)
-        
-        if os.path.exists(announcement_screenshot_path) and os.path.getsize(announcement_screenshot_path) > 0:
-            cloudinary_url = upload_to_cloudinary(announcement_screenshot_path, newsid, 'announcement')
-            
-            if cloudinary_url:
-                images.append({
-                    'filename': 'announcement_details.png',
-                    'url': cloudinary_url,
-                    'type': 'announcement'
-                })
+        loaded = index.load(conn)
+    except Exception as e:
+        conn.rollback()
+        print(f"[DEDUPE] Could not load recent fingerprints: {type(e).__name__}: {e}")
+        loaded = 0
+    _fingerprints = index
+    print(f"[DEDUPE] Indexed {loaded} recent announcement(s)")
+
+
+def known_pdf(digest):
+    """PdfPipeline hook: True when this PDF was already processed, so rendering can be skipped"""
+    return _fingerprints is not None and _fingerprints.match_pdf(digest) is not None
+
+
+def shutdown_workers():
+    """Stop the PDF pipeline and upload pool at the end of a run"""
+    global _pdf_pipeline, _upload_pool
+    if _pdf_pipeline is not None:
+        _pdf_pipeline.shutdown()
+        _pdf_pipeline = None
+    if _upload_pool is not None:
+        _upload_pool.shutdown(wait=True)
+        _upload_pool = None
+
+
+def start_pdf_render(pdf_url):
+    """Queue the filing PDF for download, rasterization and text extraction; returns a Future"""
+    if not (pdf_url and HAS_PYMUPDF):
+        return None
+    return get_pdf_pipeline().submit(pdf_url)
+
+
+def wait_for_pdf(newsid, pdf_future):
+    """Wait for a queued PDF; returns the pipeline result ({'pages', 'text', 'sha256'}), empty on failure"""
+    empty = {"pages": [], "text": "", "sha256": None}
+    if pdf_future is None:
+        return empty
+    try:
+        result = pdf_future.result()
     except Exception as e:
-        print(f"  [SCREENSHOT] Failed: {e}")
+        print(f"  [PDF] {newsid} processing failed: {type(e).__name__}: {e}")
+        return empty
+    if not result.get("known"):
+        print(f"  [PDF] Converted {len(result['pages'])} page(s), extracted {len(result['text'])} characters")
+    return result
+
+
+def pdf_duplicate(pdf):
+    """Announcement already stored with these PDF bytes, if any"""
+    if _fingerprints is None:
+        return None
+    duplicate = _fingerprints.match_pdf(pdf["sha256"])
+    if duplicate is not None:
+        metrics.count("dedupe_pdf_hits")
+        print(f"  [DEDUPE] Same PDF as {duplicate['id']}, reusing its images and summary")
+    return duplicate
+
+
+def capture_images(page, newsid, pdf_url, strict_uploads=False):
+    """Capture announcement screenshot and PDF page images.
+
+    Returns (screenshot JSON, pdf) where pdf is {'text', 'sha256', 'duplicate'};
+    a PDF already on file reuses that announcement's images instead of uploading.
+    """
+    # The PDF downloads and renders while the screenshot is taken
+    pdf_future = start_pdf_render(pdf_url)
+    uploads = []
     
-    # 2. PDF page conversion
-    if pdf_url and HAS_PYMUPDF:
+    # 1. Screenshot of announcement (skipped when there is no rendered page)
+    if page is not None:
         try:
-            pdf_response = requests.get(pdf_url, headers=HEADERS, timeout=30)
-            
-            if pdf_response.status_code == 200:
-                pdf_data = io.BytesIO(pdf_response.content)
-                pdf_document = fitz.open(stream=pdf_data, filetype="pdf")
-                page_count = min(len(pdf_document), 5)
-                
-                for page_num in range(page_count):
-                    pdf_page = pdf_document[page_num]
-                    mat = fitz.Matrix(2, 2)
-                    pix = pdf_page.get_pixmap(matrix=mat)
-                    
-                    pdf_page_path = os.path.join(screenshot_dir, f'pdf_page_{page_num + 1}.png')
-                    pix.save(pdf_page_path)
-                    
-                    cloudinary_url = upload_to_cloudinary(
-                        pdf_page_path, 
-                        newsid, 
-                        'pdf_page', 
-                        page_number=page_num + 1
-                    )
-                    
-                    if cloudinary_url:
-                        images.append({
-                            'filename': f'pdf_page_{page_num + 1}.png',
-                            'url': cloudinary_url,
-                            'type': 'pdf_page',
-                            'page_number': page_num + 1
-                        })
-                
-                pdf_document.close()
-                print(f"  [PDF] Converted {page_count} page(s)")
-                
+            with metrics.stage("screenshot"):
+                raw = page.locator(DETAIL_SELECTOR).screenshot(**image_profiles.screenshot_options(SCREENSHOT_PROFILE))
+                rendition = image_profiles.finish_screenshot(raw, SCREENSHOT_PROFILE)
+            uploads.append(announcement_upload(rendition, SCREENSHOT_PROFILE))
         except Exception as e:
-            print(f"  [PDF] Processing failed: {e}")
+            print(f"  [SCREENSHOT] Failed: {e}")
+    
+    # 2. PDF page conversion
+    pdf = wait_for_pdf(newsid, pdf_future)
+    duplicate = pdf_duplicate(pdf)
+    if duplicate is not None:
+        # pdf_text is copied from the original row at insert time
+        return duplicate["screenshot_url"], {"text": "", "sha256": pdf["sha256"], "duplicate": duplicate}
+    uploads.extend(pdf_page_uploads(pdf["pages"], get_pdf_pipeline().profile))
     
-    return json.dumps({'images': images})
+    images = upload_images(newsid, uploads, strict=strict_uploads)
+    return json.dumps({'images': images}), {"text": pdf["text"], "sha256": pdf["sha256"], "duplicate": None}
 
 
-def announcement_exists(conn, newsid):
-    """Check if announcement already exists in database"""
+def existing_announcement_ids(conn, newsids):
+    """Return the subset of newsids already in the database, in one query"""
+    if not newsids:
+        return set()
     with conn.cursor() as cur:
-        cur.execute("SELECT 1 FROM announcements WHERE id = %s", (newsid,))
-        return cur.fetchone() is not None
+        cur.execute("SELECT id FROM announcements WHERE id = ANY(%s)", (list(newsids),))
+        return {row[0] for row in cur.fetchall()}
+
+
+def describe_listing_probe():
+    if not LISTING_PROBE:
+        return "off (LISTING_PROBE=false)"
+    if not LISTING_FEED_URL:
+        return "off (LISTING_FEED_URL is empty)"
+    return f"on ({urlparse(LISTING_FEED_URL.split(',')[0].strip()).netloc})"
+
+
+def listing_unchanged(conn=None):
+    """Run the HTTP change probe; True only when it proves there is nothing new.
 
+    Uses `conn` for the stored-id check when given, otherwise opens a
+    short-lived connection (only needed when the feed fingerprint changed).
+    """
+    if not LISTING_PROBE or not LISTING_FEED_URL:
+        return False
 
-def insert_announcement(conn, data):
-    """Insert announcement into database"""
+    def known_ids(newsids):
+        if conn is not None:
+            return existing_announcement_ids(conn, newsids)
+        probe_conn = get_db()
+        try:
+            return existing_announcement_ids(probe_conn, newsids)
+        finally:
+            probe_conn.close()
+
+    started = time.monotonic()
+    changed, _ = probe_listing(get_http_session(), known_ids)
+    print(f"[PROBE] Checked in {time.monotonic() - started:.2f}s")
+    return changed is False
+
+
+def tag_indices(data, indices):
+    """Record the indices an announcement was listed under; the first is its index_name"""
+    data["index_name"] = indices[0]
+    data["indices"] = list(indices)
+    return data
+
+
+def merge_index_tags(conn, tags_by_id):
+    """Add newly seen index tags to stored announcements in one UPDATE; returns rows changed"""
+    if not tags_by_id:
+        return 0
     with conn.cursor() as cur:
-        cur.execute("""
+        execute_values(cur, """
+            UPDATE announcements AS a
+            SET indices = ARRAY(
+                SELECT DISTINCT tag
+                FROM unnest(COALESCE(a.indices, ARRAY[a.index_name]) || v.tags) AS tag
+                WHERE tag IS NOT NULL
+                ORDER BY tag
+            )
+            FROM (VALUES %s) AS v(id, tags)
+            WHERE a.id = v.id
+              AND NOT COALESCE(a.indices, ARRAY[]::TEXT[]) @> v.tags
+        """, list(tags_by_id.items()), template="(%s, %s::TEXT[])", page_size=len(tags_by_id))
+        updated = cur.rowcount
+    conn.commit()
+    return updated
+
+
+def resolve_batch_duplicates(rows):
+    """Copy PDF text into duplicates of rows in the same batch.
+
+    The insert falls back to the stored original's pdf_text, but a
+    subquery can't see a row inserted by the same statement.
+    """
+    by_id = {}
+    for row in rows:
+        original = by_id.get(row.get("duplicate_of"))
+        if row.get("pdf_text") is None and original is not None:
+            row["pdf_text"] = original.get("pdf_text")
+        by_id[row["id"]] = row
+
+
+def insert_announcements(conn, rows):
+    """Insert announcements with a single multi-row INSERT; returns rows inserted"""
+    if not rows:
+        return 0
+    for row in rows:
+        if "indices" not in row:
+            tag_indices(row, [PRIMARY_INDEX])
+        for column in ("pdf_text", "pdf_sha256", "text_simhash", "text_numbers", "duplicate_of"):
+            row.setdefault(column, None)
+        row.setdefault("enriched", True)
+    resolve_batch_duplicates(rows)
+    with metrics.stage("db_insert"), conn.cursor() as cur:
+        execute_values(cur, """
             INSERT INTO announcements (
                 id, company_code, company_name, title, subject,
                 summary, category, filed_at, pdf_url, screenshot_url,
-                source_page, exchange, index_name
-            ) VALUES (
+                source_page, exchange, index_name, indices, pdf_text,
+                pdf_sha256, text_simhash, text_numbers, duplicate_of, enriched
+            ) VALUES %s
+            ON CONFLICT (id) DO NOTHING;
+        """, rows, template="""(
                 %(id)s, %(company_code)s, %(company_name)s, %(title)s, %(subject)s,
                 %(summary)s, %(category)s, %(filed_at)s, %(pdf_url)s, %(screenshot_url)s,
-                %(source_page)s, 'BSE', 'BANKEX'
-            )
-            ON CONFLICT (id) DO NOTHING;
-        """, data)
+                %(source_page)s, 'BSE', %(index_name)s, %(indices)s,
+                COALESCE(%(pdf_text)s, (SELECT pdf_text FROM announcements WHERE id = %(duplicate_of)s)),
+                %(pdf_sha256)s, %(text_simhash)s, %(text_numbers)s, %(duplicate_of)s, %(enriched)s
+            )""", page_size=len(rows))
+        inserted = cur.rowcount
     conn.commit()
+    return inserted
+
+
+class AnnouncementBatch:
+    """Buffers scraped announcements and writes them in multi-row inserts.
+
+    Rows are flushed every `flush_size` additions so partial progress lands
+    even if the run dies later. If a batch fails, it is retried row by row so
+    one bad record doesn't drop the others. Summaries deferred by
+    build_announcement are requested together just before the insert.
+    """
+
+    def __init__(self, conn, flush_size=INSERT_BATCH_SIZE):
+        self.conn = conn
+        self.flush_size = max(1, flush_size)
+        self.pending = []
+        self.inserted = 0
+        self.failed = []
+
+    def add(self, data):
+        self.pending.append(data)
+        if len(self.pending) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return 0
+        rows, self.pending = self.pending, []
+        summarize_rows(rows)
+        
+        try:
+            inserted = insert_announcements(self.conn, rows)
+        except Exception as e:
+            self.conn.rollback()
+            print(f"  [DB] Batch insert of {len(rows)} row(s) failed ({type(e).__name__}: {e}), retrying row by row")
+            inserted = 0
+            for row in rows:
+                try:
+                    inserted += insert_announcements(self.conn, [row])
+                except Exception as row_error:
+                    self.conn.rollback()
+                    self.failed.append(row["id"])
+                    print(f"  [DB] Insert failed for {row['id']}: {type(row_error).__name__}: {row_error}")
+        
+        self.inserted += inserted
+        print(f"  [DB] Flushed {len(rows)} row(s), {inserted} inserted")
+        return inserted
+
+
+def print_run_summary(success_count, skip_count, error_count, total):
+    print("\n" + "="*60)
+    print("SCRAPING COMPLETE")
+    print(f"  Success: {success_count}")
+    print(f"  Skipped: {skip_count}")
+    print(f"  Errors:  {error_count}")
+    print(f"  Total:   {total}")
+    print("="*60 + "\n")
 
 
-def try_goto_with_retries(page, url, max_retries=4, base_timeout=120000):
-    """Try to navigate to URL with exponential backoff retry"""
+def try_goto_with_retries(page, url, max_retries=4, base_timeout=120000, pacer=None):
+    """Navigate to a listing page, retrying with the pacer's multiplicative backoff"""
+    pacer = pacer or bse_pacer
     for attempt in range(max_retries):
+        # Increase timeout with each retry
+        current_timeout = base_timeout + (attempt * 40000)
+        started = time.monotonic()
         try:
             print(f"  [ATTEMPT {attempt + 1}/{max_retries}] Loading {url}...")
             
-            # Increase timeout with each retry
-            current_timeout = base_timeout + (attempt * 40000)
-            
-            # Add random delay between attempts to appear more human
             if attempt > 0:
-                delay = random.uniform(3, 8)
-                print(f"  [DELAY] Waiting {delay:.1f}s before attempt...")
-                time.sleep(delay)
-            
-            page.goto(url, wait_until="networkidle", timeout=current_timeout)
+                metrics.retry("listing_load")
+                print(f"  [DELAY] Request spacing is {pacer.interval:.1f}s after the failure")
+            pacer.wait()
+            started = time.monotonic()
             
-            # Wait for content to appear with increased timeout
-            page.wait_for_selector("div.cannn ul.ullist li a", timeout=90000)
-            
-            # Additional wait to ensure all content is loaded
-            time.sleep(3)
+            # networkidle plus the listing selector means the Angular list has rendered
+            response = page.goto(url, wait_until="networkidle", timeout=current_timeout)
+            if response is not None and looks_blocked(response.status):
+                raise BlockedError(f"HTTP {response.status}")
+            page.wait_for_selector(LISTING_SELECTOR, timeout=90000)
             
+            pacer.success(time.monotonic() - started)
             print(f"  [SUCCESS] Page loaded successfully")
             return True
             
-        except PlaywrightTimeoutError as e:
-            print(f"  [TIMEOUT] Attempt {attempt + 1} failed after {current_timeout/1000}s")
-            
-            if attempt < max_retries - 1:
-                wait_time = 10 * (2 ** attempt)  # 10s, 20s, 40s
-                print(f"  [WAIT] Exponential backoff: {wait_time}s before retry...")
-                time.sleep(wait_time)
-            else:
+        except (playwright_timeout_error(), BlockedError) as e:
+            pacer.failure()
+            print(f"  [TIMEOUT] Attempt {attempt + 1} failed ({type(e).__name__}) after {time.monotonic() - started:.0f}s")
+            if attempt == max_retries - 1:
                 print(f"  [FATAL] All {max_retries} attempts failed")
                 raise
         
         except Exception as e:
+            pacer.failure()
             print(f"  [ERROR] Attempt {attempt + 1} failed: {type(e).__name__}: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(5 * (2 ** attempt))
-            else:
+            if attempt == max_retries - 1:
                 raise
     
     return False
 
 
+def load_listing(page, name, url):
+    """Load one index listing page and return its newsids"""
+    print(f"[MAIN] Attempting to load {name} page...")
+    
+    # Try loading the page with retries
+    with metrics.stage("listing_load", index=name):
+        loaded = try_goto_with_retries(page, url, max_retries=4)
+    if not loaded:
+        raise Exception(f"Failed to load {name} page after all retries")
+    
+    # Extract announcement links
+    links = page.query_selector_all(LISTING_SELECTOR)
+    newsids = extract_newsids(a.get_attribute("href") for a in links)
+    
+    print(f"\n[INFO] Found {len(newsids)} announcements on {name}\n")
+    
+    if len(newsids) == 0:
+        print("[WARN] No announcements found - page may not have loaded correctly")
+        print("[DEBUG] Taking screenshot for debugging...")
+        page.screenshot(path=f"debug_{name.lower()}_page.png")
+        
+        # Try one more time once the pacer has backed off
+        print("[RETRY] Attempting one final reload...")
+        bse_pacer.failure()
+        bse_pacer.wait()
+        page.reload(wait_until="networkidle", timeout=120000)
+        try:
+            page.wait_for_selector(LISTING_SELECTOR, timeout=30000)
+        except playwright_timeout_error():
+            pass
+        
+        links = page.query_selector_all(LISTING_SELECTOR)
+        newsids = extract_newsids(a.get_attribute("href") for a in links)
+        
+        print(f"[RETRY RESULT] Found {len(newsids)} announcements after retry")
+    
+    return newsids
+
+
+def merge_listings(listings):
+    """Fold per-index newsid lists into {newsid: [index names]}, in first-seen order"""
+    tags_by_id = {}
+    for name, newsids in listings:
+        for newsid in newsids:
+            tags = tags_by_id.setdefault(newsid, [])
+            if name not in tags:
+                tags.append(name)
+    
+    shared = sum(1 for tags in tags_by_id.values() if len(tags) > 1)
+    print(f"[INFO] {len(tags_by_id)} unique announcements across {len(listings)} index(es), "
+          f"{shared} listed under more than one")
+    return tags_by_id
+
+
+def listing_failed(name, error, indices):
+    """Re-raise when the only index fails; otherwise log and let the run carry on"""
+    if len(indices) == 1:
+        raise error
+    print(f"[WARN] {name} listing failed ({type(error).__name__}: {error}), continuing with other indices")
+
+
+def walk_indices(page, indices=None):
+    """Walk every index listing on one page; returns {newsid: [index names]}"""
+    indices = indices or SCRAPER_INDICES
+    listings = []
+    for name, url in indices:
+        try:
+            listings.append((name, load_listing(page, name, url)))
+        except Exception as e:
+            listing_failed(name, e, indices)
+    if not listings:
+        raise Exception("Failed to load any index listing")
+    return merge_listings(listings)
+
+
+def fetch_listings(indices=None):
+    """Walk the index listings in a short-lived browser; returns {newsid: [index names]}"""
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True, args=BROWSER_ARGS)
+        try:
+            page = new_context(browser).new_page()
+            if STEALTH_AVAILABLE:
+                stealth_sync(page)
+            get_resource_policy().block_images(page)
+            return walk_indices(page, indices)
+        finally:
+            browser.close()
+
+
 def scrape_bankex():
     """Main scraper function with enhanced retry logic and reliability"""
     print("\n" + "="*60)
     print(f" BANKEX SCRAPER - {datetime.now(IST)}")
     print("="*60)
-    print(f"[CONFIG] Cloudinary: {CLOUDINARY_CONFIGURED}")
+    print(f"[CONFIG] Image store: {image_store.describe()}")
+    get_image_store()  # a misconfigured store is reported here, not at the first upload
     print(f"[CONFIG] PyMuPDF: {HAS_PYMUPDF}")
+    print(f"[CONFIG] Image profiles: screenshot={image_profiles.SCREENSHOT_PROFILE}, pdf={image_profiles.PDF_PAGE_PROFILE}")
     print(f"[CONFIG] Stealth: {STEALTH_AVAILABLE}")
+    print(f"[CONFIG] Indices: {', '.join(name for name, _ in SCRAPER_INDICES)}")
+    print(f"[CONFIG] Listing probe: {describe_listing_probe()}")
     print("="*60 + "\n")
     
     conn = get_db()
+    ensure_schema(conn)
+    load_fingerprints(conn)
+    batch = AnnouncementBatch(conn)
+    metrics.reset()
+    started = time.monotonic()
     
     with sync_playwright() as p:
         # Launch browser with aggressive anti-detection
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-                '--disable-gpu',
-                '--disable-software-rasterizer',
-                '--disable-blink-features=AutomationControlled',
-                '--disable-features=IsolateOrigins,site-per-process',
-                '--disable-web-security',
-                '--disable-features=VizDisplayCompositor'
-            ]
-        )
-        
-        context = browser.new_context(
-            user_agent=HEADERS["User-Agent"],
-            viewport={'width': 1920, 'height': 1080},
-            extra_http_headers={
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            },
-            java_script_enabled=True,
-            ignore_https_errors=True
-        )
+        browser = p.chromium.launch(headless=True, args=BROWSER_ARGS)
+        
+        context = new_context(browser)
+        guard = MemoryGuard()
+        guard.start_run()
         
         page = context.new_page()
         
@@ -407,116 +1121,84 @@ def scrape_bankex():
             stealth_sync(page)
             print("[STEALTH] Applied to page")
         
-        # Less aggressive resource blocking - only block media
-        def handle_route(route):
-            resource_type = route.request.resource_type
-            if resource_type in ["media", "font"]:
-                route.abort()
-            else:
-                route.continue_()
-        
-        page.route("**/*", handle_route)
+        # The listing is never screenshotted, so its images are skipped
+        get_resource_policy().block_images(page)
         
         # Longer warm-up period
-        print("[WARMUP] Allowing browser context to stabilize...")
-        time.sleep(25)
+        if WARMUP_SECONDS > 0:
+            print("[WARMUP] Allowing browser context to stabilize...")
+            time.sleep(WARMUP_SECONDS)
         
         try:
-            print("[MAIN] Attempting to load BANKEX page...")
-            
-            # Try loading the page with retries
-            if not try_goto_with_retries(page, BANKEX_URL, max_retries=4):
-                time.sleep(5)
-                raise Exception("Failed to load BANKEX page after all retries")
-            
-            # Extract announcement links
-            links = page.query_selector_all("div.cannn ul.ullist li a")
-            newsids = []
-            
-            for a in links:
-                href = a.get_attribute("href")
-                if href and "newsid=" in href:
-                    newsids.append(href.split("newsid=")[1])
+            tags_by_id = walk_indices(page)
+            newsids = list(tags_by_id)
             
-            print(f"\n[INFO] Found {len(newsids)} announcements\n")
-            
-            if len(newsids) == 0:
-                print("[WARN] No announcements found - page may not have loaded correctly")
-                print("[DEBUG] Taking screenshot for debugging...")
-                page.screenshot(path="debug_bankex_page.png")
-                
-                # Try one more time after longer wait
-                print("[RETRY] Attempting one final reload...")
-                time.sleep(15)
-                page.reload(wait_until="networkidle", timeout=120000)
-                time.sleep(5)
-                
-                links = page.query_selector_all("div.cannn ul.ullist li a")
-                for a in links:
-                    href = a.get_attribute("href")
-                    if href and "newsid=" in href:
-                        newsids.append(href.split("newsid=")[1])
-                
-                print(f"[RETRY RESULT] Found {len(newsids)} announcements after retry")
-            
-            success_count = 0
-            skip_count = 0
             error_count = 0
             
+            # Resolve the whole listing against the DB in one query
+            existing = existing_announcement_ids(conn, newsids)
+            skip_count = len(existing)
+            merge_index_tags(conn, {newsid: tags_by_id[newsid] for newsid in existing})
+            
             # Process each announcement
             for idx, newsid in enumerate(newsids, start=1):
                 print(f"\n[{idx}/{len(newsids)}] Processing newsid: {newsid}")
                 
-                if announcement_exists(conn, newsid):
+                if newsid in existing:
                     print("  [SKIP] Already in database")
-                    skip_count += 1
                     continue
                 
                 max_announcement_retries = 3
                 announcement_success = False
                 
                 for ann_attempt in range(max_announcement_retries):
+                    # A long listing would otherwise grow one context's memory all run
+                    reason = guard.should_recycle()
+                    if reason:
+                        guard.recycled(reason)
+                        close_quietly(context)
+                        context = new_context(browser)
+                    
+                    detail_page = None
                     try:
                         detail_page = context.new_page()
-                        detail_page.route("**/*", handle_route)
-                        
-                        data = scrape_detail(detail_page, newsid, max_retries=3)
-                        insert_announcement(conn, data)
+                        guard.page_opened()
+                        # Summaries are requested together when the batch is flushed
+                        data = scrape_detail(detail_page, newsid, max_retries=3, defer_summary=True)
+                        batch.add(tag_indices(data, tags_by_id[newsid]))
                         
-                        detail_page.close()
-                        success_count += 1
                         announcement_success = True
-                        print("  [SUCCESS] Inserted into database")
-                        break
+                        print("  [SUCCESS] Queued for database insert")
                         
                     except Exception as e:
                         print(f"  [ERROR] Attempt {ann_attempt + 1}/{max_announcement_retries}: {type(e).__name__}: {e}")
-                        
-                        try:
-                            detail_page.close()
-                        except:
-                            pass
-                        
-                        if ann_attempt < max_announcement_retries - 1:
-                            wait_time = 5 * (ann_attempt + 1)
-                            print(f"  [RETRY] Waiting {wait_time}s before retry...")
-                            time.sleep(wait_time)
-                        else:
-                            error_count += 1
-                            print(f"  [FAILED] Could not process after {max_announcement_retries} attempts")
-                
-                # Human-like delay between announcements
-                if announcement_success and idx < len(newsids):
-                    delay = random.uniform(2, 4)
-                    time.sleep(delay)
+                    
+                    finally:
+                        if detail_page is not None:
+                            close_quietly(detail_page)
+                    
+                    if announcement_success:
+                        break
+                    if ann_attempt < max_announcement_retries - 1:
+                        metrics.retry("announcement")
+                        wait_time = 5 * (ann_attempt + 1)
+                        print(f"  [RETRY] Waiting {wait_time}s before retry...")
+                        time.sleep(wait_time)
+                    else:
+                        error_count += 1
+                        print(f"  [FAILED] Could not process after {max_announcement_retries} attempts")
             
-            print("\n" + "="*60)
-            print("SCRAPING COMPLETE")
-            print(f"  Success: {success_count}")
-            print(f"  Skipped: {skip_count}")
-            print(f"  Errors:  {error_count}")
-            print(f"  Total:   {len(newsids)}")
-            print("="*60 + "\n")
+            batch.flush()
+            print_run_summary(batch.inserted, skip_count, error_count + len(batch.failed), len(newsids))
+            metrics.emit({
+                "found": len(newsids),
+                "new": len(newsids) - skip_count,
+                "inserted": batch.inserted,
+                "skipped": skip_count,
+                "errors": error_count + len(batch.failed),
+                "duration_s": round(time.monotonic() - started, 2),
+                **guard.report(),
+            })
             
         except Exception as e:
             print(f"\n[FATAL] Scraper failed: {type(e).__name__}: {e}")
@@ -531,9 +1213,1082 @@ def scrape_bankex():
                 pass
         
         finally:
+            # Land whatever was scraped before a fatal error
+            try:
+                batch.flush()
+            except Exception as e:
+                print(f"[DB] Final flush failed: {type(e).__name__}: {e}")
             browser.close()
             conn.close()
+            shutdown_workers()
+
+
+# ---------------------------------------------------------------------------
+# Concurrent mode (Playwright async API)
+# ---------------------------------------------------------------------------
+
+class HostLimiter:
+    """Per-host politeness limits for the concurrent scraper.
+
+    Caps the number of navigations in flight against one host and spaces
+    their starts with that host's PacingController, which never goes
+    below `min_interval`, so raising the page pool size doesn't hammer
+    bseindia.com and a block page slows every worker down.
+    """
+
+    def __init__(self, max_per_host=SCRAPER_HOST_CONCURRENCY, min_interval=SCRAPER_HOST_MIN_INTERVAL):
+        self.max_per_host = max(1, max_per_host)
+        self.min_interval = max(0.0, min_interval)
+        self._hosts = {}
+
+    def _host_state(self, host):
+        if host not in self._hosts:
+            pacer = PacingController(floor=self.min_interval)
+            self._hosts[host] = {
+                "semaphore": asyncio.Semaphore(self.max_per_host),
+                "pacer": pacer,
+            }
+        return self._hosts[host]
+
+    def pacer(self, url):
+        return self._host_state(urlparse(url).netloc)["pacer"]
+
+    @asynccontextmanager
+    async def slot(self, url):
+        state = self._host_state(urlparse(url).netloc)
+        async with state["semaphore"]:
+            await state["pacer"].wait_async()
+            yield
+
+
+def close_quietly(target):
+    """Close a page or context, ignoring errors from one that's already gone"""
+    try:
+        target.close()
+    except Exception:
+        pass
+
+
+async def close_quietly_async(target):
+    try:
+        await target.close()
+    except Exception:
+        pass
+
+
+class ContextRecycler:
+    """Browser contexts for the concurrent scraper, replaced as memory grows.
+
+    page() opens a detail page in the current context and always closes
+    it. When the MemoryGuard asks for a recycle, new pages go to a fresh
+    context and the retired one is closed as soon as its last page is.
+    """
+
+    def __init__(self, browser, guard=None):
+        self.browser = browser
+        self.guard = guard or MemoryGuard()
+        self.context = None
+        self._open_pages = {}
+        self._lock = asyncio.Lock()
+
+    async def current(self):
+        if self.context is None:
+            self.context = await new_context_async(self.browser)
+            self._open_pages[self.context] = 0
+        return self.context
+
+    async def _acquire(self):
+        async with self._lock:
+            reason = self.guard.should_recycle()
+            if reason and self.context is not None:
+                self.guard.recycled(reason)
+                retired, self.context = self.context, None
+                if not self._open_pages[retired]:
+                    del self._open_pages[retired]
+                    await close_quietly_async(retired)
+            context = await self.current()
+            self._open_pages[context] += 1
+            self.guard.page_opened()
+            return context
+
+    async def _release(self, context):
+        self._open_pages[context] -= 1
+        if context is not self.context and not self._open_pages[context]:
+            del self._open_pages[context]
+            await close_quietly_async(context)
+
+    @asynccontextmanager
+    async def page(self):
+        context = await self._acquire()
+        page = None
+        try:
+            page = await context.new_page()
+            yield page
+        finally:
+            if page is not None:
+                await close_quietly_async(page)
+            await self._release(context)
+
+    async def close(self):
+        """Close every context; the next current() or page() starts a fresh one"""
+        contexts = list(self._open_pages)
+        self.context = None
+        self._open_pages = {}
+        for context in contexts:
+            await close_quietly_async(context)
+
+
+async def try_goto_with_retries_async(page, url, pacer, max_retries=4, base_timeout=120000):
+    """Async counterpart of try_goto_with_retries for the listing page"""
+    for attempt in range(max_retries):
+        current_timeout = base_timeout + (attempt * 40000)
+        started = time.monotonic()
+        try:
+            print(f"  [ATTEMPT {attempt + 1}/{max_retries}] Loading {url}...")
+            
+            if attempt > 0:
+                metrics.retry("listing_load")
+                print(f"  [DELAY] Request spacing is {pacer.interval:.1f}s after the failure")
+            await pacer.wait_async()
+            started = time.monotonic()
+            
+            response = await page.goto(url, wait_until="networkidle", timeout=current_timeout)
+            if response is not None and looks_blocked(response.status):
+                raise BlockedError(f"HTTP {response.status}")
+            await page.wait_for_selector(LISTING_SELECTOR, timeout=90000)
+            
+            pacer.success(time.monotonic() - started)
+            print("  [SUCCESS] Page loaded successfully")
+            return True
+            
+        except (playwright_timeout_error(), BlockedError) as e:
+            pacer.failure()
+            print(f"  [TIMEOUT] Attempt {attempt + 1} failed ({type(e).__name__}) after {time.monotonic() - started:.0f}s")
+            if attempt == max_retries - 1:
+                print(f"  [FATAL] All {max_retries} attempts failed")
+                raise
+        
+        except Exception as e:
+            pacer.failure()
+            print(f"  [ERROR] Attempt {attempt + 1} failed: {type(e).__name__}: {e}")
+            if attempt == max_retries - 1:
+                raise
+    
+    return False
+
+
+async def capture_images_async(page, newsid, pdf_url):
+    """Async counterpart of capture_images; PDF rendering runs in the pipeline's process pool"""
+    pdf_future = start_pdf_render(pdf_url)
+    uploads = []
+    
+    if page is not None:
+        try:
+            with metrics.stage("screenshot"):
+                raw = await page.locator(DETAIL_SELECTOR).screenshot(**image_profiles.screenshot_options(SCREENSHOT_PROFILE))
+                rendition = await asyncio.to_thread(image_profiles.finish_screenshot, raw, SCREENSHOT_PROFILE)
+            uploads.append(announcement_upload(rendition, SCREENSHOT_PROFILE))
+        except Exception as e:
+            print(f"  [SCREENSHOT] {newsid} failed: {e}")
+    
+    if pdf_future is not None:
+        # Let the render finish without tying up a thread
+        await asyncio.wait([asyncio.wrap_future(pdf_future)])
+    pdf = wait_for_pdf(newsid, pdf_future)
+    duplicate = pdf_duplicate(pdf)
+    if duplicate is not None:
+        return duplicate["screenshot_url"], {"text": "", "sha256": pdf["sha256"], "duplicate": duplicate}
+    uploads.extend(pdf_page_uploads(pdf["pages"], get_pdf_pipeline().profile))
+    
+    images = await asyncio.to_thread(upload_images, newsid, uploads)
+    return json.dumps({'images': images}), {"text": pdf["text"], "sha256": pdf["sha256"], "duplicate": None}
+
+
+async def scrape_detail_fast_async(page, newsid, fields):
+    """Async counterpart of scrape_detail_fast"""
+    detail_url = detail_url_for(newsid)
+    screenshot_page = None
+    if DETAIL_SCREENSHOT and page is not None:
+        try:
+            await page.set_content(screenshot_ready_html(fields["html"], detail_url),
+                                   wait_until="domcontentloaded", timeout=30000)
+            screenshot_page = page
+        except Exception as e:
+            print(f"  [SCREENSHOT] {newsid} could not render fetched HTML: {e}")
+    
+    screenshot_json, pdf = await capture_images_async(screenshot_page, newsid, fields["pdf_url"])
+    
+    return await asyncio.to_thread(build_announcement, newsid, detail_url, fields["company"],
+                                   fields["security_code"], fields["title"], fields["description"],
+                                   fields["pdf_url"], parse_filed_at(fields["time_text"]), screenshot_json, pdf)
+
+
+async def scrape_detail_async(page, newsid, limiter, max_retries=3):
+    """Async counterpart of scrape_detail; navigation goes through the host limiter"""
+    detail_url = detail_url_for(newsid)
+    
+    pacer = limiter.pacer(detail_url)
+    
+    if DETAIL_HTTP_FAST_PATH:
+        async with limiter.slot(detail_url):
+            fields = await asyncio.to_thread(fetch_detail_http, newsid, pacer)
+        if fields is not None:
+            metrics.count("fast_path_hits")
+            print(f"  [FAST PATH] Parsed {newsid} over HTTP")
+            return await scrape_detail_fast_async(page, newsid, fields)
+        metrics.count("fast_path_fallbacks")
+    
+    for attempt in range(max_retries):
+        try:
+            async with limiter.slot(detail_url):
+                started = time.monotonic()
+                with metrics.stage("detail_goto"):
+                    response = await page.goto(detail_url, timeout=90000, wait_until="domcontentloaded")
+                if response is not None and looks_blocked(response.status):
+                    raise BlockedError(f"HTTP {response.status}")
+                with metrics.stage("detail_selector_wait"):
+                    await page.wait_for_selector(DETAIL_SELECTOR, timeout=45000)
+                    for selector in DETAIL_FIELD_SELECTORS:
+                        await page.wait_for_selector(selector, state="attached", timeout=10000)
+                pacer.success(time.monotonic() - started)
+            break
+            
+        except (playwright_timeout_error(), BlockedError) as e:
+            pacer.failure()
+            if attempt < max_retries - 1:
+                metrics.retry("detail_goto")
+                print(f"  [RETRY] {newsid} attempt {attempt + 1} failed ({type(e).__name__}), "
+                      f"request spacing now {pacer.interval:.1f}s")
+            else:
+                print(f"  [FATAL] All {max_retries} attempts failed for newsid {newsid}")
+                raise
+    
+    company = (await page.locator("#ContentPlaceHolder1_tdCompNm a").inner_text()).strip()
+    security_code = (await page.locator("#ContentPlaceHolder1_tdCompNm .spn02").first.inner_text()).strip()
+    title = (await page.locator("td.TTHeadergrey").first.inner_text()).strip()
+    description = (await page.locator("td.TTRow_leftnotices").inner_text()).strip()
+    
+    pdf_url = None
+    try:
+        pdf_url = await page.locator("a.tablebluelink[href$='.pdf']").first.get_attribute("href")
+        if pdf_url and not pdf_url.startswith("http"):
+            pdf_url = BASE_URL + pdf_url
+    except:
+        pass
+    
+    try:
+        time_text = await page.locator("text=Exchange Received Time").locator("xpath=..").inner_text()
+    except:
+        time_text = None
+    filed_at = parse_filed_at(time_text)
+    
+    screenshot_json, pdf = await capture_images_async(page, newsid, pdf_url)
+    
+    # Summarization is a blocking HTTP call
+    return await asyncio.to_thread(build_announcement, newsid, detail_url, company, security_code,
+                                   title, description, pdf_url, filed_at, screenshot_json, pdf)
+
+
+async def process_announcement_async(contexts, batch, limiter, in_flight, newsid, indices, label,
+                                     max_announcement_retries=3):
+    """Scrape one announcement on its own page into the batch; returns 'success' or 'error'"""
+    async with in_flight:
+        print(f"\n{label} Processing newsid: {newsid}")
+        
+        for ann_attempt in range(max_announcement_retries):
+            try:
+                # The page is closed before any retry wait
+                async with contexts.page() as detail_page:
+                    data = await scrape_detail_async(detail_page, newsid, limiter, max_retries=3)
+                batch.add(tag_indices(data, indices))
+                
+                print(f"  [SUCCESS] {label} Queued {newsid} for database insert")
+                return "success"
+                
+            except Exception as e:
+                print(f"  [ERROR] {label} Attempt {ann_attempt + 1}/{max_announcement_retries}: {type(e).__name__}: {e}")
+                
+                if ann_attempt < max_announcement_retries - 1:
+                    metrics.retry("announcement")
+                    wait_time = 5 * (ann_attempt + 1)
+                    print(f"  [RETRY] {label} Waiting {wait_time}s before retry...")
+                    await asyncio.sleep(wait_time)
+                else:
+                    print(f"  [FAILED] {label} Could not process after {max_announcement_retries} attempts")
+                    return "error"
+        
+        return "error"
+
+
+def print_config_banner(label, concurrency):
+    print("\n" + "="*60)
+    print(f" BANKEX SCRAPER ({label}) - {datetime.now(IST)}")
+    print("="*60)
+    print(f"[CONFIG] Image store: {image_store.describe()}")
+    get_image_store()  # a misconfigured store is reported here, not at the first upload
+    print(f"[CONFIG] PyMuPDF: {HAS_PYMUPDF}")
+    print(f"[CONFIG] Image profiles: screenshot={image_profiles.SCREENSHOT_PROFILE}, pdf={image_profiles.PDF_PAGE_PROFILE}")
+    print(f"[CONFIG] Stealth: {STEALTH_AVAILABLE}")
+    print(f"[CONFIG] Indices: {', '.join(name for name, _ in SCRAPER_INDICES)}")
+    print(f"[CONFIG] Listing probe: {describe_listing_probe()}")
+    print(f"[CONFIG] Detail pages in flight: {concurrency}")
+    print(f"[CONFIG] Per-host limit: {SCRAPER_HOST_CONCURRENCY} concurrent, {SCRAPER_HOST_MIN_INTERVAL}s apart")
+    print("="*60 + "\n")
+
+
+async def load_listing_async(page, name, url, pacer):
+    """Async counterpart of load_listing"""
+    print(f"[MAIN] Attempting to load {name} page...")
+    
+    with metrics.stage("listing_load", index=name):
+        loaded = await try_goto_with_retries_async(page, url, pacer, max_retries=4)
+    if not loaded:
+        raise Exception(f"Failed to load {name} page after all retries")
+    
+    links = await page.query_selector_all(LISTING_SELECTOR)
+    newsids = extract_newsids([await a.get_attribute("href") for a in links])
+    
+    print(f"\n[INFO] Found {len(newsids)} announcements on {name}\n")
+    
+    if len(newsids) == 0:
+        print("[WARN] No announcements found - page may not have loaded correctly")
+        await page.screenshot(path=f"debug_{name.lower()}_page.png")
+        
+        print("[RETRY] Attempting one final reload...")
+        pacer.failure()
+        await pacer.wait_async()
+        await page.reload(wait_until="networkidle", timeout=120000)
+        try:
+            await page.wait_for_selector(LISTING_SELECTOR, timeout=30000)
+        except playwright_timeout_error():
+            pass
+        
+        links = await page.query_selector_all(LISTING_SELECTOR)
+        newsids = extract_newsids([await a.get_attribute("href") for a in links])
+        
+        print(f"[RETRY RESULT] Found {len(newsids)} announcements after retry")
+    
+    return newsids
+
+
+async def walk_indices_async(page, limiter, indices=None):
+    """Async counterpart of walk_indices; listing loads are paced per host by `limiter`"""
+    indices = indices or SCRAPER_INDICES
+    listings = []
+    for name, url in indices:
+        try:
+            listings.append((name, await load_listing_async(page, name, url, limiter.pacer(url))))
+        except Exception as e:
+            listing_failed(name, e, indices)
+    if not listings:
+        raise Exception("Failed to load any index listing")
+    return merge_listings(listings)
+
+
+async def run_scrape_async(contexts, conn, limiter, concurrency):
+    """One pass over every index listing, detail pages drawn from `contexts` (a ContextRecycler).
+
+    Returns a result dict; raises if the listing page can't be loaded.
+    """
+    started = time.monotonic()
+    metrics.reset()
+    contexts.guard.start_run()
+    load_fingerprints(conn)
+    batch = AnnouncementBatch(conn)
+    page = await (await contexts.current()).new_page()
+    
+    if STEALTH_AVAILABLE:
+        await stealth_async(page)
+    
+    await get_resource_policy().block_images_async(page)
+    
+    try:
+        tags_by_id = await walk_indices_async(page, limiter)
+        newsids = list(tags_by_id)
+        
+        existing = existing_announcement_ids(conn, newsids)
+        merge_index_tags(conn, {newsid: tags_by_id[newsid] for newsid in existing})
+        pending = [newsid for newsid in newsids if newsid not in existing]
+        skip_count = len(existing)
+        print(f"[INFO] {skip_count} already in database, {len(pending)} to scrape")
+        
+        # The listing page stays idle from here on; free it for the pool
+        await page.close()
+        
+        in_flight = asyncio.Semaphore(max(1, concurrency))
+        results = await asyncio.gather(*(
+            process_announcement_async(contexts, batch, limiter, in_flight, newsid, tags_by_id[newsid],
+                                       f"[{idx}/{len(pending)}]")
+            for idx, newsid in enumerate(pending, start=1)
+        ))
+        
+        batch.flush()
+        error_count = results.count("error") + len(batch.failed)
+        print_run_summary(batch.inserted, skip_count, error_count, len(newsids))
+        
+        result = {
+            "status": "ok",
+            "found": len(newsids),
+            "new": len(pending),
+            "inserted": batch.inserted,
+            "skipped": skip_count,
+            "errors": error_count,
+            "duration_s": round(time.monotonic() - started, 2),
+            **contexts.guard.report(),
+        }
+        metrics.emit(result)
+        return result
+        
+    except Exception:
+        try:
+            await page.screenshot(path="debug_error.png")
+            print("[DEBUG] Error screenshot saved to debug_error.png")
+        except:
+            pass
+        raise
+    
+    finally:
+        # Land whatever was scraped before a fatal error
+        try:
+            batch.flush()
+        except Exception as e:
+            print(f"[DB] Final flush failed: {type(e).__name__}: {e}")
+        if not page.is_closed():
+            try:
+                await page.close()
+            except:
+                pass
+
+
+async def scrape_bankex_async(concurrency=SCRAPER_CONCURRENCY):
+    """Concurrent scraper: up to `concurrency` detail pages in flight in one browser context"""
+    concurrency = max(1, concurrency)
+    print_config_banner("concurrent", concurrency)
+    
+    conn = get_db()
+    ensure_schema(conn)
+    limiter = HostLimiter()
+    
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=BROWSER_ARGS)
+        contexts = ContextRecycler(browser)
+        await contexts.current()
+        
+        if WARMUP_SECONDS > 0:
+            print("[WARMUP] Allowing browser context to stabilize...")
+            await asyncio.sleep(WARMUP_SECONDS)
+        
+        try:
+            await run_scrape_async(contexts, conn, limiter, concurrency)
+            
+        except Exception as e:
+            print(f"\n[FATAL] Scraper failed: {type(e).__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+        
+        finally:
+            await browser.close()
+            conn.close()
+            shutdown_workers()
+
+
+# ---------------------------------------------------------------------------
+# Backfill mode: walk BSE's announcement archive by company and date window
+# ---------------------------------------------------------------------------
+
+def backfill_windows(start, end, window_days=BACKFILL_WINDOW_DAYS):
+    """Split [start, end] into consecutive (window_start, window_end) date pairs"""
+    windows = []
+    window_start = start
+    while window_start <= end:
+        window_end = min(end, window_start + timedelta(days=max(1, window_days) - 1))
+        windows.append((window_start, window_end))
+        window_start = window_end + timedelta(days=1)
+    return windows
+
+
+def create_backfill_checkpoints(conn, job, companies, start, end):
+    """Register every (company, window) unit of a job; existing progress is kept"""
+    units = [(job, code, window_start, window_end)
+             for code in companies
+             for window_start, window_end in backfill_windows(start, end)]
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            INSERT INTO backfill_checkpoints (job, company_code, window_start, window_end)
+            VALUES %s
+            ON CONFLICT (job, company_code, window_start) DO NOTHING
+        """, units, page_size=500)
+    conn.commit()
+
+
+def pending_backfill_units(conn, job):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT company_code, window_start, window_end, next_page
+            FROM backfill_checkpoints
+            WHERE job = %s AND NOT done
+            ORDER BY window_start DESC, company_code
+        """, (job,))
+        return cur.fetchall()
+
+
+def save_backfill_checkpoint(conn, job, company_code, window_start, next_page, seen, inserted, done=False,
+                             failed=()):
+    """Record a finished archive page; called only after that page's rows are flushed.
+
+    Newsids on the page that could not be scraped are added to the unit's
+    failed_newsids, which the retry pass at the end of every run works off.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE backfill_checkpoints
+            SET next_page = %s, done = %s,
+                items_seen = items_seen + %s, items_inserted = items_inserted + %s,
+                failed_newsids = ARRAY(SELECT DISTINCT unnest(failed_newsids || %s::text[])),
+                updated_at = NOW()
+            WHERE job = %s AND company_code = %s AND window_start = %s
+        """, (next_page, done, seen, inserted, list(failed), job, company_code, window_start))
+    conn.commit()
+
+
+def failed_backfill_units(conn, job):
+    """(company_code, window_start, [newsids]) of units with announcements left to retry"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT company_code, window_start, failed_newsids
+            FROM backfill_checkpoints
+            WHERE job = %s AND cardinality(failed_newsids) > 0
+            ORDER BY window_start DESC, company_code
+        """, (job,))
+        rows = cur.fetchall()
+    conn.commit()
+    return rows
+
+
+def clear_backfill_failures(conn, job, company_code, window_start, newsids):
+    """Drop newsids that are now stored from a unit's failed list"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE backfill_checkpoints
+            SET failed_newsids = ARRAY(SELECT unnest(failed_newsids) EXCEPT SELECT unnest(%s::text[])),
+                updated_at = NOW()
+            WHERE job = %s AND company_code = %s AND window_start = %s
+        """, (list(newsids), job, company_code, window_start))
+    conn.commit()
+
+
+def fetch_archive_page(company_code, window_start, window_end, page_no):
+    """One page of a company's announcements between two dates, as newsids"""
+    params = {
+        "pageno": page_no,
+        "strCat": "-1",
+        "strPrevDate": window_start.strftime("%Y%m%d"),
+        "strScrip": company_code,
+        "strSearch": "P",
+        "strToDate": window_end.strftime("%Y%m%d"),
+        "strType": "C",
+        "subcategory": "-1",
+    }
+    response = get_http_session().get(BSE_ARCHIVE_URL, params=params, timeout=30)
+    response.raise_for_status()
+    rows = response.json().get("Table") or []
+    return extract_newsids(f"newsid={row['NEWSID']}" for row in rows if row.get("NEWSID"))
+
+
+async def fetch_archive_page_async(limiter, company_code, window_start, window_end, page_no, max_retries=3):
+    for attempt in range(max_retries):
+        try:
+            async with limiter.slot(BSE_ARCHIVE_URL):
+                return await asyncio.to_thread(fetch_archive_page, company_code, window_start, window_end, page_no)
+        except Exception as e:
+            if attempt == max_retries - 1:
+                raise
+            wait_time = 10 * (2 ** attempt)
+            print(f"  [ARCHIVE] {company_code} page {page_no} failed ({type(e).__name__}: {e}), retrying in {wait_time}s")
+            await asyncio.sleep(wait_time)
+
+
+async def scrape_backfill_newsids_async(contexts, conn, limiter, newsids, index_name, concurrency, label):
+    """Scrape and insert `newsids`; returns (batch, newsids that failed)"""
+    batch = AnnouncementBatch(conn)
+    in_flight = asyncio.Semaphore(max(1, concurrency))
+    results = await asyncio.gather(*(
+        process_announcement_async(contexts, batch, limiter, in_flight, newsid, [index_name],
+                                   f"[{label} {idx}/{len(newsids)}]")
+        for idx, newsid in enumerate(newsids, start=1)
+    ))
+    batch.flush()
+    failed = [newsid for newsid, result in zip(newsids, results) if result == "error"] + batch.failed
+    return batch, failed
+
+
+async def retry_backfill_failures_async(contexts, conn, limiter, job, index_name, concurrency):
+    """Retry the announcements earlier pages couldn't scrape; returns how many are now stored"""
+    recovered = 0
+    for company_code, window_start, newsids in failed_backfill_units(conn, job):
+        label = f"{company_code} {window_start} retry"
+        stored = existing_announcement_ids(conn, newsids)
+        pending = [newsid for newsid in newsids if newsid not in stored]
+        print(f"[BACKFILL] {label}: {len(pending)} failed announcement(s) to retry")
+        _, failed = await scrape_backfill_newsids_async(contexts, conn, limiter, pending, index_name,
+                                                        concurrency, label)
+        done = [newsid for newsid in newsids if newsid not in failed]
+        clear_backfill_failures(conn, job, company_code, window_start, done)
+        recovered += len(done)
+    return recovered
+
+
+async def backfill_unit_async(contexts, conn, limiter, job, unit, index_name, concurrency):
+    """Scrape one (company, window) unit page by page, checkpointing after each page"""
+    company_code, window_start, window_end, page_no = unit
+    label = f"{company_code} {window_start}..{window_end}"
+    previous = None
+    totals = {"seen": 0, "inserted": 0, "errors": 0}
+    
+    while page_no <= BACKFILL_MAX_PAGES:
+        newsids = await fetch_archive_page_async(limiter, company_code, window_start, window_end, page_no)
+        
+        # An empty page, or the archive repeating itself, ends the window
+        if not newsids or newsids == previous:
+            save_backfill_checkpoint(conn, job, company_code, window_start, page_no, 0, 0, done=True)
+            print(f"[BACKFILL] {label} complete")
+            return totals
+        previous = newsids
+        
+        existing = existing_announcement_ids(conn, newsids)
+        pending = [newsid for newsid in newsids if newsid not in existing]
+        print(f"[BACKFILL] {label} page {page_no}: {len(newsids)} listed, {len(pending)} new")
+        
+        batch, failed = await scrape_backfill_newsids_async(contexts, conn, limiter, pending, index_name,
+                                                            concurrency, f"{label} p{page_no}")
+        
+        totals["seen"] += len(newsids)
+        totals["inserted"] += batch.inserted
+        totals["errors"] += len(failed)
+        page_no += 1
+        # The page is done even if some items failed: they are kept for the retry pass
+        save_backfill_checkpoint(conn, job, company_code, window_start, page_no, len(newsids), batch.inserted,
+                                 failed=failed)
+    
+    print(f"[BACKFILL] {label} stopped at BACKFILL_MAX_PAGES={BACKFILL_MAX_PAGES}")
+    save_backfill_checkpoint(conn, job, company_code, window_start, page_no, 0, 0, done=True)
+    return totals
+
+
+async def backfill_async(start, end, companies=BACKFILL_COMPANIES, job=None,
+                         concurrency=BACKFILL_CONCURRENCY, index_name=PRIMARY_INDEX):
+    """Resumable archive backfill; re-running the same job continues where it stopped
+    and retries announcements earlier runs failed to scrape"""
+    job = job or f"{index_name.lower()}-{start.isoformat()}-{end.isoformat()}"
+    concurrency = max(1, concurrency)
+    print_config_banner(f"backfill {job}", concurrency)
+    print(f"[BACKFILL] {len(companies)} companies, {start} to {end}, "
+          f"host limit {BACKFILL_HOST_CONCURRENCY} concurrent / {BACKFILL_HOST_MIN_INTERVAL}s apart")
+    
+    limiter = HostLimiter(BACKFILL_HOST_CONCURRENCY, BACKFILL_HOST_MIN_INTERVAL)
+    totals = {"seen": 0, "inserted": 0, "errors": 0, "recovered": 0}
+    started = time.monotonic()
+    metrics.reset()
+    memory = {"peak_rss_mb": None, "context_recycles": 0}
+    conn = None
+    
+    try:
+        conn = get_db()
+        ensure_schema(conn)
+        load_fingerprints(conn)
+        create_backfill_checkpoints(conn, job, companies, start, end)
+        units = pending_backfill_units(conn, job)
+        print(f"[BACKFILL] {len(units)} unit(s) left to scrape")
+        
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True, args=BROWSER_ARGS)
+            contexts = ContextRecycler(browser)
+            try:
+                contexts.guard.start_run()
+                await contexts.current()
+                
+                if WARMUP_SECONDS > 0:
+                    print("[WARMUP] Allowing browser context to stabilize...")
+                    await asyncio.sleep(WARMUP_SECONDS)
+                
+                for idx, unit in enumerate(units, start=1):
+                    print(f"\n[BACKFILL] Unit {idx}/{len(units)}")
+                    unit_totals = await backfill_unit_async(contexts, conn, limiter, job, unit, index_name, concurrency)
+                    for key in unit_totals:
+                        totals[key] += unit_totals[key]
+                
+                totals["recovered"] = await retry_backfill_failures_async(contexts, conn, limiter, job,
+                                                                          index_name, concurrency)
+            finally:
+                memory = contexts.guard.report()
+                await browser.close()
+    
+    except Exception as e:
+        print(f"\n[FATAL] Backfill stopped: {type(e).__name__}: {e}")
+        print("[BACKFILL] Progress is checkpointed; re-run the same command to resume")
+        import traceback
+        traceback.print_exc()
+    
+    finally:
+        if conn is not None:
+            conn.close()
+        shutdown_workers()
+    
+    print(f"\n[BACKFILL] Seen {totals['seen']}, inserted {totals['inserted']}, "
+          f"errors {totals['errors']}, recovered on retry {totals['recovered']} "
+          f"in {time.monotonic() - started:.0f}s, peak RSS {memory['peak_rss_mb']} MB")
+    metrics.emit(dict(totals, duration_s=round(time.monotonic() - started, 2), **memory))
+    return totals
+
+
+# ---------------------------------------------------------------------------
+# Daemon mode: one warm browser and DB connection serving many scrape triggers
+# ---------------------------------------------------------------------------
+
+RESULT_PREFIX = "[RESULT] "
+
+
+def emit_result(result):
+    """Write a structured run result as one JSON line on stdout"""
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+
+def ensure_db(conn):
+    """Return a usable connection, reconnecting if the old one has dropped"""
+    if conn is not None and not conn.closed:
+        try:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return conn
+        except Exception as e:
+            print(f"[DAEMON] DB connection unhealthy ({type(e).__name__}), reconnecting")
+            try:
+                conn.close()
+            except:
+                pass
+    return get_db()
+
+
+class ScraperDaemon:
+    """Keeps a browser, context and DB connection warm between scrape triggers.
+
+    Triggers are serialized; a failed run recycles the browser context (and
+    relaunches the browser if it has died) before the next one.
+    """
+
+    def __init__(self, playwright, concurrency=SCRAPER_CONCURRENCY):
+        self.playwright = playwright
+        self.concurrency = max(1, concurrency)
+        self.limiter = HostLimiter()
+        self.browser = None
+        self.contexts = None
+        self.conn = None
+        self.runs = 0
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        self.browser = await self.playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+        # One guard for the daemon's lifetime: the recycle page count spans runs
+        self.contexts = ContextRecycler(self.browser)
+        await self.contexts.current()
+        self.conn = get_db()
+        ensure_schema(self.conn)
+        if WARMUP_SECONDS > 0:
+            print("[WARMUP] Allowing browser context to stabilize...")
+            await asyncio.sleep(WARMUP_SECONDS)
+        print("[DAEMON] Ready", flush=True)
+
+    async def recycle(self):
+        print("[DAEMON] Recycling browser context")
+        await self.contexts.close()
+        if not self.browser.is_connected():
+            print("[DAEMON] Browser disconnected, relaunching")
+            self.browser = await self.playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+            self.contexts.browser = self.browser
+        await self.contexts.current()
+
+    async def handle(self, command):
+        """Run one protocol command and return its result dict"""
+        command = command.strip().lower() or "scrape"
+        if command == "ping":
+            return {"status": "pong", "runs": self.runs}
+        if command != "scrape":
+            return {"status": "error", "error": f"Unknown command: {command}"}
+        
+        async with self._lock:
+            self.runs += 1
+            started = time.monotonic()
+            print(f"\n[DAEMON] Run {self.runs} started at {datetime.now(IST)}")
+            try:
+                self.conn = ensure_db(self.conn)
+                if await asyncio.to_thread(listing_unchanged, self.conn):
+                    result = {
+                        "status": "unchanged",
+                        "found": 0, "new": 0, "inserted": 0, "skipped": 0, "errors": 0,
+                        "duration_s": round(time.monotonic() - started, 2),
+                    }
+                else:
+                    result = await run_scrape_async(self.contexts, self.conn, self.limiter, self.concurrency)
+            except Exception as e:
+                print(f"\n[FATAL] Scrape run failed: {type(e).__name__}: {e}")
+                import traceback
+                traceback.print_exc()
+                result = {
+                    "status": "error",
+                    "error": f"{type(e).__name__}: {e}",
+                    "duration_s": round(time.monotonic() - started, 2),
+                }
+                try:
+                    await self.recycle()
+                except Exception as recycle_error:
+                    print(f"[DAEMON] Recycle failed: {type(recycle_error).__name__}: {recycle_error}")
+            result["run"] = self.runs
+            return result
+
+    async def close(self):
+        try:
+            if self.browser is not None:
+                await self.browser.close()
+        finally:
+            if self.conn is not None and not self.conn.closed:
+                self.conn.close()
+            shutdown_workers()
+
+
+async def serve_stdin(daemon):
+    """Read one command per line from stdin until EOF or 'quit'"""
+    loop = asyncio.get_running_loop()
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line or line.strip().lower() == "quit":
+            break
+        emit_result(await daemon.handle(line))
+
+
+async def serve_socket(daemon, socket_path):
+    """Serve the line protocol on a local Unix socket; results go back to the client"""
+    async def handle_client(reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line or line.strip().lower() == b"quit":
+                    break
+                result = await daemon.handle(line.decode("utf-8", "replace"))
+                emit_result(result)
+                writer.write((json.dumps(result) + "\n").encode("utf-8"))
+                await writer.drain()
+        finally:
+            writer.close()
+    
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = await asyncio.start_unix_server(handle_client, path=socket_path)
+    print(f"[DAEMON] Listening on {socket_path}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+async def run_daemon(concurrency=SCRAPER_CONCURRENCY, socket_path=None):
+    print_config_banner("daemon", max(1, concurrency))
+    async with async_playwright() as p:
+        daemon = ScraperDaemon(p, concurrency)
+        await daemon.start()
+        try:
+            if socket_path:
+                await serve_socket(daemon, socket_path)
+            else:
+                await serve_stdin(daemon)
+        finally:
+            await daemon.close()
+            print("[DAEMON] Stopped", flush=True)
+
+
+# ---------------------------------------------------------------------------
+# Command line: run (default), list, detail, render
+# ---------------------------------------------------------------------------
+
+COMMANDS = ("run", "list", "detail", "render")
+
+
+def list_command(new_only=False):
+    """Print the newsids on the index listings, one per line with their indices"""
+    tags_by_id = fetch_listings()
+    stored = set()
+    if new_only:
+        conn = get_db()
+        try:
+            stored = existing_announcement_ids(conn, list(tags_by_id))
+        finally:
+            conn.close()
+    for newsid, tags in tags_by_id.items():
+        if newsid not in stored:
+            print(f"{newsid}\t{','.join(tags)}")
+
+
+def detail_command(newsid, full=False, insert=False):
+    """Scrape one announcement and print it as JSON.
+
+    By default only the detail page is read (over HTTP when the fast path
+    works, so no browser starts); `full` also captures, uploads and
+    summarizes like a run does, and `insert` stores that record.
+    """
+    playwright = None
+    browser = None
+
+    def open_page():
+        nonlocal playwright, browser
+        playwright = sync_playwright().start()
+        browser = playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+        return new_context(browser).new_page()
+
+    try:
+        if full:
+            data = tag_indices(scrape_detail(open_page(), newsid), [PRIMARY_INDEX])
+            if insert:
+                conn = get_db()
+                try:
+                    ensure_schema(conn)
+                    print(f"[DB] {insert_announcements(conn, [data])} row(s) inserted")
+                finally:
+                    conn.close()
+        else:
+            fields, rendered = fetch_detail_fields(None, newsid, open_page=open_page)
+            data = core_announcement(newsid, detail_url_for(newsid), fields["company"], fields["security_code"],
+                                     fields["title"], fields["description"], fields["pdf_url"],
+                                     parse_filed_at(fields["time_text"]))
+            data["description"] = fields["description"]
+            data["via"] = "browser" if rendered else "http"
+        print(json.dumps(data, indent=2, ensure_ascii=False, default=str))
+    finally:
+        if browser is not None:
+            browser.close()
+            playwright.stop()
+        shutdown_workers()
+
+
+def render_command(source, out_dir, max_pages=PDF_MAX_PAGES, profile_name=image_profiles.PDF_PAGE_PROFILE):
+    """Render a PDF (file path or URL) the way the scraper does and write the results to out_dir"""
+    if re.match(r"https?://", source):
+        pdf_bytes = download_pdf(get_http_session(), source)
+        if pdf_bytes is None:
+            raise SystemExit(f"Could not download {source}")
+    else:
+        with open(source, "rb") as f:
+            pdf_bytes = f.read()
+    profile = image_profiles.get_profile(profile_name)
+    
+    started = time.monotonic()
+    result = process_pdf(pdf_bytes, max_pages, profile)
+    elapsed = time.monotonic() - started
+    
+    os.makedirs(out_dir, exist_ok=True)
+    for item in pdf_page_uploads(result["pages"], profile):
+        for data, filename in ((item["data"], item["filename"]), (item["thumb"], "thumb_" + item["filename"])):
+            if data:
+                with open(os.path.join(out_dir, filename), "wb") as f:
+                    f.write(data)
+                print(f"[RENDER] {filename}: {format_bytes(len(data))}")
+    with open(os.path.join(out_dir, "text.txt"), "w", encoding="utf-8") as f:
+        f.write(result["text"])
+    print(f"[RENDER] {len(result['pages'])} page(s), {len(result['text'])} characters of text "
+          f"in {elapsed:.2f}s -> {out_dir}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="BSE index announcement scraper",
+        epilog="Without a command, 'run' is assumed (finalscraper.py --daemon is finalscraper.py run --daemon)"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run_cmd = commands.add_parser("run", help="Scrape the index listings into the database")
+    run_cmd.add_argument(
+        "--concurrency", type=int, default=SCRAPER_CONCURRENCY,
+        help="Detail pages in flight at once; values above 1 use the async scraper "
+             "(default: SCRAPER_CONCURRENCY or 1)"
+    )
+    run_cmd.add_argument(
+        "--daemon", action="store_true",
+        help="Stay running with a warm browser; each 'scrape' line on stdin triggers a run "
+             "and prints a [RESULT] JSON line"
+    )
+    run_cmd.add_argument(
+        "--socket", metavar="PATH",
+        help="With --daemon, take commands on this Unix socket instead of stdin"
+    )
+    run_cmd.add_argument(
+        "--force", action="store_true",
+        help="Skip the HTTP change probe and always launch the browser"
+    )
+    run_cmd.add_argument(
+        "--backfill", nargs=2, metavar=("FROM", "TO"), type=date.fromisoformat,
+        help="Scrape the BSE archive between two YYYY-MM-DD dates instead of the live listing; "
+             "resumable, re-run the same command to continue"
+    )
+    run_cmd.add_argument(
+        "--companies", metavar="CODES",
+        help="With --backfill, comma separated BSE scrip codes (default: BACKFILL_COMPANIES)"
+    )
+    run_cmd.add_argument(
+        "--job", metavar="NAME",
+        help="With --backfill, checkpoint name (default: derived from the index and date range)"
+    )
+    
+    list_cmd = commands.add_parser("list", help="Print the newsids on the index listings")
+    list_cmd.add_argument("--new", action="store_true", help="Only those not in the database yet")
+    
+    detail_cmd = commands.add_parser("detail", help="Scrape one announcement and print it as JSON")
+    detail_cmd.add_argument("newsid")
+    detail_cmd.add_argument("--full", action="store_true",
+                            help="Also screenshot, render the PDF, upload and summarize")
+    detail_cmd.add_argument("--insert", action="store_true", help="With --full, insert the result")
+    
+    render_cmd = commands.add_parser("render", help="Render a PDF file or URL with an image profile")
+    render_cmd.add_argument("pdf", help="Path or URL of the PDF")
+    render_cmd.add_argument("--out", default="rendered_pdf", help="Output directory (default: rendered_pdf)")
+    render_cmd.add_argument("--pages", type=int, default=PDF_MAX_PAGES,
+                            help=f"Pages to render (default: PDF_MAX_PAGES or {PDF_MAX_PAGES})")
+    render_cmd.add_argument("--profile", default=image_profiles.PDF_PAGE_PROFILE,
+                            choices=sorted(image_profiles.IMAGE_PROFILES))
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # The scheduler spawns `finalscraper.py` / `finalscraper.py --daemon`
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv = ["run"] + argv
+    args = build_parser().parse_args(argv)
+    
+    if args.command == "list":
+        list_command(args.new)
+        return
+    if args.command == "detail":
+        detail_command(args.newsid, args.full, args.insert)
+        return
+    if args.command == "render":
+        render_command(args.pdf, args.out, args.pages, args.profile)
+        return
+    
+    if args.backfill:
+        start, end = sorted(args.backfill)
+        companies = [code.strip() for code in args.companies.split(',')] if args.companies else BACKFILL_COMPANIES
+        asyncio.run(backfill_async(start, end, [code for code in companies if code], args.job,
+                                   args.concurrency if args.concurrency > 1 else BACKFILL_CONCURRENCY))
+        return
+    
+    if not args.daemon and not args.force and listing_unchanged():
+        print("[PROBE] Listing unchanged - not launching the browser")
+        return
+    
+    if args.daemon:
+        asyncio.run(run_daemon(args.concurrency, args.socket))
+    elif args.concurrency > 1:
+        asyncio.run(scrape_bankex_async(args.concurrency))
+    else:
+        scrape_bankex()
 
 
 if __name__ == "__main__":
-    scrape_bankex()
\ No newline at end of file
+    main()
@@ -0,0 +1,170 @@
+import io
+import os
+import math
+from importlib.util import find_spec
+
+# Pillow is only needed for WebP output and for resizing screenshots, and is
+# imported where it is used so loading this module stays cheap
+HAS_PIL = find_spec("PIL") is not None
+
+PDF_ZOOM = float(os.getenv("PDF_ZOOM", "2"))
+
+# format: png | jpeg | webp; quality: lossy formats only; dpi: PDF page render
+# resolution (screenshots are captured at CSS pixels); max_pixels: cap on
+# width*height of the full-size image; thumbnail_width: also produce a small
+# rendition this many pixels wide (None to skip)
+IMAGE_PROFILES = {
+    # What the scraper has always produced: lossless PNG, PDF pages at PDF_ZOOM
+    "original": {"format": "png", "quality": None, "dpi": 72 * PDF_ZOOM, "max_pixels": None, "thumbnail_width": None},
+    "balanced": {"format": "jpeg", "quality": 82, "dpi": 120, "max_pixels": 3_000_000, "thumbnail_width": 360},
+    "compact": {"format": "webp", "quality": 70, "dpi": 96, "max_pixels": 2_000_000, "thumbnail_width": 320},
+}
+SCREENSHOT_PROFILE = os.getenv("SCREENSHOT_PROFILE", "original")
+PDF_PAGE_PROFILE = os.getenv("PDF_PAGE_PROFILE", "original")
+
+EXTENSIONS = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+
+
+def get_profile(name):
+    """Look up a profile by name, degrading WebP to JPEG when Pillow is missing"""
+    profile = IMAGE_PROFILES.get(name)
+    if profile is None:
+        print(f"[IMAGES] Unknown profile '{name}', using 'original'")
+        profile = IMAGE_PROFILES["original"]
+    if profile["format"] == "webp" and not HAS_PIL:
+        print("[IMAGES] Pillow not installed - WebP profile falls back to JPEG")
+        profile = dict(profile, format="jpeg")
+    return profile
+
+
+def extension(profile):
+    return EXTENSIONS[profile["format"]]
+
+
+def encode_image(image, profile):
+    """Encode a Pillow image with the profile's format and quality"""
+    fmt = profile["format"]
+    buffer = io.BytesIO()
+    if fmt == "png":
+        image.save(buffer, format="PNG", optimize=True)
+    elif fmt == "jpeg":
+        image.convert("RGB").save(buffer, format="JPEG", quality=profile["quality"] or 85, optimize=True)
+    else:
+        image.save(buffer, format="WEBP", quality=profile["quality"] or 80, method=4)
+    return buffer.getvalue()
+
+
+def encode_pixmap(pix, profile):
+    """Encode a PyMuPDF pixmap, using its native encoders where possible"""
+    fmt = profile["format"]
+    if fmt == "png":
+        return pix.tobytes("png")
+    if fmt == "jpeg":
+        return pix.tobytes("jpeg", jpg_quality=profile["quality"] or 85)
+    from PIL import Image
+
+    mode = "RGBA" if pix.alpha else "RGB"
+    return encode_image(Image.frombytes(mode, (pix.width, pix.height), pix.samples), profile)
+
+
+def pdf_page_zoom(width_pt, height_pt, profile):
+    """Render scale for a page of the given size, shrunk to fit max_pixels"""
+    zoom = profile["dpi"] / 72
+    max_pixels = profile.get("max_pixels")
+    if max_pixels:
+        pixels = (width_pt * zoom) * (height_pt * zoom)
+        if pixels > max_pixels:
+            zoom *= math.sqrt(max_pixels / pixels)
+    return zoom
+
+
+def render_pdf_page(page, profile):
+    """Render one PyMuPDF page to {'full': bytes, 'thumb': bytes | None}"""
+    import fitz  # PyMuPDF
+
+    # Pixmaps are dropped in finally so a failed encode doesn't keep one alive
+    # through the traceback
+    zoom = pdf_page_zoom(page.rect.width, page.rect.height, profile)
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+    try:
+        full = encode_pixmap(pix, profile)
+    finally:
+        del pix
+
+    thumb = None
+    if profile.get("thumbnail_width"):
+        thumb_zoom = profile["thumbnail_width"] / page.rect.width
+        thumb_pix = page.get_pixmap(matrix=fitz.Matrix(thumb_zoom, thumb_zoom))
+        try:
+            thumb = encode_pixmap(thumb_pix, profile)
+        finally:
+            del thumb_pix
+    return {"full": full, "thumb": thumb}
+
+
+def screenshot_options(profile):
+    """Playwright screenshot() kwargs; WebP is captured as PNG and converted"""
+    if profile["format"] == "jpeg":
+        return {"type": "jpeg", "quality": profile["quality"] or 85}
+    return {"type": "png"}
+
+
+def finish_screenshot(raw, profile):
+    """Apply the pixel budget, WebP conversion and thumbnail to a screenshot.
+
+    Returns {'full': bytes, 'thumb': bytes | None}; without Pillow the
+    screenshot is passed through as captured.
+    """
+    if not HAS_PIL:
+        return {"full": raw, "thumb": None}
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(raw))
+    image.load()
+    changed = profile["format"] == "webp"
+
+    max_pixels = profile.get("max_pixels")
+    if max_pixels and image.width * image.height > max_pixels:
+        scale = math.sqrt(max_pixels / (image.width * image.height))
+        image = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))), Image.LANCZOS)
+        changed = True
+    full = encode_image(image, profile) if changed else raw
+
+    thumb = None
+    thumbnail_width = profile.get("thumbnail_width")
+    if thumbnail_width and image.width > thumbnail_width:
+        height = max(1, round(image.height * thumbnail_width / image.width))
+        thumb = encode_image(image.resize((thumbnail_width, height), Image.LANCZOS), profile)
+    return {"full": full, "thumb": thumb}
+
+
+def compare_profiles(pdf_bytes, max_pages=5):
+    """Encoded byte counts of a PDF's first pages under every profile"""
+    import fitz  # PyMuPDF
+
+    document = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        report = {}
+        for name in IMAGE_PROFILES:
+            profile = get_profile(name)
+            pages = [render_pdf_page(document[i], profile) for i in range(min(len(document), max_pages))]
+            report[name] = {
+                "full_bytes": sum(len(p["full"]) for p in pages),
+                "thumb_bytes": sum(len(p["thumb"] or b"") for p in pages),
+                "pages": len(pages),
+            }
+        return report
+    finally:
+        document.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 2:
+        print("usage: python image_profiles.py <file.pdf>")
+        sys.exit(1)
+    with open(sys.argv[1], "rb") as f:
+        for name, sizes in compare_profiles(f.read()).items():
+            print(f"{name:10s} {sizes['pages']} page(s)  full {sizes['full_bytes'] / 1024:9.1f} KB"
+                  f"  thumbs {sizes['thumb_bytes'] / 1024:7.1f} KB")
@@ -0,0 +1,338 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from importlib.util import find_spec
+
+import metrics
+
+# Announcement images are stored by the sha256 of their bytes, so a retry,
+# a re-scrape or the same letterhead/disclaimer page in another filing maps
+# to an image that is already stored and nothing is sent again.
+#   IMAGE_STORE=auto        Cloudinary when its credentials are set, else local
+#   IMAGE_STORE=cloudinary  Cloudinary only
+#   IMAGE_STORE=local       files under IMAGE_STORE_DIR, served by Express at /images
+#   IMAGE_STORE=none        don't keep images
+IMAGE_STORE = os.getenv("IMAGE_STORE", "auto").lower()
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_store"))
+# Public URL the Express static route is reachable at (the deployed backend
+# URL + /images). It is stored with each image and ends up in emails, so the
+# local backend refuses to start without it rather than guess
+IMAGE_STORE_BASE_URL = (os.getenv("IMAGE_STORE_BASE_URL") or "").rstrip("/")
+# Once the local store passes this size, least recently used images that no
+# stored announcement links to are deleted; referenced images are never evicted
+IMAGE_STORE_MAX_MB = float(os.getenv("IMAGE_STORE_MAX_MB", "2048"))
+# Images newer than this may belong to a row that isn't inserted yet
+EVICT_GRACE_SECONDS = 3600
+# When referenced images alone exceed the budget, wait this long before checking again
+EVICT_RETRY_SECONDS = 600
+# Hashes already uploaded to Cloudinary, with their URLs
+IMAGE_STORE_INDEX = os.getenv(
+    "IMAGE_STORE_INDEX", os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_store_index.sqlite3")
+)
+CLOUDINARY_FOLDER = os.getenv("CLOUDINARY_FOLDER", "bankex")
+
+CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
+CLOUD_KEY = os.getenv("CLOUDINARY_API_KEY")
+CLOUD_SECRET = os.getenv("CLOUDINARY_API_SECRET")
+CLOUDINARY_CONFIGURED = bool(find_spec("cloudinary") and CLOUD_NAME and CLOUD_KEY and CLOUD_SECRET)
+
+
+class ImageStoreConfigError(RuntimeError):
+    """The selected backend is missing settings it needs"""
+
+
+def content_key(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ImageStore(ABC):
+    """Content-addressed image backend.
+
+    put() hashes the bytes and returns the stored URL, calling the
+    backend's store() only for hashes lookup() doesn't already know.
+    """
+
+    name = None
+
+    def put(self, data, ext):
+        digest = content_key(data)
+        url = self.lookup(digest, ext)
+        if url:
+            metrics.count("image_store_reused")
+            return url
+        url = self.store(data, digest, ext)
+        metrics.count("image_store_uploads")
+        metrics.count("image_store_bytes_uploaded", len(data))
+        return url
+
+    @abstractmethod
+    def lookup(self, digest, ext):
+        """URL of an already stored image, or None"""
+
+    @abstractmethod
+    def store(self, data, digest, ext):
+        """Keep the bytes and return their URL"""
+
+
+class LocalImageStore(ImageStore):
+    """Files at <root>/<aa>/<bb>/<sha256>.<ext>, served under base_url.
+
+    Reusing an image touches its mtime. Once the store passes max_bytes,
+    least recently used files are deleted until it is back under 90%, but
+    only those whose hash `referenced(digests)` doesn't report: links
+    already stored or emailed keep working. Without `referenced` nothing
+    is evicted.
+    """
+
+    name = "local"
+
+    def __init__(self, root=IMAGE_STORE_DIR, base_url=IMAGE_STORE_BASE_URL,
+                 max_bytes=int(IMAGE_STORE_MAX_MB * 1024 * 1024), referenced=None, clock=time.time):
+        if not base_url:
+            raise ImageStoreConfigError(
+                "IMAGE_STORE_BASE_URL must be set to the public URL of /images for the local image store "
+                "(or set IMAGE_STORE=cloudinary / none)"
+            )
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+        self.max_bytes = max_bytes
+        self.referenced = referenced
+        self.clock = clock
+        self.evictions = 0
+        self._next_evict_at = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.size = sum(size for _, _, size in self._files())
+
+    def _relative(self, digest, ext):
+        return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+    def _files(self):
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    @staticmethod
+    def _digest(path):
+        return os.path.basename(path).split(".", 1)[0]
+
+    def _digests(self, files):
+        return {self._digest(path) for path, _, _ in files}
+
+    def lookup(self, digest, ext):
+        relative = self._relative(digest, ext)
+        try:
+            os.utime(os.path.join(self.root, relative))
+        except OSError:
+            return None
+        return f"{self.base_url}/{relative}"
+
+    def store(self, data, digest, ext):
+        relative = self._relative(digest, ext)
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temp name: two threads may store the same image at once
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+        with self._lock:
+            self.size += len(data)
+            over = self.max_bytes and self.size > self.max_bytes and self.clock() >= self._next_evict_at
+        if over:
+            self.evict(keep=path)
+        return f"{self.base_url}/{relative}"
+
+    def evict(self, keep=None):
+        """Delete unreferenced least recently used files until the store is under 90% of max_bytes"""
+        with self._lock:
+            files = sorted(self._files(), key=lambda item: item[1])
+            self.size = sum(size for _, _, size in files)
+            target = self.max_bytes * 0.9
+            removed = 0
+            cutoff = self.clock() - EVICT_GRACE_SECONDS
+            candidates = [item for item in files if item[0] != keep and item[1] < cutoff]
+            in_use = set()
+            if self.size > target and candidates:
+                try:
+                    in_use = self.referenced(self._digests(candidates)) if self.referenced else None
+                except Exception as e:
+                    print(f"[IMAGE STORE] Could not check which images are referenced: {type(e).__name__}: {e}")
+                    in_use = None
+            if in_use is None:
+                candidates = []
+            for path, _, size in candidates:
+                if self.size <= target:
+                    break
+                if self._digest(path) in in_use:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self.size -= size
+                removed += 1
+            self.evictions += removed
+            if self.size > target:
+                self._next_evict_at = self.clock() + EVICT_RETRY_SECONDS
+                print(f"[IMAGE STORE] {self.size / 1024 / 1024:.0f} MB still stored: the remaining images are "
+                      f"referenced or recent, raise IMAGE_STORE_MAX_MB")
+        if removed:
+            metrics.count("image_store_evictions", removed)
+            print(f"[IMAGE STORE] Evicted {removed} unreferenced image(s), "
+                  f"{self.size / 1024 / 1024:.0f} MB kept")
+        return removed
+
+
+class HashIndex:
+    """sha256 -> URL of images a remote backend already holds (SQLite, thread-safe)"""
+
+    def __init__(self, path=IMAGE_STORE_INDEX):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                backend TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                url TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (backend, digest)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, backend, digest):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url FROM images WHERE backend = ? AND digest = ?", (backend, digest)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, backend, digest, url):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO images (backend, digest, url, stored_at) VALUES (?, ?, ?, ?)",
+                (backend, digest, url, time.time()),
+            )
+            self._conn.commit()
+
+
+class CloudinaryImageStore(ImageStore):
+    """Cloudinary assets named <folder>/sha256/<digest>; known hashes come from a HashIndex"""
+
+    name = "cloudinary"
+
+    def __init__(self, index=None, folder=CLOUDINARY_FOLDER):
+        self.index = index if index is not None else HashIndex()
+        self.folder = folder
+        self._uploader = None
+        self._lock = threading.Lock()
+
+    def uploader(self):
+        """cloudinary.uploader, imported and configured on the first upload"""
+        with self._lock:
+            if self._uploader is None:
+                import cloudinary
+                import cloudinary.uploader
+                cloudinary.config(
+                    cloud_name=CLOUD_NAME,
+                    api_key=CLOUD_KEY,
+                    api_secret=CLOUD_SECRET,
+                    secure=True
+                )
+                print(f"[CLOUDINARY] Configured (cloud_name={CLOUD_NAME})")
+                self._uploader = cloudinary.uploader
+        return self._uploader
+
+    def lookup(self, digest, ext):
+        return self.index.get(self.name, digest)
+
+    def store(self, data, digest, ext):
+        # overwrite=False: an asset that is already there (index lost) is not processed again
+        result = self.uploader().upload(
+            data,
+            public_id=f"{self.folder}/sha256/{digest}",
+            resource_type="image",
+            overwrite=False
+        )
+        url = result.get("secure_url")
+        if url:
+            self.index.put(self.name, digest, url)
+        return url
+
+
+def referenced_digests(digests):
+    """The subset of `digests` some stored announcement links to"""
+    from db import get_db
+
+    conn = get_db()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT DISTINCT m[1]
+                FROM announcements, regexp_matches(screenshot_url, '([0-9a-f]{64})\\.', 'g') AS m
+                WHERE screenshot_url IS NOT NULL AND m[1] = ANY(%s)
+            """, (list(digests),))
+            return {row[0] for row in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def create_store(kind=IMAGE_STORE):
+    """The configured backend, or None for IMAGE_STORE=none or a backend missing its settings"""
+    if kind == "none":
+        return None
+    if kind == "cloudinary" or (kind == "auto" and CLOUDINARY_CONFIGURED):
+        if not CLOUDINARY_CONFIGURED:
+            print("[IMAGE STORE] IMAGE_STORE=cloudinary but Cloudinary is not configured, images will be dropped")
+            return None
+        return CloudinaryImageStore()
+    if kind not in ("auto", "local"):
+        print(f"[IMAGE STORE] Unknown IMAGE_STORE={kind!r}, using local")
+    try:
+        return LocalImageStore(referenced=referenced_digests)
+    except ImageStoreConfigError as e:
+        print(f"[IMAGE STORE] WARNING: {e}; images will be dropped")
+        return None
+
+
+_store = None
+_store_created = False
+_store_lock = threading.Lock()
+
+
+def get_image_store():
+    """Process-wide image backend, built on first use.
+
+    None when images are disabled or the backend is misconfigured (logged
+    once); entry points call this at startup so the warning comes first.
+    """
+    global _store, _store_created
+    with _store_lock:
+        if not _store_created:
+            _store = create_store()
+            _store_created = True
+            if _store is not None:
+                print(f"[IMAGE STORE] Using {_store.name} backend")
+    return _store
+
+
+def describe():
+    """Backend the configuration selects, for the startup banner"""
+    if IMAGE_STORE == "none" or (IMAGE_STORE == "cloudinary" and not CLOUDINARY_CONFIGURED):
+        return "none"
+    if IMAGE_STORE == "cloudinary" or (IMAGE_STORE == "auto" and CLOUDINARY_CONFIGURED):
+        return "cloudinary"
+    if not IMAGE_STORE_BASE_URL:
+        return "none (local store needs IMAGE_STORE_BASE_URL)"
+    return f"local ({IMAGE_STORE_DIR} -> {IMAGE_STORE_BASE_URL})"
@@ -0,0 +1,103 @@
+"""Cold-start report for the scraper, in the style of `python -X importtime`.
+
+Imports a module in a fresh interpreter a few times, keeps the fastest run
+and prints its total import time, the slowest direct imports, and which
+heavy dependencies were loaded eagerly. Exits non-zero when the total is
+over budget, so it can gate CI or be logged next to the run metrics.
+
+    python import_report.py                    # finalscraper, IMPORT_BUDGET_MS
+    python import_report.py queue_worker --budget-ms 500 --json
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "400"))
+IMPORT_REPORT_RUNS = int(os.getenv("IMPORT_REPORT_RUNS", "3"))
+
+# Modules a stage imports when it needs them; none should load at startup
+HEAVY_MODULES = ("playwright", "playwright_stealth", "cloudinary", "fitz", "pymupdf", "PIL", "numpy")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output, in print order"""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def measure(module, runs=IMPORT_REPORT_RUNS):
+    """Entries of the fastest of `runs` cold imports of `module`"""
+    best = None
+    for _ in range(max(1, runs)):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+        entries = parse_importtime(result.stderr)
+        if best is None or total_ms(entries, module) < total_ms(best, module):
+            best = entries
+    return best
+
+
+def total_ms(entries, module):
+    for name, _, cumulative_us, depth in reversed(entries):
+        if name == module and depth == 0:
+            return cumulative_us / 1000
+    return 0.0
+
+
+def summarize(entries, module, top=10):
+    """Report dict: total, slowest direct imports and eagerly loaded heavy modules"""
+    # Depth-1 entries are what `module` itself imports (and what they pulled in)
+    direct = sorted(((name, cumulative_us / 1000) for name, _, cumulative_us, depth in entries if depth == 1),
+                    key=lambda item: item[1], reverse=True)
+    loaded = {name.split(".")[0] for name, _, _, _ in entries}
+    return {
+        "module": module,
+        "total_ms": round(total_ms(entries, module), 1),
+        "slowest": [{"module": name, "ms": round(ms, 1)} for name, ms in direct[:top]],
+        "heavy_loaded": [name for name in HEAVY_MODULES if name in loaded],
+    }
+
+
+def print_report(report, budget_ms):
+    status = "OK" if report["total_ms"] <= budget_ms else "OVER BUDGET"
+    print(f"[IMPORTS] import {report['module']}: {report['total_ms']:.1f} ms (budget {budget_ms:.0f} ms) {status}")
+    for item in report["slowest"]:
+        print(f"  {item['ms']:>8.1f} ms  {item['module']}")
+    if report["heavy_loaded"]:
+        print(f"[IMPORTS] Loaded at import time: {', '.join(report['heavy_loaded'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time report for a scraper module")
+    parser.add_argument("module", nargs="?", default="finalscraper")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS,
+                        help="Fail when the import takes longer (default: IMPORT_BUDGET_MS or 400)")
+    parser.add_argument("--runs", type=int, default=IMPORT_REPORT_RUNS, help="Cold imports to take the best of")
+    parser.add_argument("--top", type=int, default=10, help="Direct imports to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as one JSON line")
+    args = parser.parse_args(argv)
+
+    report = summarize(measure(args.module, args.runs), args.module, args.top)
+    if args.json:
+        print(json.dumps({**report, "budget_ms": args.budget_ms}))
+    else:
+        print_report(report, args.budget_ms)
+    return 0 if report["total_ms"] <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+import os
+import socket
+
+from psycopg2.extras import Json, execute_values
+
+# Scraping is split into stages, each a set of rows in scrape_jobs that any
+# number of worker processes drain. A worker leases jobs with FOR UPDATE
+# SKIP LOCKED, so two workers never take the same row; a lease that isn't
+# completed within QUEUE_LEASE_SECONDS (worker crashed or hung) makes the
+# job available again, until it has been attempted QUEUE_MAX_ATTEMPTS times.
+#   detail    -> fetch the detail page, insert the core announcement row
+#   enrich    -> screenshot, PDF render/text, image uploads
+#   summarize -> Groq summary; the row is marked enriched when this is done
+STAGES = ("detail", "enrich", "summarize")
+
+QUEUE_LEASE_SECONDS = int(os.getenv("QUEUE_LEASE_SECONDS", "300"))
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "5"))
+QUEUE_RETRY_SECONDS = int(os.getenv("QUEUE_RETRY_SECONDS", "30"))
+QUEUE_RETRY_MAX_SECONDS = int(os.getenv("QUEUE_RETRY_MAX_SECONDS", "1800"))
+QUEUE_DONE_RETENTION_DAYS = int(os.getenv("QUEUE_DONE_RETENTION_DAYS", "7"))
+
+JOB_FIELDS = ("id", "stage", "newsid", "payload", "attempts", "max_attempts")
+
+# A job is only finished or failed by the lease it was handed out under: if
+# the lease expired and the job was leased again, that attempt owns it now
+_OWNED_BY = "id = %s AND status = 'leased' AND leased_by = %s AND attempts = %s"
+
+
+class LeaseLost(Exception):
+    """The job's lease expired and it has been leased again"""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def retry_delay(attempts, base=QUEUE_RETRY_SECONDS, ceiling=QUEUE_RETRY_MAX_SECONDS):
+    """Seconds before a failed job is retried: doubles per attempt, capped"""
+    return min(ceiling, base * 2 ** max(0, attempts - 1))
+
+
+class JobQueue:
+    """scrape_jobs operations for one worker; every method commits its own transaction.
+
+    Jobs are dicts with the JOB_FIELDS keys. A (stage, newsid) pair is
+    queued at most once, so re-discovering an announcement is harmless.
+    complete(), advance() and fail() raise LeaseLost, changing nothing,
+    when the job is no longer held by this lease.
+    """
+
+    def __init__(self, conn, worker_id=None, lease_seconds=QUEUE_LEASE_SECONDS,
+                 max_attempts=QUEUE_MAX_ATTEMPTS):
+        self.conn = conn
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def _enqueue(self, cur, stage, items):
+        execute_values(cur, """
+            INSERT INTO scrape_jobs (stage, newsid, payload, max_attempts)
+            VALUES %s
+            ON CONFLICT (stage, newsid) DO NOTHING
+        """, [(stage, newsid, Json(payload or {}), self.max_attempts) for newsid, payload in items],
+            page_size=len(items))
+        return cur.rowcount
+
+    def enqueue(self, stage, items):
+        """Queue (newsid, payload) pairs for `stage`; returns how many were new"""
+        items = list(items)
+        if not items:
+            return 0
+        with self.conn.cursor() as cur:
+            queued = self._enqueue(cur, stage, items)
+        self.conn.commit()
+        return queued
+
+    def lease(self, stage, limit=1):
+        """Take up to `limit` ready jobs of `stage` for lease_seconds"""
+        with self.conn.cursor() as cur:
+            cur.execute(f"""
+                WITH ready AS (
+                    SELECT id FROM scrape_jobs
+                    WHERE stage = %s
+                      AND attempts < max_attempts
+                      AND ((status = 'pending' AND available_at <= NOW())
+                           OR (status = 'leased' AND lease_expires_at <= NOW()))
+                    ORDER BY available_at, id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE scrape_jobs j
+                SET status = 'leased',
+                    leased_by = %s,
+                    lease_expires_at = NOW() + make_interval(secs => %s),
+                    attempts = j.attempts + 1,
+                    updated_at = NOW()
+                FROM ready
+                WHERE j.id = ready.id
+                RETURNING {', '.join('j.' + field for field in JOB_FIELDS)}
+            """, (stage, limit, self.worker_id, self.lease_seconds))
+            jobs = [dict(zip(JOB_FIELDS, row)) for row in cur.fetchall()]
+        self.conn.commit()
+        jobs.sort(key=lambda job: job["id"])
+        return jobs
+
+    def _owned(self, job):
+        return (job["id"], self.worker_id, job["attempts"])
+
+    def _finish(self, cur, job, sql, params):
+        """Run an UPDATE scoped to this lease; LeaseLost (rolled back) if it matched nothing"""
+        cur.execute(sql, params + self._owned(job))
+        if cur.rowcount == 0:
+            self.conn.rollback()
+            raise LeaseLost(describe_job(job))
+
+    def _complete(self, cur, job):
+        # The payload (page HTML for enrich) isn't needed once the stage is done
+        self._finish(cur, job, f"""
+            UPDATE scrape_jobs
+            SET status = 'done', payload = '{{}}', leased_by = NULL, lease_expires_at = NULL,
+                last_error = NULL, updated_at = NOW()
+            WHERE {_OWNED_BY}
+        """, ())
+
+    def complete(self, job):
+        with self.conn.cursor() as cur:
+            self._complete(cur, job)
+        self.conn.commit()
+
+    def advance(self, job, next_stage, payload=None):
+        """Complete `job` and queue its announcement for `next_stage`, atomically"""
+        with self.conn.cursor() as cur:
+            self._complete(cur, job)
+            self._enqueue(cur, next_stage, [(job["newsid"], payload)])
+        self.conn.commit()
+
+    def fail(self, job, error):
+        """Record a failed attempt; returns True if the job will be retried"""
+        retry = job["attempts"] < job["max_attempts"]
+        with self.conn.cursor() as cur:
+            self._finish(cur, job, f"""
+                UPDATE scrape_jobs
+                SET status = %s, available_at = NOW() + make_interval(secs => %s),
+                    leased_by = NULL, lease_expires_at = NULL, last_error = %s, updated_at = NOW()
+                WHERE {_OWNED_BY}
+            """, ("pending" if retry else "failed", retry_delay(job["attempts"]), str(error)[:2000]))
+        self.conn.commit()
+        return retry
+
+    def reap(self):
+        """Mark jobs failed whose last allowed lease expired; returns how many"""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                UPDATE scrape_jobs
+                SET status = 'failed', leased_by = NULL, lease_expires_at = NULL,
+                    last_error = COALESCE(last_error, 'lease expired'), updated_at = NOW()
+                WHERE status = 'leased' AND lease_expires_at <= NOW() AND attempts >= max_attempts
+            """)
+            reaped = cur.rowcount
+        self.conn.commit()
+        return reaped
+
+    def requeue_failed(self, stage=None):
+        """Give failed jobs (of one stage, or all) a fresh set of attempts"""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                UPDATE scrape_jobs
+                SET status = 'pending', attempts = 0, available_at = NOW(), updated_at = NOW()
+                WHERE status = 'failed' AND (%s::text IS NULL OR stage = %s)
+            """, (stage, stage))
+            requeued = cur.rowcount
+        self.conn.commit()
+        return requeued
+
+    def prune(self, days=QUEUE_DONE_RETENTION_DAYS):
+        """Delete jobs finished more than `days` ago; returns how many"""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                DELETE FROM scrape_jobs
+                WHERE status = 'done' AND updated_at < NOW() - make_interval(days => %s)
+            """, (days,))
+            pruned = cur.rowcount
+        self.conn.commit()
+        return pruned
+
+    def stats(self):
+        """{stage: {status: count}}, with 'expired' counting leases past their deadline"""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT stage,
+                       CASE WHEN status = 'leased' AND lease_expires_at <= NOW() THEN 'expired'
+                            ELSE status END,
+                       COUNT(*)
+                FROM scrape_jobs
+                GROUP BY 1, 2
+            """)
+            rows = cur.fetchall()
+        self.conn.commit()
+        stats = {stage: {} for stage in STAGES}
+        for stage, status, count in rows:
+            stats.setdefault(stage, {})[status] = count
+        return stats
+
+
+def format_stats(stats):
+    statuses = ("pending", "leased", "expired", "done", "failed")
+    lines = [f"{'stage':<10}" + "".join(f"{status:>9}" for status in statuses)]
+    for stage, counts in stats.items():
+        lines.append(f"{stage:<10}" + "".join(f"{counts.get(status, 0):>9}" for status in statuses))
+    return "\n".join(lines)
+
+
+def describe_job(job):
+    return f"{job['stage']} {job['newsid']} (attempt {job['attempts']}/{job['max_attempts']})"
@@ -0,0 +1,134 @@
+import os
+import re
+import json
+import time
+import hashlib
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# BANKEX constituents, the companies the BANKEX listing shows filings for
+BANKEX_SCRIPS = "500180,532174,500112,500247,532215,532187,532134,540611,500469,539437"
+
+# Feeds to check before launching Chromium, comma separated. {scrip} expands
+# to one URL per LISTING_FEED_SCRIPS entry; {today} and {yesterday} are IST
+# dates (YYYYMMDD). The default asks BSE's announcements API for each
+# constituent's filings since yesterday. Set it to an empty string to
+# always run the full scrape.
+DEFAULT_LISTING_FEED_URL = (
+    "https://api.bseindia.com/BseIndiaAPI/api/AnnSubCategoryGetData/w?pageno=1&strCat=-1"
+    "&strPrevDate={yesterday}&strScrip={scrip}&strSearch=P&strToDate={today}&strType=C&subcategory=-1"
+)
+LISTING_FEED_URL = os.getenv("LISTING_FEED_URL", DEFAULT_LISTING_FEED_URL)
+LISTING_FEED_SCRIPS = [code.strip() for code in os.getenv("LISTING_FEED_SCRIPS", BANKEX_SCRIPS).split(",")
+                       if code.strip()]
+LISTING_PROBE_TIMEOUT = float(os.getenv("LISTING_PROBE_TIMEOUT", "5"))
+LISTING_PROBE_STATE = os.getenv(
+    "LISTING_PROBE_STATE", os.path.join(os.path.dirname(__file__), "listing_probe_state.json")
+)
+
+NEWSID_PATTERN = re.compile(r"[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}")
+IST = ZoneInfo("Asia/Kolkata")
+
+
+def feed_urls(feed_url=LISTING_FEED_URL, scrips=LISTING_FEED_SCRIPS, now=None):
+    """Concrete URLs for a LISTING_FEED_URL value, placeholders filled in"""
+    today = (now or datetime.now(IST)).date()
+    dates = {"today": today.strftime("%Y%m%d"), "yesterday": (today - timedelta(days=1)).strftime("%Y%m%d")}
+    urls = []
+    for url in (feed_url or "").split(","):
+        url = url.strip()
+        if not url:
+            continue
+        if "{scrip}" in url:
+            urls.extend(url.format(scrip=scrip, **dates) for scrip in scrips)
+        else:
+            urls.append(url.format(**dates))
+    return urls
+
+
+def lists_nothing(body):
+    """True for a JSON feed answer with an empty announcement table"""
+    try:
+        return json.loads(body).get("Table") == []
+    except (ValueError, AttributeError):
+        return False
+
+
+def extract_feed_newsids(body):
+    """All newsid GUIDs in a feed response, first occurrence order"""
+    return list(dict.fromkeys(NEWSID_PATTERN.findall(body)))
+
+
+def listing_fingerprint(newsids):
+    return hashlib.sha256("\n".join(sorted(newsids)).encode("utf-8")).hexdigest()
+
+
+def load_state(path=LISTING_PROBE_STATE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(fingerprint, count, path=LISTING_PROBE_STATE):
+    try:
+        with open(path, "w") as f:
+            json.dump({"fingerprint": fingerprint, "count": count, "checked_at": time.time()}, f)
+    except OSError as e:
+        print(f"[PROBE] Could not save state: {e}")
+
+
+def probe_listing(session, known_ids, feed_url=LISTING_FEED_URL, state_path=LISTING_PROBE_STATE,
+                  scrips=LISTING_FEED_SCRIPS, now=None):
+    """Decide over plain HTTP whether the listing has anything new.
+
+    known_ids(newsids) returns the subset already stored. Returns
+    (changed, newsids) where changed is False when every listed newsid is
+    known, True when something is new, and None when the probe can't tell
+    (not configured, request failed, nothing recognisable in the feed).
+    """
+    urls = feed_urls(feed_url, scrips, now)
+    if not urls:
+        return None, []
+
+    bodies = []
+    for url in urls:
+        try:
+            response = session.get(url, timeout=LISTING_PROBE_TIMEOUT)
+            if response.status_code != 200:
+                print(f"[PROBE] Feed returned HTTP {response.status_code}: {url}")
+                return None, []
+            bodies.append(response.text)
+        except Exception as e:
+            print(f"[PROBE] Feed request failed: {type(e).__name__}: {e}")
+            return None, []
+    newsids = extract_feed_newsids("\n".join(bodies))
+
+    if not newsids:
+        if all(lists_nothing(body) for body in bodies):
+            print("[PROBE] Feed lists no announcements")
+            return False, []
+        print("[PROBE] No newsids found in feed response")
+        return None, []
+
+    fingerprint = listing_fingerprint(newsids)
+    if load_state(state_path).get("fingerprint") == fingerprint:
+        print(f"[PROBE] Listing unchanged ({len(newsids)} newsids, fingerprint match)")
+        return False, newsids
+
+    try:
+        known = known_ids(newsids)
+    except Exception as e:
+        print(f"[PROBE] DB check failed: {type(e).__name__}: {e}")
+        return None, newsids
+
+    new = [newsid for newsid in newsids if newsid not in known]
+    if new:
+        print(f"[PROBE] {len(new)} new announcement(s) in feed")
+        return True, newsids
+
+    # Only remember listings whose every item is confirmed stored
+    save_state(fingerprint, len(newsids), state_path)
+    print(f"[PROBE] All {len(newsids)} listed announcements already stored")
+    return False, newsids
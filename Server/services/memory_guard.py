@@ -0,0 +1,111 @@
+import os
+import resource
+
+import metrics
+
+# The browser context is replaced after SCRAPER_RECYCLE_PAGES detail pages,
+# or sooner once the scraper and its Chromium/PDF worker processes together
+# pass SCRAPER_RSS_CEILING_MB (0 disables either trigger)
+SCRAPER_RECYCLE_PAGES = int(os.getenv("SCRAPER_RECYCLE_PAGES", "150"))
+SCRAPER_RSS_CEILING_MB = float(os.getenv("SCRAPER_RSS_CEILING_MB", "1536"))
+# After an RSS-triggered recycle, wait this many pages before the ceiling can
+# trigger again, so memory that isn't the browser's doesn't cause a recycle loop
+RSS_RECYCLE_MIN_PAGES = int(os.getenv("SCRAPER_RSS_RECYCLE_MIN_PAGES", "10"))
+
+_PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024 if hasattr(os, "sysconf") else 4
+
+
+def _proc_stat(pid):
+    """(ppid, rss_kb) from /proc/<pid>/stat, or None if the process is gone"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    # fields[0] is the state (stat field 3): ppid is field 4, rss (pages) field 24
+    return int(fields[1]), int(fields[21]) * _PAGE_KB
+
+
+def tree_rss_mb(root=None):
+    """Resident memory of this process and all its descendants in MB.
+
+    Reads /proc, so it covers Chromium and the PDF render workers; where
+    /proc isn't available only this process's peak RSS is known.
+    """
+    root = root or os.getpid()
+    if not os.path.isdir("/proc"):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = {}
+    rss = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        stat = _proc_stat(int(entry))
+        if stat is None:
+            continue
+        children.setdefault(stat[0], []).append(int(entry))
+        rss[int(entry)] = stat[1]
+    total_kb = 0
+    pending = [root]
+    while pending:
+        pid = pending.pop()
+        total_kb += rss.get(pid, 0)
+        pending.extend(children.get(pid, ()))
+    return total_kb / 1024
+
+
+class MemoryGuard:
+    """Decides when to recycle the browser context and tracks peak memory.
+
+    Call should_recycle() before opening a detail page and page_opened()
+    once it is open; recycled() records that a fresh context was made.
+    """
+
+    def __init__(self, recycle_pages=SCRAPER_RECYCLE_PAGES, ceiling_mb=SCRAPER_RSS_CEILING_MB,
+                 sampler=tree_rss_mb, rss_min_pages=RSS_RECYCLE_MIN_PAGES):
+        self.recycle_pages = recycle_pages
+        self.ceiling_mb = ceiling_mb
+        self.sampler = sampler
+        self.rss_min_pages = rss_min_pages
+        self.pages = 0
+        self.recycles = 0
+        self.peak_mb = 0.0
+        self._rss_cooldown = 0
+
+    def start_run(self):
+        """Reset the per-run figures (page count carries over, it belongs to the context)"""
+        self.recycles = 0
+        self.peak_mb = 0.0
+        self.sample()
+
+    def sample(self):
+        rss = self.sampler()
+        self.peak_mb = max(self.peak_mb, rss)
+        return rss
+
+    def page_opened(self):
+        self.pages += 1
+        self._rss_cooldown = max(0, self._rss_cooldown - 1)
+
+    def should_recycle(self):
+        """'pages' or 'rss' when the context should be replaced now, else None"""
+        if self.recycle_pages and self.pages >= self.recycle_pages:
+            return "pages"
+        rss = self.sample()
+        if self.ceiling_mb and rss >= self.ceiling_mb and self.pages and not self._rss_cooldown:
+            return "rss"
+        return None
+
+    def recycled(self, reason):
+        print(f"[MEMORY] Recycling browser context after {self.pages} page(s) ({reason}), "
+              f"RSS {self.sample():.0f} MB")
+        metrics.count("context_recycles")
+        self.recycles += 1
+        self.pages = 0
+        if reason == "rss":
+            self._rss_cooldown = self.rss_min_pages
+
+    def report(self):
+        """Run result fields: peak RSS of the process tree and recycle count"""
+        self.sample()
+        return {"peak_rss_mb": round(self.peak_mb, 1), "context_recycles": self.recycles}
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# METRICS_JSONL appends one JSON line per timed stage; METRICS_TEXTFILE is
+# rewritten after every run in Prometheus text format (node_exporter's
+# textfile collector, or anything that serves it as /metrics)
+METRICS_JSONL = os.getenv("METRICS_JSONL")
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE")
+METRICS_PREFIX = "[METRICS] "
+
+PROM_NAMESPACE = "bse_scraper"
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class RunMetrics:
+    """Stage timings, retry counts and token usage for one scrape run.
+
+    Safe to update from the event loop, upload/PDF threads and summarizer
+    threads at once; reset() starts a new run.
+    """
+
+    def __init__(self, jsonl_path=METRICS_JSONL, clock=time.perf_counter):
+        self.jsonl_path = jsonl_path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.stages = {}    # stage -> {"count", "errors", "sum", "max", "buckets"}
+            self.retries = {}   # stage -> count
+            self.counters = {}  # name -> value
+
+    def observe(self, stage, seconds, ok=True, **fields):
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = {"count": 0, "errors": 0, "sum": 0.0, "max": 0.0,
+                                              "buckets": [0] * len(BUCKETS)}
+            entry["count"] += 1
+            entry["errors"] += 0 if ok else 1
+            entry["sum"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            for idx, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    entry["buckets"][idx] += 1
+                    break
+        if self.jsonl_path:
+            self._append_jsonl(dict(fields, ts=round(time.time(), 3), stage=stage,
+                                    seconds=round(seconds, 4), ok=ok))
+
+    @contextmanager
+    def stage(self, stage, **fields):
+        """Time the enclosed block as one observation of `stage` (works around awaits too)"""
+        started = self.clock()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.observe(stage, self.clock() - started, ok, **fields)
+
+    def retry(self, stage, n=1):
+        with self._lock:
+            self.retries[stage] = self.retries.get(stage, 0) + n
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def _append_jsonl(self, record):
+        try:
+            with open(self.jsonl_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"[METRICS] Could not write {self.jsonl_path}: {e}")
+            self.jsonl_path = None
+
+    def snapshot(self):
+        """JSON-friendly summary of the run so far"""
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": entry["count"],
+                    "errors": entry["errors"],
+                    "total_s": round(entry["sum"], 3),
+                    "avg_s": round(entry["sum"] / entry["count"], 3),
+                    "max_s": round(entry["max"], 3),
+                }
+                for stage, entry in sorted(self.stages.items(), key=lambda item: -item[1]["sum"])
+            }
+            return {
+                "started_at": round(self.started, 3),
+                "stages": stages,
+                "retries": dict(self.retries),
+                "counters": dict(self.counters),
+            }
+
+    def render_prometheus(self, result=None):
+        """Prometheus text exposition of this run, plus the run result's numeric fields"""
+        ns = PROM_NAMESPACE
+        lines = [
+            f"# HELP {ns}_stage_seconds Time spent per scraper stage in the last run",
+            f"# TYPE {ns}_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, entry in sorted(self.stages.items()):
+                for bound, count in zip(BUCKETS, _cumulative(entry["buckets"])):
+                    lines.append(f'{ns}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{ns}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {entry["count"]}')
+                lines.append(f'{ns}_stage_seconds_sum{{stage="{stage}"}} {entry["sum"]:.6f}')
+                lines.append(f'{ns}_stage_seconds_count{{stage="{stage}"}} {entry["count"]}')
+            lines.append(f"# HELP {ns}_stage_errors Stage observations that raised, last run")
+            lines.append(f"# TYPE {ns}_stage_errors gauge")
+            for stage, entry in sorted(self.stages.items()):
+                lines.append(f'{ns}_stage_errors{{stage="{stage}"}} {entry["errors"]}')
+            lines.append(f"# HELP {ns}_retries Retries per stage, last run")
+            lines.append(f"# TYPE {ns}_retries gauge")
+            for stage, count in sorted(self.retries.items()):
+                lines.append(f'{ns}_retries{{stage="{stage}"}} {count}')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {ns}_{name} gauge")
+                lines.append(f"{ns}_{name} {value}")
+
+        for key, value in sorted((result or {}).items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f"# TYPE {ns}_run_{key} gauge")
+                lines.append(f"{ns}_run_{key} {value}")
+        lines.append(f"# TYPE {ns}_last_run_timestamp_seconds gauge")
+        lines.append(f"{ns}_last_run_timestamp_seconds {time.time():.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path, result=None):
+        """Atomically replace `path` so a collector never reads a half-written file"""
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(self.render_prometheus(result))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[METRICS] Could not write {path}: {e}")
+
+    def emit(self, result=None):
+        """Print the run summary as one JSON line and refresh the Prometheus textfile"""
+        summary = self.snapshot()
+        if result is not None:
+            summary["result"] = result
+        print(METRICS_PREFIX + json.dumps(summary), flush=True)
+        if METRICS_TEXTFILE:
+            self.write_textfile(METRICS_TEXTFILE, result)
+        return summary
+
+
+def _cumulative(counts):
+    total = 0
+    for count in counts:
+        total += count
+        yield total
+
+
+run_metrics = RunMetrics()
+stage = run_metrics.stage
+retry = run_metrics.retry
+count = run_metrics.count
+reset = run_metrics.reset
+emit = run_metrics.emit
@@ -0,0 +1,81 @@
+import os
+import time
+import random
+import asyncio
+import threading
+
+# Spacing between request starts to one host adapts AIMD-style: every fast,
+# clean response shortens it by PACING_STEP (down to the floor), a timeout
+# or block page multiplies it by PACING_BACKOFF (up to PACING_MAX_INTERVAL)
+PACING_INITIAL_INTERVAL = float(os.getenv("PACING_INITIAL_INTERVAL", "2.5"))
+PACING_MIN_INTERVAL = float(os.getenv("PACING_MIN_INTERVAL", "0.5"))
+PACING_MAX_INTERVAL = float(os.getenv("PACING_MAX_INTERVAL", "60"))
+PACING_STEP = float(os.getenv("PACING_STEP", "0.2"))
+PACING_BACKOFF = float(os.getenv("PACING_BACKOFF", "2.0"))
+PACING_SLOW_SECONDS = float(os.getenv("PACING_SLOW_SECONDS", "5"))
+PACING_JITTER = float(os.getenv("PACING_JITTER", "0.25"))
+
+BLOCK_STATUSES = {403, 429, 503}
+BLOCK_MARKERS = ("Access Denied", "Request unsuccessful", "You don't have permission to access")
+
+
+class BlockedError(Exception):
+    """The site answered with a block/rate-limit page instead of content"""
+
+
+def looks_blocked(status, body=None):
+    if status in BLOCK_STATUSES:
+        return True
+    return bool(body) and any(marker in body[:4096] for marker in BLOCK_MARKERS)
+
+
+class PacingController:
+    """Adaptive spacing between request starts for one host"""
+
+    def __init__(self, initial=PACING_INITIAL_INTERVAL, floor=PACING_MIN_INTERVAL, ceiling=PACING_MAX_INTERVAL,
+                 step=PACING_STEP, backoff=PACING_BACKOFF, slow_seconds=PACING_SLOW_SECONDS,
+                 jitter=PACING_JITTER, clock=time.monotonic):
+        self.floor = max(0.0, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.interval = min(self.ceiling, max(self.floor, initial))
+        self.step = step
+        self.backoff = backoff
+        self.slow_seconds = slow_seconds
+        self.jitter = jitter
+        self.clock = clock
+        self.last_start = None
+        self.successes = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Claim the next start slot; returns seconds to wait before using it"""
+        with self._lock:
+            now = self.clock()
+            spacing = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            start = now if self.last_start is None else max(now, self.last_start + spacing)
+            self.last_start = start
+            return start - now
+
+    def wait(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def success(self, latency):
+        """A clean response; fast ones shorten the interval, slow ones leave it alone"""
+        with self._lock:
+            self.successes += 1
+            if latency < self.slow_seconds:
+                self.interval = max(self.floor, self.interval - self.step)
+
+    def failure(self, retry_after=None):
+        """A timeout or block page: back off multiplicatively (at least Retry-After)"""
+        with self._lock:
+            self.failures += 1
+            self.interval = min(self.ceiling, max(max(self.interval, 0.1) * self.backoff, retry_after or 0.0))
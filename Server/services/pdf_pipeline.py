@@ -0,0 +1,163 @@
+import os
+import re
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import metrics
+from image_profiles import PDF_PAGE_PROFILE, get_profile, render_pdf_page
+
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "5"))
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(100 * 1024 * 1024)))
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+# Render workers are replaced after this many PDFs so MuPDF's heap can't creep
+PDF_RENDER_MAX_TASKS = int(os.getenv("PDF_RENDER_MAX_TASKS", "50"))
+PDF_DOWNLOAD_TIMEOUT = float(os.getenv("PDF_DOWNLOAD_TIMEOUT", "30"))
+# Text is pulled from more pages than are rendered; it feeds search and the summarizer
+PDF_TEXT_MAX_PAGES = int(os.getenv("PDF_TEXT_MAX_PAGES", "50"))
+PDF_TEXT_MAX_CHARS = int(os.getenv("PDF_TEXT_MAX_CHARS", "200000"))
+
+
+class PdfTooLarge(Exception):
+    pass
+
+
+def download_pdf(session, url, max_bytes=PDF_MAX_BYTES, timeout=PDF_DOWNLOAD_TIMEOUT):
+    """Stream a PDF into memory, aborting as soon as it passes max_bytes"""
+    with session.get(url, timeout=timeout, stream=True) as response:
+        if response.status_code != 200:
+            print(f"  [PDF] Download returned HTTP {response.status_code}")
+            return None
+
+        declared = int(response.headers.get("Content-Length") or 0)
+        if declared > max_bytes:
+            raise PdfTooLarge(f"{declared} bytes declared, cap is {max_bytes}")
+
+        buffer = bytearray()
+        for chunk in response.iter_content(chunk_size=256 * 1024):
+            buffer.extend(chunk)
+            if len(buffer) > max_bytes:
+                raise PdfTooLarge(f"more than {max_bytes} bytes received")
+        return bytes(buffer)
+
+
+def extract_pdf_text(document, max_pages=PDF_TEXT_MAX_PAGES, max_chars=PDF_TEXT_MAX_CHARS):
+    """Whitespace-normalized text of the first pages of an open PyMuPDF document"""
+    parts = []
+    length = 0
+    for page_num in range(min(len(document), max_pages)):
+        # Postgres text can't hold NUL, which some PDF encodings produce
+        text = re.sub(r"[\s\x00]+", " ", document[page_num].get_text("text")).strip()
+        if not text:
+            continue
+        parts.append(text)
+        length += len(text) + 1
+        if length >= max_chars:
+            break
+    return " ".join(parts)[:max_chars]
+
+
+def process_pdf(pdf_bytes, max_pages, profile):
+    """Render pages and extract text from one parse of the PDF; runs in a worker process.
+
+    Returns {'pages': [{'full': bytes, 'thumb': bytes | None}, ...], 'text': str}.
+    """
+    import fitz  # PyMuPDF
+
+    document = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        pages = [render_pdf_page(document[page_num], profile)
+                 for page_num in range(min(len(document), max_pages))]
+        try:
+            text = extract_pdf_text(document)
+        except Exception as e:
+            print(f"  [PDF] Text extraction failed: {e}")
+            text = ""
+        return {"pages": pages, "text": text}
+    finally:
+        document.close()
+
+
+class PdfPipeline:
+    """Download, rasterization and text extraction stage that runs beside the browser.
+
+    Downloads stream on a thread pool; rendering happens in a process pool
+    so large, dense PDFs don't hold the scraper's GIL or event loop.
+    workers=0 renders in the download thread instead. Every download is
+    hashed; when `is_known(sha256)` says it's a PDF already processed,
+    rendering and text extraction are skipped.
+    """
+
+    def __init__(self, session_factory, workers=PDF_RENDER_WORKERS, max_pages=PDF_MAX_PAGES,
+                 profile=None, max_bytes=PDF_MAX_BYTES, is_known=None):
+        self.session_factory = session_factory
+        self.is_known = is_known
+        self.workers = max(0, workers)
+        self.max_pages = max_pages
+        self.profile = profile or get_profile(PDF_PAGE_PROFILE)
+        self.max_bytes = max_bytes
+        self._downloads = ThreadPoolExecutor(max_workers=max(2, self.workers * 2),
+                                             thread_name_prefix="pdf-download")
+        self._render_pool = None
+        self._pool_lock = threading.Lock()
+
+    def _new_pool(self):
+        # spawn, not fork: the parent holds Playwright's threads and pipes
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=PDF_RENDER_MAX_TASKS or None
+        )
+
+    def _renderer(self):
+        with self._pool_lock:
+            if self._render_pool is None:
+                self._render_pool = self._new_pool()
+            return self._render_pool
+
+    def _discard(self, pool):
+        """Shut down a broken pool; the next render starts a fresh one"""
+        with self._pool_lock:
+            if self._render_pool is pool:
+                self._render_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, url):
+        with metrics.stage("pdf_download"):
+            pdf_bytes = download_pdf(self.session_factory(), url, self.max_bytes)
+        if pdf_bytes is None:
+            return {"pages": [], "text": "", "sha256": None}
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        if self.is_known is not None and self.is_known(digest):
+            return {"pages": [], "text": "", "sha256": digest, "known": True}
+        with metrics.stage("pdf_rasterize"):
+            result = self._render(pdf_bytes)
+        result["sha256"] = digest
+        return result
+
+    def _render(self, pdf_bytes):
+        if self.workers == 0:
+            return process_pdf(pdf_bytes, self.max_pages, self.profile)
+        # A worker that died (crash, OOM kill) takes the pool with it. The PDF
+        # gets one more try in a fresh pool, never in this process: if it was
+        # the PDF that killed the worker it would take the scraper down too.
+        for attempt in range(2):
+            pool = self._renderer()
+            try:
+                return pool.submit(process_pdf, pdf_bytes, self.max_pages, self.profile).result()
+            except BrokenProcessPool:
+                self._discard(pool)
+                if attempt:
+                    raise
+                print("  [PDF] Render pool crashed, retrying in a fresh pool")
+                metrics.retry("pdf_rasterize")
+
+    def submit(self, url):
+        """Queue a PDF; returns a Future resolving to {'pages': [...], 'text': str, 'sha256': str}"""
+        return self._downloads.submit(self._run, url)
+
+    def shutdown(self):
+        self._downloads.shutdown(wait=True)
+        if self._render_pool is not None:
+            self._render_pool.shutdown(wait=True)
+            self._render_pool = None
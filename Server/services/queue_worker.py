@@ -0,0 +1,366 @@
+import sys
+import os
+import time
+import signal
+import argparse
+import multiprocessing
+
+import finalscraper as scraper
+from db import get_db, ensure_schema
+from job_queue import JobQueue, LeaseLost, STAGES, QUEUE_LEASE_SECONDS, describe_job, format_stats
+from image_store import get_image_store
+from memory_guard import MemoryGuard
+import metrics
+
+# Workers drain the later stages first, so announcements already in flight
+# are finished before new detail pages are fetched
+QUEUE_LEASE_BATCH = int(os.getenv("QUEUE_LEASE_BATCH", "1"))
+QUEUE_IDLE_SECONDS = float(os.getenv("QUEUE_IDLE_SECONDS", "5"))
+QUEUE_WORKER_STAGES = [s.strip() for s in os.getenv("QUEUE_WORKER_STAGES", ",".join(STAGES)).split(",") if s.strip()]
+# How often a long-running worker reloads the duplicate index from the DB
+QUEUE_FINGERPRINT_REFRESH_SECONDS = float(os.getenv("QUEUE_FINGERPRINT_REFRESH_SECONDS", "600"))
+
+
+def final_attempt(job):
+    return job["attempts"] >= job["max_attempts"]
+
+
+def load_row(conn, newsid, columns):
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT {', '.join(columns)} FROM announcements WHERE id = %s", (newsid,))
+        row = cur.fetchone()
+    conn.commit()
+    return dict(zip(columns, row)) if row else None
+
+
+class QueueWorker:
+    """Leases jobs for its stages and runs them; one browser, opened on first use"""
+
+    def __init__(self, stages=QUEUE_WORKER_STAGES, lease_batch=QUEUE_LEASE_BATCH):
+        self.stages = [stage for stage in reversed(STAGES) if stage in stages]
+        self.lease_batch = max(1, lease_batch)
+        if "enrich" in self.stages:
+            get_image_store()  # a misconfigured store is reported at startup, not mid-job
+        self.conn = get_db()
+        ensure_schema(self.conn)
+        self.queue = JobQueue(self.conn)
+        self.guard = MemoryGuard()
+        self.stopping = False
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+        self._fingerprints_at = 0.0
+
+    # Browser
+
+    def page(self):
+        """A fresh page for the current job (closed by end_job)"""
+        if self._page is not None:
+            return self._page
+        if self._browser is None:
+            self._playwright = scraper.sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(headless=True, args=scraper.BROWSER_ARGS)
+        reason = self.guard.should_recycle() if self._context is not None else None
+        if reason:
+            self.guard.recycled(reason)
+            scraper.close_quietly(self._context)
+            self._context = None
+        if self._context is None:
+            self._context = scraper.new_context(self._browser)
+        self._page = self._context.new_page()
+        self.guard.page_opened()
+        if scraper.STEALTH_AVAILABLE:
+            scraper.stealth_sync(self._page)
+        return self._page
+
+    def end_job(self):
+        if self._page is not None:
+            scraper.close_quietly(self._page)
+            self._page = None
+
+    def close(self):
+        self.end_job()
+        if self._browser is not None:
+            scraper.close_quietly(self._browser)
+            self._playwright.stop()
+            self._browser = None
+        scraper.shutdown_workers()
+        self.conn.close()
+
+    # Loop
+
+    def refresh_fingerprints(self):
+        if time.monotonic() - self._fingerprints_at >= QUEUE_FINGERPRINT_REFRESH_SECONDS:
+            scraper.load_fingerprints(self.conn)
+            self._fingerprints_at = time.monotonic()
+
+    def run_once(self):
+        """Lease and run one batch per stage; returns how many jobs ran"""
+        ran = 0
+        for stage in self.stages:
+            for job in self.queue.lease(stage, self.lease_batch):
+                self.run_job(job)
+                ran += 1
+                if self.stopping:
+                    return ran
+        return ran
+
+    def run(self, idle_seconds=QUEUE_IDLE_SECONDS, drain=False):
+        """Work until stopped (or, with `drain`, until no job is ready)"""
+        print(f"[QUEUE] Worker {self.queue.worker_id} on stages: {', '.join(self.stages)}")
+        try:
+            while not self.stopping:
+                self.refresh_fingerprints()
+                if self.run_once():
+                    continue
+                reaped = self.queue.reap()
+                if reaped:
+                    print(f"[QUEUE] {reaped} job(s) failed after their last lease expired")
+                if drain:
+                    break
+                time.sleep(idle_seconds)
+        finally:
+            self.close()
+
+    def run_job(self, job):
+        print(f"\n[QUEUE] {describe_job(job)}")
+        started = time.monotonic()
+        try:
+            STAGE_HANDLERS[job["stage"]](self, job)
+            print(f"  [QUEUE] Done in {time.monotonic() - started:.1f}s")
+        except LeaseLost:
+            self.lease_lost(job, started)
+        except Exception as e:
+            self.conn.rollback()
+            try:
+                retry = self.queue.fail(job, f"{type(e).__name__}: {e}")
+            except LeaseLost:
+                self.lease_lost(job, started)
+                return
+            print(f"  [QUEUE] Failed ({type(e).__name__}: {e}), "
+                  + ("will retry" if retry else "giving up"))
+        finally:
+            self.end_job()
+
+    def lease_lost(self, job, started):
+        metrics.count("queue_leases_lost")
+        print(f"  [QUEUE] Lease expired after {time.monotonic() - started:.1f}s and the job was leased "
+              f"again; leaving it to that attempt")
+
+
+# Stages
+
+def run_detail(worker, job):
+    """Fetch the detail page and insert the core row; the page HTML goes on to enrich"""
+    newsid = job["newsid"]
+    fields, _ = scraper.fetch_detail_fields(None, newsid, open_page=worker.page)
+    row = scraper.core_announcement(newsid, scraper.detail_url_for(newsid), fields["company"],
+                                    fields["security_code"], fields["title"], fields["description"],
+                                    fields["pdf_url"], scraper.parse_filed_at(fields["time_text"]))
+    row["enriched"] = False
+    scraper.tag_indices(row, job["payload"].get("indices") or [scraper.PRIMARY_INDEX])
+    scraper.insert_announcements(worker.conn, [row])
+    worker.queue.advance(job, "enrich", {"html": fields["html"], "description": fields["description"]})
+
+
+def run_enrich(worker, job):
+    """Screenshot the stored HTML, render/upload the PDF; no page load from BSE"""
+    newsid = job["newsid"]
+    payload = job["payload"]
+    row = load_row(worker.conn, newsid, ("company_code", "pdf_url", "text_simhash", "text_numbers"))
+    if row is None:
+        print("  [QUEUE] Announcement no longer exists")
+        worker.queue.complete(job)
+        return
+
+    page = None
+    if scraper.DETAIL_SCREENSHOT and payload.get("html"):
+        try:
+            page = worker.page()
+            page.set_content(scraper.screenshot_ready_html(payload["html"], scraper.detail_url_for(newsid)),
+                             wait_until="domcontentloaded", timeout=30000)
+        except Exception as e:
+            print(f"  [SCREENSHOT] Could not render stored HTML: {e}")
+            page = None
+
+    try:
+        screenshot_json, pdf = scraper.capture_images(page, newsid, row["pdf_url"], strict_uploads=True)
+    except scraper.UploadError:
+        if not final_attempt(job):
+            raise
+        # Out of attempts: send the announcement on without its images
+        print("  [QUEUE] Uploads keep failing, continuing without images")
+        worker.queue.advance(job, "summarize", {"description": payload.get("description", "")})
+        return
+
+    duplicate = pdf["duplicate"] or scraper.text_duplicate(row["company_code"], row["text_simhash"],
+                                                           row["text_numbers"])
+    summary = duplicate["summary"] if duplicate is not None else None
+    with worker.conn.cursor() as cur:
+        cur.execute("""
+            UPDATE announcements
+            SET screenshot_url = %(screenshot_url)s,
+                pdf_text = COALESCE(%(pdf_text)s, (SELECT pdf_text FROM announcements WHERE id = %(duplicate_of)s)),
+                pdf_sha256 = %(pdf_sha256)s,
+                duplicate_of = %(duplicate_of)s,
+                summary = COALESCE(%(summary)s, summary),
+                enriched = enriched OR %(enriched)s
+            WHERE id = %(id)s
+        """, {
+            "id": newsid,
+            "screenshot_url": screenshot_json,
+            "pdf_text": pdf["text"] or None,
+            "pdf_sha256": pdf["sha256"],
+            "duplicate_of": duplicate["id"] if duplicate is not None else None,
+            "summary": summary,
+            "enriched": summary is not None
+        })
+    worker.conn.commit()
+    if summary is not None:
+        remember(newsid, row, summary, screenshot_json, pdf["sha256"])
+        worker.queue.complete(job)
+    else:
+        worker.queue.advance(job, "summarize", {"description": payload.get("description", "")})
+
+
+def run_summarize(worker, job):
+    """Summarize with Groq and mark the row enriched; the last attempt falls back to an extractive summary"""
+    newsid = job["newsid"]
+    description = job["payload"].get("description", "")
+    row = load_row(worker.conn, newsid, ("title", "pdf_text", "company_code", "screenshot_url",
+                                         "pdf_sha256", "text_simhash", "text_numbers"))
+    if row is None:
+        print("  [QUEUE] Announcement no longer exists")
+        worker.queue.complete(job)
+        return
+
+    try:
+        summary = scraper.summarize_announcement(row["title"], description, row["pdf_text"] or "",
+                                                 raise_on_failure=True)
+    except Exception as e:
+        if not final_attempt(job):
+            raise
+        print(f"  [WARN] Summary generation failed: {e}")
+        summary = scraper.fallback_summary(row["title"], description, row["pdf_text"] or "")
+
+    with worker.conn.cursor() as cur:
+        cur.execute("UPDATE announcements SET summary = %s, enriched = TRUE WHERE id = %s", (summary, newsid))
+    worker.conn.commit()
+    remember(newsid, row, summary, row["screenshot_url"], row["pdf_sha256"])
+    worker.queue.complete(job)
+
+
+def remember(newsid, row, summary, screenshot_url, pdf_sha256):
+    """Add a finished announcement to this worker's duplicate index"""
+    if scraper._fingerprints is not None:
+        scraper._fingerprints.add({**row, "id": newsid, "summary": summary,
+                                   "screenshot_url": screenshot_url, "pdf_sha256": pdf_sha256})
+
+
+STAGE_HANDLERS = {
+    "detail": run_detail,
+    "enrich": run_enrich,
+    "summarize": run_summarize,
+}
+
+
+# Discovery
+
+def discover(force=False):
+    """Walk the index listings and queue a detail job per new newsid"""
+    conn = get_db()
+    ensure_schema(conn)
+    queue = JobQueue(conn)
+    try:
+        if not force and scraper.listing_unchanged(conn):
+            print("[PROBE] Listing unchanged - not launching the browser")
+            return {"status": "unchanged"}
+
+        tags_by_id = scraper.fetch_listings()
+        existing = scraper.existing_announcement_ids(conn, list(tags_by_id))
+        scraper.merge_index_tags(conn, {newsid: tags_by_id[newsid] for newsid in existing})
+        new = [newsid for newsid in tags_by_id if newsid not in existing]
+        queued = queue.enqueue("detail", [(newsid, {"indices": tags_by_id[newsid]}) for newsid in new])
+        pruned = queue.prune()
+        print(f"[QUEUE] {len(tags_by_id)} listed, {len(existing)} stored, {queued} newly queued"
+              + (f", pruned {pruned} finished job(s)" if pruned else ""))
+        return {"status": "ok", "found": len(tags_by_id), "skipped": len(existing), "queued": queued}
+    finally:
+        conn.close()
+
+
+# Processes
+
+def run_worker(stages, drain=False):
+    worker = QueueWorker(stages)
+
+    def stop(signum, frame):
+        print(f"[QUEUE] Signal {signum}, stopping after the current job")
+        worker.stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    worker.run(drain=drain)
+
+
+def run_workers(processes, stages, drain=False):
+    """Run `processes` workers, each its own process with its own browser and DB connection"""
+    if processes <= 1:
+        run_worker(stages, drain)
+        return
+    ctx = multiprocessing.get_context("spawn")
+    children = [ctx.Process(target=run_worker, args=(stages, drain), name=f"queue-worker-{i}")
+                for i in range(processes)]
+    for child in children:
+        child.start()
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        for child in children:
+            child.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Postgres-backed scrape queue: discovery and stage workers")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker_cmd = commands.add_parser("worker", help="Lease and run queued jobs")
+    worker_cmd.add_argument("--stages", default=",".join(QUEUE_WORKER_STAGES),
+                            help=f"Comma separated stages to work on (default: {','.join(QUEUE_WORKER_STAGES)})")
+    worker_cmd.add_argument("--processes", type=int, default=1, help="Worker processes to run (default: 1)")
+    worker_cmd.add_argument("--drain", action="store_true", help="Exit once no job is ready instead of polling")
+
+    discover_cmd = commands.add_parser("discover", help="Queue detail jobs for new announcements on the listings")
+    discover_cmd.add_argument("--force", action="store_true", help="Skip the HTTP change probe")
+
+    commands.add_parser("status", help="Job counts per stage and status")
+
+    requeue_cmd = commands.add_parser("requeue-failed", help="Retry jobs that ran out of attempts")
+    requeue_cmd.add_argument("--stage", choices=STAGES)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+        unknown = [stage for stage in stages if stage not in STAGES]
+        if unknown:
+            parser.error(f"unknown stage(s): {', '.join(unknown)}")
+        run_workers(args.processes, stages, args.drain)
+    elif args.command == "discover":
+        scraper.emit_result(discover(args.force))
+    else:
+        conn = get_db()
+        ensure_schema(conn)
+        queue = JobQueue(conn)
+        if args.command == "status":
+            print(format_stats(queue.stats()))
+            print(f"(lease timeout {QUEUE_LEASE_SECONDS}s)")
+        else:
+            print(f"[QUEUE] Requeued {queue.requeue_failed(args.stage)} failed job(s)")
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+
+import metrics
+
+# Requests are filtered with URL regexes registered once per browser context.
+# Playwright matches those in the browser, so only requests that hit a rule
+# (blocked, or a cacheable BSE asset) make a round trip through Python.
+RESOURCE_BLOCK_TYPES = [t.strip() for t in os.getenv("RESOURCE_BLOCK_TYPES", "media,font").split(",") if t.strip()]
+RESOURCE_BLOCK_DOMAINS = [d.strip() for d in os.getenv(
+    "RESOURCE_BLOCK_DOMAINS",
+    "google-analytics.com,googletagmanager.com,doubleclick.net,googlesyndication.com,"
+    "googleadservices.com,adservice.google.com,facebook.net,facebook.com,twitter.com,"
+    "linkedin.com,hotjar.com,clarity.ms,scorecardresearch.com,addthis.com,sharethis.com,"
+    "taboola.com,outbrain.com,youtube.com"
+).split(",") if d.strip()]
+# When set, requests to any other domain are aborted too
+RESOURCE_ALLOW_DOMAINS = [d.strip() for d in os.getenv("RESOURCE_ALLOW_DOMAINS", "").split(",") if d.strip()]
+
+# BSE's scripts, stylesheets and images are kept on disk and replayed
+# locally instead of being downloaded for every detail page
+ASSET_CACHE = os.getenv("ASSET_CACHE", "true").lower() != "false"
+ASSET_CACHE_DIR = os.getenv("ASSET_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "asset_cache"))
+ASSET_CACHE_TTL = int(os.getenv("ASSET_CACHE_TTL", str(7 * 24 * 3600)))
+ASSET_CACHE_HOSTS = [h.strip() for h in os.getenv("ASSET_CACHE_HOSTS", "bseindia.com").split(",") if h.strip()]
+ASSET_CACHE_MAX_ITEM_BYTES = int(os.getenv("ASSET_CACHE_MAX_ITEM_KB", "2048")) * 1024
+
+# Resource types are matched by file extension, since that is what a URL
+# pattern can see
+TYPE_EXTENSIONS = {
+    "font": ["woff2", "woff", "ttf", "otf", "eot"],
+    "media": ["mp4", "webm", "ogg", "mp3", "wav", "m3u8"],
+    "image": ["png", "jpe?g", "gif", "svg", "webp", "ico", "bmp"],
+    "stylesheet": ["css"],
+    "script": ["js"],
+}
+CACHEABLE_TYPES = ["script", "stylesheet", "image", "font"]
+CACHED_HEADERS = ("content-type", "cache-control", "last-modified", "etag")
+
+
+def _domain_alternation(domains):
+    return "|".join(re.escape(domain.lower().lstrip(".")) for domain in domains)
+
+
+def _host_pattern(domains):
+    """Regex source matching a URL whose host is one of `domains` or a subdomain"""
+    return rf"^https?://(?:[^/?#]*\.)?(?:{_domain_alternation(domains)})(?::\d+)?(?:[/?#]|$)"
+
+
+def _extension_pattern(types):
+    extensions = [ext for t in types for ext in TYPE_EXTENSIONS.get(t, [])]
+    if not extensions:
+        return None
+    return rf"\.(?:{'|'.join(extensions)})(?:[?#]|$)"
+
+
+def build_deny_pattern(block_types=RESOURCE_BLOCK_TYPES, block_domains=RESOURCE_BLOCK_DOMAINS,
+                       allow_domains=RESOURCE_ALLOW_DOMAINS):
+    """One regex for every request the policy aborts, or None if nothing is blocked"""
+    parts = []
+    if block_domains:
+        parts.append(_host_pattern(block_domains))
+    if allow_domains:
+        parts.append(rf"^https?://(?!(?:[^/?#]*\.)?(?:{_domain_alternation(allow_domains)})(?::\d+)?(?:[/?#]|$))")
+    extension = _extension_pattern(block_types)
+    if extension:
+        parts.append(r"^[^?#]*" + extension)
+    if not parts:
+        return None
+    return re.compile("|".join(f"(?:{part})" for part in parts), re.IGNORECASE)
+
+
+def build_cache_pattern(hosts=ASSET_CACHE_HOSTS, block_types=RESOURCE_BLOCK_TYPES):
+    """Regex for static assets on `hosts` worth caching, or None"""
+    extension = _extension_pattern([t for t in CACHEABLE_TYPES if t not in block_types])
+    if not hosts or not extension:
+        return None
+    return re.compile(rf"(?=[^?#]*{extension}){_host_pattern(hosts)}", re.IGNORECASE)
+
+
+class AssetCache:
+    """Static responses on disk, keyed by URL, valid for `ttl` seconds"""
+
+    def __init__(self, path=ASSET_CACHE_DIR, ttl=ASSET_CACHE_TTL, max_item_bytes=ASSET_CACHE_MAX_ITEM_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_item_bytes = max_item_bytes
+        os.makedirs(path, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        base = os.path.join(self.path, key[:2], key)
+        return base + ".body", base + ".json"
+
+    def get(self, url):
+        """(headers, body) for a fresh entry, else None"""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if time.time() - meta["stored_at"] > self.ttl:
+                return None
+            with open(body_path, "rb") as f:
+                return meta["headers"], f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, url, status, headers, body):
+        if status != 200 or not body or len(body) > self.max_item_bytes:
+            return False
+        body_path, meta_path = self._paths(url)
+        kept = {name: value for name, value in headers.items() if name.lower() in CACHED_HEADERS}
+        try:
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            # Body first, metadata last: a half-written entry has no metadata and is a miss
+            for path, data, mode in ((body_path, body, "wb"),
+                                     (meta_path, json.dumps({"url": url, "stored_at": time.time(), "headers": kept}), "w")):
+                # A temp file per write, so scrapers caching the same asset don't share one
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+                try:
+                    with os.fdopen(fd, mode) as f:
+                        f.write(data)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+            return True
+        except OSError as e:
+            print(f"[ASSET CACHE] Could not store {url}: {e}")
+            return False
+
+    def prune(self):
+        """Delete expired entries; returns how many were removed"""
+        removed = 0
+        cutoff = time.time() - self.ttl
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                if name.endswith(".json") and os.path.getmtime(os.path.join(root, name)) < cutoff:
+                    for suffix in (".json", ".body"):
+                        try:
+                            os.remove(os.path.join(root, name[:-len(".json")] + suffix))
+                        except OSError:
+                            pass
+                    removed += 1
+        return removed
+
+
+class ResourcePolicy:
+    """Allow/deny rules and the asset cache, installed on a browser context.
+
+    install()/install_async() register two context routes: a deny regex
+    that aborts, and a cache regex served from AssetCache. Pages that are
+    never screenshotted (the listing) also get block_images().
+    """
+
+    def __init__(self, block_types=RESOURCE_BLOCK_TYPES, block_domains=RESOURCE_BLOCK_DOMAINS,
+                 allow_domains=RESOURCE_ALLOW_DOMAINS, cache_hosts=ASSET_CACHE_HOSTS, cache=None):
+        self.deny_pattern = build_deny_pattern(block_types, block_domains, allow_domains)
+        self.cache = cache
+        self.cache_pattern = build_cache_pattern(cache_hosts, block_types) if cache is not None else None
+        self.image_pattern = re.compile(r"^[^?#]*" + _extension_pattern(["image"]), re.IGNORECASE)
+
+    def _cached(self, url):
+        hit = self.cache.get(url)
+        metrics.count("asset_cache_hits" if hit else "asset_cache_misses")
+        return hit
+
+    def _store(self, url, response, body):
+        self.cache.put(url, response.status, response.headers, body)
+        metrics.count("asset_bytes_downloaded", len(body))
+
+    # Sync API (sequential scraper)
+
+    def install(self, context):
+        if self.cache_pattern is not None:
+            context.route(self.cache_pattern, self._serve_cached)
+        if self.deny_pattern is not None:
+            context.route(self.deny_pattern, _abort)
+
+    def block_images(self, page):
+        page.route(self.image_pattern, _abort)
+
+    def _serve_cached(self, route):
+        url = route.request.url
+        hit = self._cached(url)
+        if hit:
+            headers, body = hit
+            route.fulfill(status=200, headers=headers, body=body)
+            return
+        try:
+            response = route.fetch()
+            body = response.body()
+        except Exception:
+            route.continue_()
+            return
+        self._store(url, response, body)
+        route.fulfill(status=response.status, headers=_replay_headers(response.headers), body=body)
+
+    # Async API (concurrent scraper, daemon, backfill)
+
+    async def install_async(self, context):
+        if self.cache_pattern is not None:
+            await context.route(self.cache_pattern, self._serve_cached_async)
+        if self.deny_pattern is not None:
+            await context.route(self.deny_pattern, _abort_async)
+
+    async def block_images_async(self, page):
+        await page.route(self.image_pattern, _abort_async)
+
+    async def _serve_cached_async(self, route):
+        url = route.request.url
+        hit = self._cached(url)
+        if hit:
+            headers, body = hit
+            await route.fulfill(status=200, headers=headers, body=body)
+            return
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            await route.continue_()
+            return
+        self._store(url, response, body)
+        await route.fulfill(status=response.status, headers=_replay_headers(response.headers), body=body)
+
+
+def _replay_headers(headers):
+    # The body handed back is already decoded, so its encoding/length headers no longer apply
+    return {name: value for name, value in headers.items()
+            if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+
+
+def _abort(route):
+    metrics.count("requests_blocked")
+    route.abort()
+
+
+async def _abort_async(route):
+    metrics.count("requests_blocked")
+    await route.abort()
+
+
+def default_policy():
+    """Policy from the RESOURCE_*/ASSET_CACHE_* environment settings"""
+    cache = None
+    if ASSET_CACHE:
+        try:
+            cache = AssetCache()
+            removed = cache.prune()
+            if removed:
+                print(f"[ASSET CACHE] Pruned {removed} expired entries")
+        except OSError as e:
+            print(f"[ASSET CACHE] Disabled, {ASSET_CACHE_DIR} not usable: {e}")
+    return ResourcePolicy(cache=cache)
@@ -1,56 +1,299 @@
 import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
 import requests
+from requests.adapters import HTTPAdapter
+import metrics
+import extractive
+from summary_cache import cache_key, get_summary_cache
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
 MODEL = "llama-3.1-8b-instant"  # ✅ guaranteed
 
-def summarize_text(title: str, subject: str, description: str | None = None) -> str | None:
-    if not GROQ_API_KEY:
-        print("[SUMMARY] GROQ_API_KEY not set")
-        return None
+SYSTEM_PROMPT = "You are a financial compliance summarizer. Write concise, factual summaries."
+USER_PROMPT = (
+    "Summarize the following BSE corporate announcement in 2–3 professional sentences. "
+    "Focus only on material investor-relevant information.\n\n"
+)
+MAX_TOKENS = 200
 
-    text = f"{title}. {subject}. {description or ''}".strip()
+# Groq account limits for MODEL; every request goes through one shared limiter
+GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = int(os.getenv("GROQ_TPM", "6000"))
+GROQ_CONCURRENCY = int(os.getenv("GROQ_CONCURRENCY", "4"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "4"))
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "15"))
 
-    if len(text) < 50:
-        return subject or title
 
+class TokenBucket:
+    """Refills `capacity` units evenly over `per_seconds`"""
+
+    def __init__(self, capacity, per_seconds=60.0, clock=time.monotonic):
+        self.capacity = float(max(1, capacity))
+        self.rate = self.capacity / per_seconds
+        self.level = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` units are available (oversized requests wait for a full bucket)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def consume(self, amount):
+        self._refill()
+        self.level -= amount
+
+
+class GroqRateLimiter:
+    """Request and token buckets for Groq's RPM/TPM limits, plus a shared
+    pause that a 429's Retry-After applies to every caller."""
+
+    def __init__(self, rpm=GROQ_RPM, tpm=GROQ_TPM, clock=time.monotonic, sleep=time.sleep):
+        self.requests = TokenBucket(rpm, clock=clock)
+        self.tokens = TokenBucket(tpm, clock=clock)
+        self.clock = clock
+        self.sleep = sleep
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, estimated_tokens):
+        while True:
+            with self._lock:
+                wait = max(
+                    self.paused_until - self.clock(),
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(estimated_tokens),
+                )
+                if wait <= 0:
+                    self.requests.consume(1)
+                    self.tokens.consume(estimated_tokens)
+                    return
+            self.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """Correct the token bucket once the real usage is known"""
+        with self._lock:
+            self.tokens.consume(actual_tokens - estimated_tokens)
+
+
+_limiter = GroqRateLimiter()
+_session = None
+
+
+def get_groq_session():
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, GROQ_CONCURRENCY))
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
+
+def _retry_after_seconds(resp, default):
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return default
+
+
+def _build_text(title, subject, description, pdf_text=None):
+    """Prompt text; the description and PDF text are cut to SUMMARY_INPUT_TOKENS by sentence ranking"""
+    body = extractive.condense(title, description or "", pdf_text or "")
+    return f"{title}. {subject}. {body}".strip()
+
+
+def offline_summary(title, subject, description=None, pdf_text=None):
+    """Extractive summary, used when Groq is not configured or fails"""
+    metrics.count("summary_extractive")
+    return extractive.summarize(title or subject, description or subject or "", pdf_text or "")
+
+
+def _request_summary(text):
+    """POST one summary request through the limiter, retrying 429/5xx/timeouts.
+
+    Returns the summary, or None once retries are exhausted.
+    """
     payload = {
         "model": MODEL,
         "messages": [
             {
                 "role": "system",
-                "content": "You are a financial compliance summarizer. Write concise, factual summaries."
+                "content": SYSTEM_PROMPT
             },
             {
                 "role": "user",
-                "content": (
-                    "Summarize the following BSE corporate announcement in 2–3 professional sentences. "
-                    "Focus only on material investor-relevant information.\n\n"
-                    f"{text}"
-                )
+                "content": USER_PROMPT + text
             }
         ],
         "temperature": 0.2,
-        "max_tokens": 200
+        "max_tokens": MAX_TOKENS
     }
+    # ~4 characters per token for the prompt, plus the completion budget
+    estimated_tokens = (len(SYSTEM_PROMPT) + len(USER_PROMPT) + len(text)) // 4 + MAX_TOKENS
 
-    try:
-        resp = requests.post(
-            GROQ_URL,
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=15,
-        )
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        backoff = 2 ** attempt
+        _limiter.acquire(estimated_tokens)
+        try:
+            with metrics.stage("groq_request"):
+                resp = get_groq_session().post(
+                    GROQ_URL,
+                    headers={
+                        "Authorization": f"Bearer {GROQ_API_KEY}",
+                        "Content-Type": "application/json",
+                    },
+                    json=payload,
+                    timeout=GROQ_TIMEOUT,
+                )
+
+            if resp.status_code == 429 or resp.status_code >= 500:
+                metrics.retry("groq_request")
+                wait = _retry_after_seconds(resp, backoff)
+                print(f"[SUMMARY] Groq returned {resp.status_code}, retrying in {wait:.1f}s")
+                if resp.status_code == 429:
+                    _limiter.pause(wait)
+                else:
+                    time.sleep(wait)
+                continue
+
+            resp.raise_for_status()
+            body = resp.json()
+            usage = body.get("usage") or {}
+            if "total_tokens" in usage:
+                _limiter.record_usage(estimated_tokens, usage["total_tokens"])
+            metrics.count("groq_prompt_tokens", usage.get("prompt_tokens", 0))
+            metrics.count("groq_completion_tokens", usage.get("completion_tokens", 0))
+            return body["choices"][0]["message"]["content"].strip()
+
+        except (requests.Timeout, requests.ConnectionError) as e:
+            metrics.retry("groq_request")
+            print(f"[SUMMARY] Groq {type(e).__name__}, retrying in {backoff}s")
+            time.sleep(backoff)
+
+        except Exception as e:
+            print("[SUMMARY] Groq failed:", e)
+            return None
+
+    print(f"[SUMMARY] Groq gave up after {GROQ_MAX_RETRIES + 1} attempts")
+    return None
+
+
+class SummaryError(Exception):
+    """Groq could not produce a summary (raised only when asked to)"""
+
+
+def summarize_text(title: str, subject: str, description: str | None = None,
+                   raise_on_failure: bool = False, pdf_text: str | None = None) -> str | None:
+    if not GROQ_API_KEY:
+        print("[SUMMARY] GROQ_API_KEY not set, using extractive summary")
+        return offline_summary(title, subject, description, pdf_text)
 
-        resp.raise_for_status()
-        summary = resp.json()["choices"][0]["message"]["content"].strip()
-        print("   [SUMMARY] Generated via Groq")
-        return summary
+    text = _build_text(title, subject, description, pdf_text)
 
-    except Exception as e:
-        print("[SUMMARY] Groq failed:", e)
+    if len(text) < 50:
         return subject or title
+
+    # Retries and re-scrapes of the same announcement are served from disk
+    cache = get_summary_cache()
+    key = cache_key(MODEL, SYSTEM_PROMPT, USER_PROMPT, text)
+    if cache is not None:
+        try:
+            cached = cache.get(key)
+        except Exception as e:
+            print(f"   [SUMMARY] Cache read failed ({type(e).__name__}: {e}), asking Groq")
+            cached = None
+        if cached is not None:
+            metrics.count("summary_cache_hits")
+            print("   [SUMMARY] Served from cache")
+            return cached
+
+    summary = _request_summary(text)
+    if summary is None:
+        if raise_on_failure:
+            raise SummaryError("Groq request failed")
+        return offline_summary(title, subject, description, pdf_text)
+
+    print("   [SUMMARY] Generated via Groq")
+    if cache is not None:
+        # A cache that can't be written to must not cost the summary already paid for
+        try:
+            cache.put(key, summary)
+        except Exception as e:
+            print(f"   [SUMMARY] Cache write failed ({type(e).__name__}: {e})")
+    return summary
+
+
+def summarize_many(items, concurrency: int = GROQ_CONCURRENCY) -> list[str | None]:
+    """Summarize (title, subject, description[, pdf_text]) tuples concurrently, results in input order.
+
+    Requests share the RPM/TPM limiter and pooled connection; cached and
+    duplicate inputs are only sent once.
+    """
+    items = [tuple(item) + (None,) * (4 - len(item)) for item in items]
+    if not GROQ_API_KEY:
+        print("[SUMMARY] GROQ_API_KEY not set, using extractive summaries")
+        return [offline_summary(*item) for item in items]
+
+    cache = get_summary_cache()
+    results = [None] * len(items)
+    to_send = {}  # cache key -> (text, [indices])
+
+    for idx, (title, subject, description, pdf_text) in enumerate(items):
+        text = _build_text(title, subject, description, pdf_text)
+        if len(text) < 50:
+            results[idx] = subject or title
+            continue
+        key = cache_key(MODEL, SYSTEM_PROMPT, USER_PROMPT, text)
+        cached = None
+        if cache is not None and key not in to_send:
+            try:
+                cached = cache.get(key)
+            except Exception as e:
+                print(f"   [SUMMARY] Cache read failed ({type(e).__name__}: {e}), asking Groq")
+        if cached is not None:
+            metrics.count("summary_cache_hits")
+            results[idx] = cached
+            continue
+        to_send.setdefault(key, (text, []))[1].append(idx)
+
+    if to_send:
+        keys = list(to_send)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            summaries = list(pool.map(lambda k: _request_summary(to_send[k][0]), keys))
+
+        for key, summary in zip(keys, summaries):
+            if summary is not None and cache is not None:
+                try:
+                    cache.put(key, summary)
+                except Exception as e:
+                    print(f"   [SUMMARY] Cache write failed ({type(e).__name__}: {e})")
+            for idx in to_send[key][1]:
+                results[idx] = summary if summary is not None else offline_summary(*items[idx])
+
+        generated = sum(1 for s in summaries if s is not None)
+        print(f"   [SUMMARY] Batch: {generated}/{len(keys)} generated via Groq, "
+              f"{len(items) - sum(len(v[1]) for v in to_send.values())} cached or short")
+
+    return results
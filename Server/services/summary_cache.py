@@ -0,0 +1,109 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE", "true").lower() != "false"
+SUMMARY_CACHE_PATH = os.getenv(
+    "SUMMARY_CACHE_PATH", os.path.join(os.path.dirname(__file__), "summary_cache.sqlite3")
+)
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", str(7 * 24 * 3600)))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "5000"))
+
+
+def cache_key(*parts):
+    """Stable hash of the model, prompt and input text"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """On-disk summary cache with TTL expiry and size-bounded LRU eviction.
+
+    Safe to share between threads; counts hits, misses and evictions.
+    """
+
+    def __init__(self, path=SUMMARY_CACHE_PATH, ttl=SUMMARY_CACHE_TTL,
+                 max_entries=SUMMARY_CACHE_MAX_ENTRIES, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = self.clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, created_at FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            summary, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return summary
+
+    def put(self, key, summary):
+        now = self.clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, summary, now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()
+            if count > self.max_entries:
+                cur = self._conn.execute(
+                    "DELETE FROM summaries WHERE key IN "
+                    "(SELECT key FROM summaries ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                self.evictions += cur.rowcount
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+
+
+def get_summary_cache():
+    """Process-wide cache, or None when SUMMARY_CACHE=false"""
+    global _cache
+    if not SUMMARY_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = SummaryCache()
+    return _cache
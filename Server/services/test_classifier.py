@@ -0,0 +1,98 @@
+import classifier
+from classifier import KeywordClassifier, classify
+
+
+def test_priority_order_matches_rule_order():
+    # "results" and "board meeting" both present: board_meeting is the earlier rule
+    assert classify("Board Meeting Intimation", "to consider quarterly results") == "board_meeting"
+    assert classify("Outcome of AGM", "") == "agm_egm"
+    assert classify("Record date for dividend", None) == "corp_action"
+    assert classify("Newspaper Publication", "copy of advertisement") == "other"
+
+
+def test_compiled_matcher_agrees_with_rule_scan():
+    result = classifier.benchmark(samples=500, repeat=1)
+    assert result["mismatches"] == 0
+
+
+def test_fallback_without_automaton(monkeypatch):
+    monkeypatch.setattr(classifier, "HAS_AHOCORASICK", False)
+    fallback = KeywordClassifier()
+    assert fallback._automaton is None
+    assert fallback.classify_text("intimation of trading window closure") == "integrated_filing"
+
+
+class FakeCursor:
+    def __init__(self, rows=(), executed=None):
+        self.rows = list(rows)
+        self.executed = executed if executed is not None else []
+        self.itersize = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+class FakeConn:
+    def __init__(self, rows=()):
+        self.rows = rows
+        self.executed = []
+
+    def cursor(self, name=None):
+        return FakeCursor(self.rows, self.executed)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+ROWS = [
+    ("a", "Board Meeting Intimation", "results"),       # title decides: changes
+    ("b", "Newspaper Publication", "results"),          # title says nothing: kept
+    ("c", "Outcome of AGM", "agm_egm"),                 # unchanged
+]
+
+
+def test_reclassify_only_trusts_the_title_and_defaults_to_dry_run(monkeypatch):
+    writes = []
+    monkeypatch.setattr("psycopg2.extras.execute_values",
+                        lambda cur, sql, rows, page_size=None: writes.extend(rows))
+    write_conn = FakeConn()
+
+    result = classifier.reclassify(FakeConn(ROWS), write_conn, batch_size=2)
+
+    assert result["changed"] == 1
+    assert result["kept"] == 1
+    assert result["moves"] == {("results", "board_meeting"): 1}
+    assert writes == []
+
+    classifier.reclassify(FakeConn(ROWS), write_conn, batch_size=2, dry_run=False)
+    assert writes == [("a", "board_meeting")]
+
+
+def test_reclassify_never_demotes_a_higher_priority_category(monkeypatch):
+    writes = []
+    monkeypatch.setattr("psycopg2.extras.execute_values",
+                        lambda cur, sql, rows, page_size=None: writes.extend(rows))
+    rows = [
+        ("a", "Dividend update", "results"),            # corp_action ranks below results: kept
+        ("b", "Dividend update", "other"),              # anything beats other
+        ("c", "Record Date for Dividend", None),        # unknown stored category
+        ("d", "Dividend update", "retired_category"),   # no longer a rule
+    ]
+
+    result = classifier.reclassify(FakeConn(rows), FakeConn(), dry_run=False)
+
+    assert writes == [("b", "corp_action"), ("c", "corp_action"), ("d", "corp_action")]
+    assert (result["changed"], result["kept"]) == (3, 1)
@@ -0,0 +1,69 @@
+import db
+
+
+class FakeCursor:
+    """Answers ensure_schema's version queries from `state` and records the rest"""
+
+    def __init__(self, state):
+        self.state = state
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.state["executed"].append(sql)
+        if "to_regclass" in sql:
+            self.result = (self.state["version"] is not None,)
+        elif "MAX(version)" in sql:
+            self.result = (self.state["version"] or 0,)
+        elif sql.startswith("INSERT INTO schema_version"):
+            self.state["version"] = params[0]
+
+    def fetchone(self):
+        return self.result
+
+
+class FakeConn:
+    def __init__(self, version=None):
+        self.state = {"version": version, "executed": []}
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self.state)
+
+    def commit(self):
+        self.commits += 1
+
+
+def ddl(conn):
+    return [sql for sql in conn.state["executed"] if sql in db.SCHEMA_UPGRADES]
+
+
+def test_upgrades_run_once_then_only_the_version_is_read(monkeypatch):
+    conn = FakeConn()
+    monkeypatch.setattr(db, "_schema_ready", False)
+    db.ensure_schema(conn)
+
+    assert ddl(conn) == db.SCHEMA_UPGRADES
+    assert conn.state["version"] == len(db.SCHEMA_UPGRADES)
+
+    # A new process against the upgraded database runs no DDL
+    conn.state["executed"].clear()
+    monkeypatch.setattr(db, "_schema_ready", False)
+    db.ensure_schema(conn)
+
+    assert ddl(conn) == []
+    assert not any("advisory" in sql for sql in conn.state["executed"])
+
+
+def test_only_new_upgrades_run(monkeypatch):
+    conn = FakeConn(version=len(db.SCHEMA_UPGRADES) - 2)
+    monkeypatch.setattr(db, "_schema_ready", False)
+    db.ensure_schema(conn)
+
+    assert ddl(conn) == db.SCHEMA_UPGRADES[-2:]
+    assert conn.state["version"] == len(db.SCHEMA_UPGRADES)
@@ -0,0 +1,47 @@
+from dedupe import FingerprintIndex, hamming, number_signature, simhash, text_fingerprint
+
+DESCRIPTION = ("The Board of Directors at its meeting held on 12/03/2025 approved raising of funds "
+               "up to Rs 500 crore via bonds")
+
+
+def test_simhash_is_close_for_revisions_and_far_for_other_filings():
+    base = simhash(DESCRIPTION)
+    revised = simhash(DESCRIPTION.replace("approved", "has approved"))
+    other = simhash("The Board of Directors at its meeting held on 12/03/2025 approved the appointment "
+                    "of an additional director")
+    assert -(1 << 63) <= base < (1 << 63)
+    assert hamming(base, revised) <= 10 < hamming(base, other)
+    assert simhash("Board meeting") is None
+
+
+def test_number_signature_keeps_figures():
+    assert number_signature("Rs 500 crore on 12/03/2025, record date 12/03/2025") == "12/03/2025 500"
+
+
+def test_index_matches_pdf_and_same_company_text():
+    index = FingerprintIndex(max_distance=10)
+    fingerprint, numbers = text_fingerprint("Outcome", DESCRIPTION)
+    index.add({"id": "a", "company_code": "500180", "summary": "s", "screenshot_url": "{}",
+               "pdf_sha256": "abc", "text_simhash": fingerprint, "text_numbers": numbers})
+
+    assert index.match_pdf("abc")["id"] == "a"
+    assert index.match_pdf("def") is None
+
+    revised, revised_numbers = text_fingerprint("Outcome", DESCRIPTION.replace("approved", "has approved"))
+    assert index.match_text("500180", revised, revised_numbers)["id"] == "a"
+    assert index.match_text("532174", revised, revised_numbers) is None
+
+    changed, changed_numbers = text_fingerprint("Outcome", DESCRIPTION.replace("500", "600"))
+    assert index.match_text("500180", changed, changed_numbers) is None
+
+
+def test_index_keeps_only_the_newest_entries():
+    index = FingerprintIndex(max_distance=10, max_per_company=2, max_pdfs=2)
+    fingerprint, numbers = text_fingerprint("Outcome", DESCRIPTION)
+    for newsid in ("a", "b", "c"):
+        index.add({"id": newsid, "company_code": "500180", "summary": "s", "screenshot_url": "{}",
+                   "pdf_sha256": f"sha-{newsid}", "text_simhash": fingerprint, "text_numbers": numbers})
+
+    assert index.match_pdf("sha-a") is None
+    assert index.match_pdf("sha-c")["id"] == "c"
+    assert [entry["id"] for entry in index._by_company["500180"]] == ["b", "c"]
@@ -0,0 +1,58 @@
+import os
+from string import Template
+
+from detail_parser import parse_detail_html
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "bench_fixtures", "detail.html")
+
+
+def detail_html(**overrides):
+    with open(FIXTURE) as f:
+        template = Template(f.read())
+    values = {
+        "newsid": "a1b2c3d4-0001",
+        "company": "HDFC Bank Ltd",
+        "code": "500180",
+        "slug": "hdfc-bank-ltd",
+        "title": "Outcome of Board Meeting",
+        "description": "The board approved the audited results.\nDividend of Rs. 19 per share recommended.",
+        "received": "01-10-2026 18:15:42",
+        "disseminated": "01-10-2026 18:15:47",
+    }
+    values.update(overrides)
+    return template.substitute(values)
+
+
+def test_parses_detail_page_fields():
+    fields = parse_detail_html(detail_html())
+
+    assert fields["company"] == "HDFC Bank Ltd"
+    assert fields["security_code"] == "500180"
+    assert fields["title"] == "Outcome of Board Meeting"
+    assert fields["description"] == ("The board approved the audited results.\n"
+                                     "Dividend of Rs. 19 per share recommended.")
+    assert fields["pdf_href"] == "/xml-data/corpfiling/AttachLive/a1b2c3d4-0001.pdf"
+    assert fields["time_text"] == ("Exchange Received Time 01-10-2026 18:15:42 "
+                                   "Exchange Disseminated Time 01-10-2026 18:15:47")
+
+
+def test_page_without_pdf_link_has_no_pdf_href():
+    html = detail_html().replace('class="tablebluelink" href="/xml-data/corpfiling/AttachLive/a1b2c3d4-0001.pdf"',
+                                 'class="tablebluelink" href="#"')
+    fields = parse_detail_html(html)
+
+    assert fields is not None
+    assert fields["pdf_href"] is None
+    assert fields["title"] == "Outcome of Board Meeting"
+
+
+def test_unrecognised_markup_returns_none():
+    html = detail_html().replace('id="ContentPlaceHolder1_tdCompNm"', 'id="somethingElse"')
+
+    assert parse_detail_html(html) is None
+
+
+def test_entities_and_scripts_do_not_leak_into_text():
+    fields = parse_detail_html(detail_html(title="Q1 Results &amp; Dividend<script>track()</script>"))
+
+    assert fields["title"] == "Q1 Results & Dividend"
@@ -0,0 +1,50 @@
+import extractive
+import summarizer
+
+DESCRIPTION = "The bank has informed the exchange that CRISIL reaffirmed its credit rating."
+PDF_TEXT = """To, BSE Limited, Phiroze Jeejeebhoy Towers, Dalal Street, Mumbai.
+
+Dear Sir/Madam,
+Pursuant to Regulation 30 of the SEBI (Listing Obligations and Disclosure
+Requirements) Regulations, 2015, we hereby inform you of the following.
+CRISIL has reaffirmed the long-term credit rating of the bank at CRISIL AA+/Stable.
+Deposits increased 12.3% to Rs. 2.84 lakh crore as on March 31, 2025.
+The rating reflects the bank's strong deposit franchise and healthy capitalisation.
+
+Kindly take the same on record.
+Thanking you, Yours faithfully, Company Secretary."""
+
+
+def test_split_sentences_joins_lines_and_keeps_abbreviations():
+    sentences = extractive.split_sentences(PDF_TEXT)
+
+    assert "Deposits increased 12.3% to Rs. 2.84 lakh crore as on March 31, 2025." in sentences
+    assert any(s.startswith("Dear Sir/Madam, Pursuant to Regulation 30") and s.endswith("following.")
+               for s in sentences)
+
+
+def test_summary_prefers_material_sentences_over_boilerplate():
+    summary = extractive.summarize("Credit Rating", DESCRIPTION, PDF_TEXT, max_sentences=3)
+
+    assert summary.startswith(DESCRIPTION)
+    assert "reaffirmed the long-term credit rating" in summary
+    assert "Kindly take the same on record" not in summary
+    assert "Yours faithfully" not in summary
+
+
+def test_condense_fits_the_token_budget_in_document_order():
+    condensed = extractive.condense("Credit Rating", DESCRIPTION, PDF_TEXT * 5, token_budget=60)
+
+    assert extractive.estimate_tokens(condensed) <= 60
+    assert condensed.startswith(DESCRIPTION)
+    # Short text is passed through untouched
+    assert extractive.condense("Credit Rating", DESCRIPTION, "", token_budget=60) == DESCRIPTION
+
+
+def test_summarize_text_without_groq_falls_back_to_extractive(monkeypatch):
+    monkeypatch.setattr(summarizer, "GROQ_API_KEY", None)
+
+    summary = summarizer.summarize_text("Credit Rating", "Credit Rating", DESCRIPTION, pdf_text=PDF_TEXT)
+
+    assert summary.startswith(DESCRIPTION)
+    assert "CRISIL AA+/Stable" in summary
@@ -0,0 +1,56 @@
+from datetime import datetime, date
+
+import fanout
+from fanout import SubscriberIndex, plan
+
+NOW = datetime(2026, 10, 15, 23, 0, tzinfo=fanout.DIGEST_TIMEZONE)  # a Thursday
+
+
+def make_index():
+    index = SubscriberIndex()
+    index.add(1, ["500180"], None, "instant")                       # one company, any category
+    index.add(2, ["HDFC Bank Ltd"], ["Results"], "daily")           # company name + category
+    index.add(3, None, ["board_meeting"], "weekly")                 # category only
+    index.add(4, None, None, None)                                  # everything, default digest
+    index.add(5, ["532174", "500180"], ["results", "agm_egm"], "hourly")
+    return index
+
+
+def test_match_reads_only_matching_subscribers():
+    index = make_index()
+    hdfc = fanout.company_keys("500180", "HDFC Bank Ltd")
+
+    assert index.match(hdfc, "results") == {1, 2, 4, 5}
+    assert index.match(hdfc, "board_meeting") == {1, 3, 4}
+    assert index.match(fanout.company_keys("532174", "ICICI Bank"), "agm_egm") == {4, 5}
+    assert index.match(fanout.company_keys("500247", "Kotak"), "other") == {4}
+
+
+def test_unknown_digest_mode_falls_back_to_daily():
+    index = make_index()
+
+    assert index.modes[4] == "daily"
+    assert index.modes[5] == "daily"
+
+
+def test_plan_splits_instant_deliveries_from_digests():
+    announcements = [
+        ("a1", "500180", "HDFC Bank Ltd", "results"),
+        ("a2", "500180", "HDFC Bank Ltd", "board_meeting"),
+    ]
+    deliveries, digests = plan(make_index(), announcements, NOW)
+
+    assert sorted(deliveries) == [(1, "a1"), (1, "a2")]
+    assert digests == {
+        (2, "daily", date(2026, 10, 15)): ["a1"],
+        (4, "daily", date(2026, 10, 15)): ["a1", "a2"],
+        (5, "daily", date(2026, 10, 15)): ["a1"],
+        (3, "weekly", date(2026, 10, 12)): ["a2"],
+    }
+
+
+def test_periods_follow_ist():
+    utc_evening = datetime.fromisoformat("2026-10-18T20:00:00+00:00")  # Monday 01:30 IST
+
+    assert fanout.period_start("daily", utc_evening) == date(2026, 10, 19)
+    assert fanout.period_start("weekly", utc_evening) == date(2026, 10, 19)
@@ -0,0 +1,225 @@
+import asyncio
+
+import finalscraper
+
+
+def test_duplicates_in_one_batch_get_the_original_pdf_text():
+    rows = [
+        {"id": "a", "pdf_text": "Outcome of board meeting", "duplicate_of": None},
+        {"id": "b", "pdf_text": None, "duplicate_of": "a"},
+        {"id": "c", "pdf_text": None, "duplicate_of": "b"},
+        {"id": "d", "pdf_text": None, "duplicate_of": "stored-earlier"},
+    ]
+    finalscraper.resolve_batch_duplicates(rows)
+
+    assert [row["pdf_text"] for row in rows] == ["Outcome of board meeting"] * 3 + [None]
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((" ".join(sql.split()), params))
+
+    def fetchall(self):
+        return self.conn.rows
+
+
+class FakeConn:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+
+class FakeBatch:
+    def __init__(self, inserted):
+        self.inserted = inserted
+
+
+def test_backfill_page_checkpoint_records_failed_newsids(monkeypatch):
+    pages = {1: ["n1", "n2", "n3"], 2: []}
+
+    async def fetch_page(limiter, company_code, window_start, window_end, page_no):
+        return pages[page_no]
+
+    async def scrape(contexts, conn, limiter, newsids, index_name, concurrency, label):
+        return FakeBatch(len(newsids) - 1), ["n3"]
+
+    monkeypatch.setattr(finalscraper, "fetch_archive_page_async", fetch_page)
+    monkeypatch.setattr(finalscraper, "existing_announcement_ids", lambda conn, newsids: {"n1"})
+    monkeypatch.setattr(finalscraper, "scrape_backfill_newsids_async", scrape)
+    conn = FakeConn()
+
+    totals = asyncio.run(finalscraper.backfill_unit_async(
+        None, conn, None, "job", ("500325", "2024-01-01", "2024-01-31", 1), "SENSEX", 2))
+
+    assert totals == {"seen": 3, "inserted": 1, "errors": 1}
+    checkpoints = [params for sql, params in conn.executed if sql.startswith("UPDATE backfill_checkpoints")]
+    # (next_page, done, seen, inserted, failed, job, company_code, window_start)
+    assert checkpoints[0] == (2, False, 3, 1, ["n3"], "job", "500325", "2024-01-01")
+    assert checkpoints[1][:2] == (2, True)
+
+
+def test_backfill_retry_pass_clears_only_recovered_newsids(monkeypatch):
+    async def scrape(contexts, conn, limiter, newsids, index_name, concurrency, label):
+        assert newsids == ["n2", "n3"]
+        return FakeBatch(1), ["n3"]
+
+    monkeypatch.setattr(finalscraper, "existing_announcement_ids", lambda conn, newsids: {"n1"})
+    monkeypatch.setattr(finalscraper, "scrape_backfill_newsids_async", scrape)
+    conn = FakeConn(rows=[("500325", "2024-01-01", ["n1", "n2", "n3"])])
+
+    recovered = asyncio.run(finalscraper.retry_backfill_failures_async(None, conn, None, "job", "SENSEX", 2))
+
+    assert recovered == 2
+    cleared = [params for sql, params in conn.executed if "EXCEPT" in sql]
+    assert cleared == [(["n1", "n2"], "job", "500325", "2024-01-01")]
+
+
+def test_host_limiter_caps_navigations_per_host():
+    limiter = finalscraper.HostLimiter(max_per_host=2, min_interval=0.0)
+    in_flight = {}
+    peak = {}
+
+    async def navigate(url):
+        host = url.split("/")[2]
+        async with limiter.slot(url):
+            in_flight[host] = in_flight.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), in_flight[host])
+            await asyncio.sleep(0.01)
+            in_flight[host] -= 1
+
+    async def main():
+        for url in ("https://www.bseindia.com/", "https://api.bseindia.com/"):
+            limiter.pacer(url).interval = 0.0
+        await asyncio.gather(*(navigate(f"https://www.bseindia.com/{i}") for i in range(6)),
+                             *(navigate(f"https://api.bseindia.com/{i}") for i in range(6)))
+
+    asyncio.run(main())
+
+    assert peak == {"www.bseindia.com": 2, "api.bseindia.com": 2}
+    assert limiter.pacer("https://www.bseindia.com/x") is limiter.pacer("https://www.bseindia.com/y")
+    assert limiter.pacer("https://www.bseindia.com/x").floor == 0.0
+
+
+def test_host_limiter_never_paces_below_min_interval():
+    pacer = finalscraper.HostLimiter(max_per_host=4, min_interval=1.5).pacer("https://www.bseindia.com/")
+    for _ in range(50):
+        pacer.success(0.1)
+
+    assert pacer.interval == 1.5
+
+
+def make_daemon(monkeypatch, run_scrape, unchanged=False):
+    daemon = finalscraper.ScraperDaemon(playwright=None, concurrency=2)
+    recycled = []
+
+    async def recycle():
+        recycled.append(True)
+
+    monkeypatch.setattr(finalscraper, "ensure_db", lambda conn: conn or FakeConn())
+    monkeypatch.setattr(finalscraper, "listing_unchanged", lambda conn: unchanged)
+    monkeypatch.setattr(finalscraper, "run_scrape_async", run_scrape)
+    monkeypatch.setattr(daemon, "recycle", recycle)
+    return daemon, recycled
+
+
+def test_daemon_answers_ping_and_rejects_unknown_commands(monkeypatch):
+    daemon, _ = make_daemon(monkeypatch, run_scrape=None)
+
+    assert asyncio.run(daemon.handle("ping\n")) == {"status": "pong", "runs": 0}
+    assert asyncio.run(daemon.handle("reboot"))["status"] == "error"
+
+
+def test_daemon_scrape_returns_result_and_recycles_after_a_failure(monkeypatch):
+    outcomes = [{"status": "ok", "found": 3, "new": 1, "inserted": 1}, RuntimeError("browser crashed")]
+
+    async def run_scrape(contexts, conn, limiter, concurrency):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return dict(outcome)
+
+    daemon, recycled = make_daemon(monkeypatch, run_scrape)
+
+    first = asyncio.run(daemon.handle(""))
+    second = asyncio.run(daemon.handle("scrape"))
+
+    assert (first["status"], first["inserted"], first["run"]) == ("ok", 1, 1)
+    assert (second["status"], second["error"], second["run"]) == ("error", "RuntimeError: browser crashed", 2)
+    assert recycled == [True]
+
+
+def test_daemon_skips_the_browser_when_the_listing_is_unchanged(monkeypatch):
+    async def run_scrape(*args):
+        raise AssertionError("scraped an unchanged listing")
+
+    daemon, _ = make_daemon(monkeypatch, run_scrape, unchanged=True)
+    result = asyncio.run(daemon.handle("scrape"))
+
+    assert (result["status"], result["new"], result["run"]) == ("unchanged", 0, 1)
+
+
+def test_listings_from_several_indices_merge_into_one_tag_list():
+    tags_by_id = finalscraper.merge_listings([
+        ("BANKEX", ["n1", "n2"]),
+        ("SENSEX", ["n2", "n3", "n2"]),
+    ])
+
+    assert tags_by_id == {"n1": ["BANKEX"], "n2": ["BANKEX", "SENSEX"], "n3": ["SENSEX"]}
+    row = finalscraper.tag_indices({}, tags_by_id["n2"])
+    assert (row["index_name"], row["indices"]) == ("BANKEX", ["BANKEX", "SENSEX"])
+
+
+def test_index_tags_of_stored_announcements_merge_in_one_update(monkeypatch):
+    calls = []
+
+    def fake_execute_values(cur, sql, rows, template=None, page_size=None):
+        calls.append((" ".join(sql.split()), rows, template))
+        cur.rowcount = 1
+
+    monkeypatch.setattr(finalscraper, "execute_values", fake_execute_values)
+    conn = FakeConn()
+
+    assert finalscraper.merge_index_tags(conn, {}) == 0
+    assert finalscraper.merge_index_tags(conn, {"n2": ["BANKEX", "SENSEX"]}) == 1
+    [(sql, rows, template)] = calls
+    assert sql.startswith("UPDATE announcements AS a SET indices = ARRAY(")
+    assert rows == [("n2", ["BANKEX", "SENSEX"])]
+    assert template == "(%s, %s::TEXT[])"
+
+
+def test_deferred_summaries_are_requested_as_one_batch(monkeypatch):
+    batches = []
+
+    def fake_summarize_many(items):
+        batches.append(items)
+        return [f"summary of {title}" for title, *_ in items]
+
+    monkeypatch.setattr(finalscraper, "summarize_many", fake_summarize_many)
+    monkeypatch.setattr(finalscraper, "_fingerprints", None)
+    rows = [
+        {"id": "a", "summary": None, "summary_input": ("Board Meeting", "Board to meet", "x" * 10)},
+        {"id": "b", "summary": "reused from a duplicate"},
+        {"id": "c", "summary": None, "summary_input": ("Dividend", "Interim dividend", "")},
+    ]
+    finalscraper.summarize_rows(rows)
+
+    assert [row["summary"] for row in rows] == ["summary of Board Meeting", "reused from a duplicate",
+                                                 "summary of Dividend"]
+    assert len(batches) == 1
+    assert [item[0] for item in batches[0]] == ["Board Meeting", "Dividend"]
+    assert all("summary_input" not in row for row in rows)
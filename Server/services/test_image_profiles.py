@@ -0,0 +1,48 @@
+import io
+
+import pytest
+
+import image_profiles
+from image_profiles import IMAGE_PROFILES, extension, finish_screenshot, get_profile, pdf_page_zoom, screenshot_options
+
+
+def test_unknown_profile_falls_back_to_original():
+    assert get_profile("tiny") is IMAGE_PROFILES["original"]
+
+
+def test_webp_degrades_to_jpeg_without_pillow(monkeypatch):
+    monkeypatch.setattr(image_profiles, "HAS_PIL", False)
+    profile = get_profile("compact")
+
+    assert profile["format"] == "jpeg"
+    assert extension(profile) == "jpg"
+    assert IMAGE_PROFILES["compact"]["format"] == "webp"
+
+
+def test_pdf_zoom_is_capped_by_max_pixels():
+    balanced = IMAGE_PROFILES["balanced"]
+    # A4 at 120 dpi is under the budget; a poster-sized page is scaled down to it
+    assert pdf_page_zoom(595, 842, balanced) == 120 / 72
+    zoom = pdf_page_zoom(2384, 3370, balanced)
+    assert (2384 * zoom) * (3370 * zoom) == pytest.approx(balanced["max_pixels"])
+
+
+def test_screenshot_options_follow_the_format():
+    assert screenshot_options(IMAGE_PROFILES["balanced"]) == {"type": "jpeg", "quality": 82}
+    assert screenshot_options(IMAGE_PROFILES["compact"]) == {"type": "png"}
+
+
+def test_finish_screenshot_resizes_converts_and_thumbnails():
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", (2000, 1500), "white").save(buffer, format="PNG")
+    raw = buffer.getvalue()
+
+    result = finish_screenshot(raw, get_profile("compact"))
+    full = Image.open(io.BytesIO(result["full"]))
+    thumb = Image.open(io.BytesIO(result["thumb"]))
+
+    assert full.format == "WEBP"
+    assert full.width * full.height <= IMAGE_PROFILES["compact"]["max_pixels"]
+    assert (thumb.format, thumb.width) == ("WEBP", 320)
+    assert finish_screenshot(raw, get_profile("original")) == {"full": raw, "thumb": None}
@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+import image_store
+from image_store import (
+    CloudinaryImageStore, HashIndex, ImageStore, ImageStoreConfigError, LocalImageStore, content_key
+)
+
+
+def make_local(root, **kwargs):
+    return LocalImageStore(root=str(root), base_url="http://host/images/", **kwargs)
+
+
+def test_local_store_is_content_addressed(tmp_path):
+    store = make_local(tmp_path)
+    url = store.put(b"letterhead page", "png")
+    digest = content_key(b"letterhead page")
+    assert url == f"http://host/images/{digest[:2]}/{digest[2:4]}/{digest}.png"
+    assert os.path.exists(os.path.join(store.root, digest[:2], digest[2:4], f"{digest}.png"))
+    assert store.put(b"letterhead page", "png") == url
+    assert store.size == len(b"letterhead page")
+
+
+def test_local_store_requires_a_public_base_url(tmp_path):
+    with pytest.raises(ImageStoreConfigError):
+        LocalImageStore(root=str(tmp_path), base_url="")
+
+
+def test_unconfigured_default_skips_images_instead_of_failing(monkeypatch, tmp_path):
+    # IMAGE_STORE=auto, no Cloudinary credentials, no IMAGE_STORE_BASE_URL
+    monkeypatch.setattr(image_store, "IMAGE_STORE", "auto")
+    monkeypatch.setattr(image_store, "CLOUDINARY_CONFIGURED", False)
+    monkeypatch.setattr(image_store, "IMAGE_STORE_BASE_URL", "")
+    monkeypatch.setattr(image_store, "LocalImageStore",
+                        lambda **kwargs: LocalImageStore(root=str(tmp_path), base_url="", **kwargs))
+
+    assert image_store.create_store("auto") is None
+    assert image_store.describe().startswith("none")
+
+
+def test_local_store_evicts_least_recently_used(tmp_path):
+    store = make_local(tmp_path, max_bytes=250, referenced=lambda digests: set())
+    paths = {}
+    for name in (b"a", b"b"):
+        url = store.put(name * 100, "png")
+        paths[name] = os.path.join(store.root, url.split("/images/")[1])
+        os.utime(paths[name], (1, 1))
+    # Reusing "a" touches it, so "b" is the least recently used
+    store.put(b"a" * 100, "png")
+    store.put(b"c" * 100, "png")
+    assert os.path.exists(paths[b"a"])
+    assert not os.path.exists(paths[b"b"])
+    assert store.size == 200
+    assert store.evictions == 1
+
+
+def test_local_store_never_evicts_referenced_images(tmp_path):
+    kept = content_key(b"b" * 100)
+    store = make_local(tmp_path / "checked", max_bytes=250, referenced=lambda digests: {kept} & digests)
+    for name in (b"a", b"b"):
+        url = store.put(name * 100, "png")
+        os.utime(os.path.join(store.root, url.split("/images/")[1]), (1, 1))
+    store.put(b"c" * 100, "png")
+
+    assert os.path.exists(os.path.join(store.root, kept[:2], kept[2:4], f"{kept}.png"))
+    assert store.evictions == 1
+
+    # Nothing is evicted when references can't be checked
+    unchecked = make_local(tmp_path / "unchecked", max_bytes=150)
+    unchecked.put(b"a" * 100, "png")
+    unchecked.put(b"b" * 100, "png")
+    assert unchecked.evictions == 0
+
+
+class FakeUploader:
+    def __init__(self):
+        self.calls = []
+
+    def upload(self, data, **options):
+        self.calls.append(options["public_id"])
+        return {"secure_url": f"https://cdn/{options['public_id']}.png"}
+
+
+def test_cloudinary_store_skips_known_hashes(tmp_path):
+    index = HashIndex(str(tmp_path / "index.sqlite3"))
+    store = CloudinaryImageStore(index=index, folder="bankex")
+    store._uploader = FakeUploader()
+    first = store.put(b"disclaimer", "png")
+    assert store.put(b"disclaimer", "png") == first
+    assert store._uploader.calls == [f"bankex/sha256/{content_key(b'disclaimer')}"]
+
+    # A new process with the same index doesn't upload either
+    again = CloudinaryImageStore(index=HashIndex(index_path(index)), folder="bankex")
+    again._uploader = FakeUploader()
+    assert again.put(b"disclaimer", "png") == first
+    assert again._uploader.calls == []
+
+
+def index_path(index):
+    return index._conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def test_backend_missing_a_method_fails_at_construction():
+    class Incomplete(ImageStore):
+        def lookup(self, digest, ext):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,26 @@
+from import_report import parse_importtime, summarize, measure
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _json
+import time:       300 |        420 |   json
+import time:      5000 |       5000 |   requests
+import time:       250 |       5670 | finalscraper
+"""
+
+
+def test_parse_importtime_depths():
+    entries = parse_importtime(SAMPLE)
+    assert entries[0] == ("_json", 120, 120, 2)
+    assert entries[-1] == ("finalscraper", 250, 5670, 0)
+
+
+def test_summarize_lists_direct_imports_by_cost():
+    report = summarize(parse_importtime(SAMPLE), "finalscraper")
+    assert report["total_ms"] == 5.7
+    assert [item["module"] for item in report["slowest"]] == ["requests", "json"]
+    assert report["heavy_loaded"] == []
+
+
+def test_finalscraper_defers_heavy_dependencies():
+    report = summarize(measure("finalscraper", runs=1), "finalscraper")
+    assert report["heavy_loaded"] == []
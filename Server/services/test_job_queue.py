@@ -0,0 +1,89 @@
+import pytest
+
+from job_queue import JobQueue, LeaseLost, retry_delay, format_stats, describe_job
+
+
+class FakeCursor:
+    def __init__(self, log, rowcount=1):
+        self.log = log
+        self.rowcount = rowcount
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.log.append((sql, params))
+
+    def fetchall(self):
+        return []
+
+
+class FakeConn:
+    def __init__(self, rowcount=1):
+        self.log = []
+        self.rowcount = rowcount
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self.log, self.rowcount)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def job(attempts, max_attempts=3):
+    return {"id": 7, "stage": "enrich", "newsid": "abc", "payload": {}, "attempts": attempts,
+            "max_attempts": max_attempts}
+
+
+def test_retry_delay_doubles_and_caps():
+    assert [retry_delay(n, base=30, ceiling=200) for n in range(1, 6)] == [30, 60, 120, 200, 200]
+
+
+def test_fail_retries_until_attempts_run_out():
+    conn = FakeConn()
+    queue = JobQueue(conn, worker_id="test")
+    assert queue.fail(job(1), "timeout") is True
+    assert conn.log[-1][1][0] == "pending"
+    assert queue.fail(job(3), "timeout") is False
+    assert conn.log[-1][1][0] == "failed"
+    assert conn.commits == 2
+
+
+def test_finishing_a_job_leased_again_raises_lease_lost():
+    # Another worker re-leased the job after this lease expired: no row matches
+    conn = FakeConn(rowcount=0)
+    queue = JobQueue(conn, worker_id="slow-worker")
+    for finish in (queue.complete, queue.fail, queue.advance):
+        args = {"fail": ("timeout",), "advance": ("summarize",)}.get(finish.__name__, ())
+        with pytest.raises(LeaseLost):
+            finish(job(2), *args)
+
+    assert conn.commits == 0
+    assert conn.rollbacks == 3
+    sql, params = conn.log[-1]
+    assert "leased_by = %s AND attempts = %s" in sql
+    assert params[-2:] == ("slow-worker", 2)
+    # advance() didn't queue the next stage
+    assert not any("INSERT" in sql for sql, _ in conn.log)
+
+
+def test_lease_uses_skip_locked_and_visibility_timeout():
+    conn = FakeConn()
+    JobQueue(conn, worker_id="test", lease_seconds=90).lease("detail", 5)
+    sql, params = conn.log[-1]
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert params == ("detail", 5, "test", 90)
+
+
+def test_format_stats_and_describe():
+    table = format_stats({"detail": {"pending": 2, "done": 5}, "enrich": {}})
+    assert table.splitlines()[1].split() == ["detail", "2", "0", "0", "5", "0"]
+    assert describe_job(job(2)) == "enrich abc (attempt 2/3)"
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from listing_probe import DEFAULT_LISTING_FEED_URL, IST, extract_feed_newsids, feed_urls, probe_listing
+
+FIRST = "0d1f5a2e-4c3b-4e8a-9b1c-2f3e4d5a6b7c"
+SECOND = "7a6b5c4d-3e2f-4a1b-8c9d-0e1f2a3b4c5d"
+
+
+class FakeResponse:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.urls = []
+
+    def get(self, url, timeout):
+        self.urls.append(url)
+        return self.responses.pop(0)
+
+
+def test_extract_feed_newsids_dedupes_in_order():
+    body = f'{{"Table":[{{"NEWSID":"{SECOND}"}},{{"NEWSID":"{FIRST}"}},{{"NEWSID":"{SECOND}"}}]}}'
+    assert extract_feed_newsids(body) == [SECOND, FIRST]
+
+
+def test_probe_remembers_a_fully_stored_listing(tmp_path):
+    state = str(tmp_path / "probe.json")
+    feed = f"{FIRST} {SECOND}"
+    lookups = []
+
+    def known_ids(newsids):
+        lookups.append(newsids)
+        return set(newsids)
+
+    changed, newsids = probe_listing(FakeSession(FakeResponse(feed)), known_ids, "https://feed", state)
+    assert (changed, newsids) == (False, [FIRST, SECOND])
+
+    # Same listing again: the saved fingerprint answers without a DB lookup
+    changed, _ = probe_listing(FakeSession(FakeResponse(feed)), known_ids, "https://feed", state)
+    assert changed is False
+    assert len(lookups) == 1
+
+
+def test_probe_reports_new_items_across_feeds(tmp_path):
+    session = FakeSession(FakeResponse(FIRST), FakeResponse(SECOND))
+    changed, newsids = probe_listing(session, lambda ids: {FIRST}, "https://a, https://b", str(tmp_path / "p.json"))
+
+    assert changed is True
+    assert newsids == [FIRST, SECOND]
+    assert session.urls == ["https://a", "https://b"]
+
+
+def test_probe_cannot_tell_when_a_feed_fails(tmp_path):
+    session = FakeSession(FakeResponse(FIRST), FakeResponse("blocked", status_code=403))
+    changed, _ = probe_listing(session, lambda ids: set(ids), "https://a,https://b", str(tmp_path / "p.json"))
+
+    assert changed is None
+
+
+def test_default_feed_checks_each_constituent_since_yesterday():
+    urls = feed_urls(DEFAULT_LISTING_FEED_URL, ["500180", "532174"], now=datetime(2026, 3, 1, 9, 30, tzinfo=IST))
+
+    assert len(urls) == 2
+    assert all(url.startswith("https://api.bseindia.com/") for url in urls)
+    assert "strScrip=500180" in urls[0] and "strScrip=532174" in urls[1]
+    assert "strPrevDate=20260228" in urls[0] and "strToDate=20260301" in urls[0]
+    assert feed_urls("", ["500180"]) == []
+
+
+def test_empty_announcement_tables_mean_nothing_new(tmp_path):
+    session = FakeSession(FakeResponse('{"Table":[]}'), FakeResponse('{"Table":[]}'))
+    changed, newsids = probe_listing(session, lambda ids: set(), "https://feed?s={scrip}", str(tmp_path / "p.json"),
+                                     scrips=["500180", "532174"])
+
+    assert (changed, newsids) == (False, [])
+    assert session.urls == ["https://feed?s=500180", "https://feed?s=532174"]
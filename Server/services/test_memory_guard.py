@@ -0,0 +1,46 @@
+import os
+
+from memory_guard import MemoryGuard, tree_rss_mb
+
+
+class FakeSampler:
+    def __init__(self, rss):
+        self.rss = rss
+
+    def __call__(self):
+        return self.rss
+
+
+def test_recycles_after_page_budget():
+    guard = MemoryGuard(recycle_pages=3, ceiling_mb=0, sampler=FakeSampler(100))
+    for _ in range(2):
+        guard.page_opened()
+        assert guard.should_recycle() is None
+    guard.page_opened()
+    assert guard.should_recycle() == "pages"
+    guard.recycled("pages")
+    assert guard.pages == 0
+    assert guard.report() == {"peak_rss_mb": 100, "context_recycles": 1}
+
+
+def test_rss_ceiling_with_cooldown():
+    sampler = FakeSampler(500)
+    guard = MemoryGuard(recycle_pages=0, ceiling_mb=1000, sampler=sampler, rss_min_pages=2)
+    guard.page_opened()
+    assert guard.should_recycle() is None
+
+    sampler.rss = 1200
+    assert guard.should_recycle() == "rss"
+    guard.recycled("rss")
+
+    # Still over the ceiling, but a fresh context gets a couple of pages first
+    guard.page_opened()
+    assert guard.should_recycle() is None
+    guard.page_opened()
+    assert guard.should_recycle() == "rss"
+    assert guard.report()["peak_rss_mb"] == 1200
+
+
+def test_tree_rss_counts_this_process():
+    if os.path.isdir("/proc"):
+        assert tree_rss_mb() > 1
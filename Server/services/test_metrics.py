@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from metrics import RunMetrics
+
+
+def test_stage_records_duration_and_errors(clock):
+    run = RunMetrics(jsonl_path=None, clock=clock)
+
+    with run.stage("detail_goto"):
+        clock.now += 0.3
+    with pytest.raises(TimeoutError):
+        with run.stage("detail_goto"):
+            clock.now += 2.0
+            raise TimeoutError()
+    run.retry("detail_goto")
+
+    stage = run.snapshot()["stages"]["detail_goto"]
+    assert stage["count"] == 2
+    assert stage["errors"] == 1
+    assert stage["total_s"] == pytest.approx(2.3)
+    assert stage["max_s"] == pytest.approx(2.0)
+    assert run.snapshot()["retries"] == {"detail_goto": 1}
+
+
+def test_prometheus_buckets_are_cumulative():
+    run = RunMetrics(jsonl_path=None)
+    run.observe("upload", 0.2)
+    run.observe("upload", 3.0)
+    run.count("groq_prompt_tokens", 120)
+
+    text = run.render_prometheus({"inserted": 4, "status": "ok"})
+    assert 'bse_scraper_stage_seconds_bucket{stage="upload",le="0.25"} 1' in text
+    assert 'bse_scraper_stage_seconds_bucket{stage="upload",le="5"} 2' in text
+    assert 'bse_scraper_stage_seconds_bucket{stage="upload",le="+Inf"} 2' in text
+    assert "bse_scraper_groq_prompt_tokens 120" in text
+    assert "bse_scraper_run_inserted 4" in text
+    assert "run_status" not in text
+
+
+def test_jsonl_lines_per_observation(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    run = RunMetrics(jsonl_path=path)
+    run.observe("listing_load", 1.5, index="BANKEX")
+    run.observe("db_insert", 0.01)
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert [r["stage"] for r in records] == ["listing_load", "db_insert"]
+    assert records[0]["index"] == "BANKEX"
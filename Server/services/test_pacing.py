@@ -0,0 +1,44 @@
+from pacing import PacingController, looks_blocked
+
+
+def make_pacer(clock, **kwargs):
+    options = dict(initial=2.0, floor=0.5, ceiling=16.0, step=0.5, backoff=2.0, slow_seconds=5, jitter=0)
+    options.update(kwargs)
+    return PacingController(clock=clock, **options)
+
+
+def test_reservations_are_spaced_by_interval(clock):
+    pacer = make_pacer(clock)
+
+    assert pacer._reserve() == 0
+    assert pacer._reserve() == 2.0
+    assert pacer._reserve() == 4.0
+    clock.now = 10.0
+    assert pacer._reserve() == 0
+
+
+def test_success_speeds_up_and_failure_backs_off(clock):
+    pacer = make_pacer(clock)
+
+    for _ in range(10):
+        pacer.success(0.3)
+    assert pacer.interval == 0.5
+
+    pacer.success(30)
+    assert pacer.interval == 0.5
+
+    for _ in range(10):
+        pacer.failure()
+    assert pacer.interval == 16.0
+
+    pacer = make_pacer(clock)
+    pacer.failure(retry_after=9)
+    assert pacer.interval == 9
+    assert (pacer.successes, pacer.failures) == (0, 1)
+
+
+def test_looks_blocked():
+    assert looks_blocked(429)
+    assert looks_blocked(200, "<html><h1>Access Denied</h1></html>")
+    assert not looks_blocked(200, "<html>Announcement</html>")
+    assert not looks_blocked(404)
@@ -0,0 +1,68 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+import pdf_pipeline
+from pdf_pipeline import PdfPipeline, extract_pdf_text, process_pdf
+from image_profiles import get_profile
+
+
+def make_pdf(pages):
+    document = fitz.open()
+    for text in pages:
+        page = document.new_page()
+        page.insert_text((72, 72), text)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def test_extract_pdf_text_normalizes_and_caps():
+    document = fitz.open(stream=make_pdf(["Outcome of   Board Meeting", "", "Dividend declared"]), filetype="pdf")
+    try:
+        assert extract_pdf_text(document) == "Outcome of Board Meeting Dividend declared"
+        assert extract_pdf_text(document, max_pages=1) == "Outcome of Board Meeting"
+        assert extract_pdf_text(document, max_chars=7) == "Outcome"
+    finally:
+        document.close()
+
+
+def test_process_pdf_returns_pages_and_text():
+    result = process_pdf(make_pdf(["Page one", "Page two", "Page three"]), 2, get_profile("compact"))
+    assert len(result["pages"]) == 2
+    assert result["text"] == "Page one Page two Page three"
+
+
+class BrokenPool:
+    """Stands in for a ProcessPoolExecutor whose worker died"""
+
+    def __init__(self, created):
+        created.append(self)
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def test_broken_render_pool_is_replaced_once_then_fails(monkeypatch):
+    pipeline = PdfPipeline(lambda: None, workers=1)
+    created = []
+    monkeypatch.setattr(pipeline, "_new_pool", lambda: BrokenPool(created))
+    monkeypatch.setattr(pdf_pipeline, "process_pdf", lambda *args: pytest.fail("rendered in-process"))
+    try:
+        with pytest.raises(BrokenProcessPool):
+            pipeline._render(make_pdf(["Page one"]))
+    finally:
+        pipeline.shutdown()
+
+    assert len(created) == 2
+    assert all(pool.shut_down for pool in created)
+    assert pipeline._render_pool is None
@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from resource_policy import AssetCache, build_cache_pattern, build_deny_pattern
+
+
+def test_deny_pattern_covers_domains_types_and_allow_list():
+    deny = build_deny_pattern(["font"], ["google-analytics.com"], [])
+    assert deny.search("https://www.google-analytics.com/analytics.js")
+    assert deny.search("https://www.bseindia.com/fonts/roboto.woff2?v=3")
+    assert not deny.search("https://www.bseindia.com/include/js/app.js")
+    assert not deny.search("https://www.bseindia.com/stock-share-price/AnnDet_new.aspx?newsid=x")
+
+    allow_only = build_deny_pattern([], [], ["bseindia.com"])
+    assert allow_only.search("https://cdn.example.com/widget.js")
+    assert allow_only.search("https://notbseindia.com/a.js")
+    assert not allow_only.search("https://api.bseindia.com/BseIndiaAPI/x")
+
+    assert build_deny_pattern([], [], []) is None
+
+
+def test_cache_pattern_only_matches_static_assets_on_cache_hosts():
+    cache = build_cache_pattern(["bseindia.com"], ["font"])
+    assert cache.search("https://www.bseindia.com/include/js/jquery.min.js?v=12")
+    assert cache.search("https://www.bseindia.com/images/logo.PNG")
+    assert not cache.search("https://www.bseindia.com/fonts/roboto.woff2")
+    assert not cache.search("https://www.bseindia.com/stock-share-price/AnnDet_new.aspx?newsid=x.js")
+    assert not cache.search("https://cdn.example.com/app.js")
+
+
+def test_asset_cache_roundtrip_and_expiry(tmp_path):
+    cache = AssetCache(str(tmp_path), ttl=60, max_item_bytes=10)
+    url = "https://www.bseindia.com/include/js/app.js"
+    headers = {"content-type": "application/javascript", "content-encoding": "gzip"}
+
+    assert cache.get(url) is None
+    assert not cache.put(url, 404, headers, b"missing")
+    assert not cache.put(url, 200, headers, b"x" * 11)
+    assert cache.put(url, 200, headers, b"var a=1;")
+    assert cache.get(url) == ({"content-type": "application/javascript"}, b"var a=1;")
+
+    cache.ttl = -1
+    assert cache.get(url) is None
+    assert cache.prune() == 1
+
+
+def test_concurrent_writers_of_one_asset_use_their_own_temp_files(tmp_path):
+    cache = AssetCache(str(tmp_path), ttl=60, max_item_bytes=100)
+    url = "https://www.bseindia.com/include/css/site.css"
+    headers = {"content-type": "text/css"}
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        stored = list(pool.map(lambda i: cache.put(url, 200, headers, b"body %d" % i), range(32)))
+
+    assert all(stored)
+    assert cache.get(url)[1].startswith(b"body ")
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith(".tmp")]
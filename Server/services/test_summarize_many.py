@@ -0,0 +1,110 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import summarizer
+from summarizer import GroqRateLimiter, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._content = content
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"choices": [{"message": {"content": self._content}}], "usage": {"total_tokens": 150}}
+
+
+def test_token_bucket_waits_for_refill(clock):
+    bucket = TokenBucket(60, per_seconds=60.0, clock=clock)
+    bucket.consume(60)
+
+    assert bucket.wait_time(1) == 1.0
+    clock.now += 1
+    assert bucket.wait_time(1) == 0.0
+
+
+def test_limiter_spaces_requests_to_rpm(clock):
+    limiter = GroqRateLimiter(rpm=2, tpm=100000, clock=clock, sleep=clock.sleep)
+
+    limiter.acquire(10)
+    limiter.acquire(10)
+    limiter.acquire(10)  # bucket empty: waits half a minute for one request
+
+    assert clock.now == 30.0
+
+
+def test_summaries_from_concurrent_workers_honour_retry_after(monkeypatch):
+    lock = threading.Lock()
+    seen = {}
+    pauses = []
+
+    def fake_post(url, headers, json, timeout):
+        text = json["messages"][1]["content"]
+        with lock:
+            seen[text] = seen.get(text, 0) + 1
+            first_try = seen[text] == 1
+        if "second" in text and first_try:
+            return FakeResponse(429, headers={"Retry-After": "0"})
+        return FakeResponse(200, content="summary of " + text.split("\n\n")[-1].split(".")[0])
+
+    class FakeSession:
+        post = staticmethod(fake_post)
+
+    monkeypatch.setattr(summarizer, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(summarizer, "get_summary_cache", lambda: None)
+    monkeypatch.setattr(summarizer, "get_groq_session", lambda: FakeSession)
+    monkeypatch.setattr(summarizer, "_limiter", GroqRateLimiter(rpm=1000, tpm=10**6))
+    monkeypatch.setattr(summarizer._limiter, "pause", pauses.append)
+
+    padding = "has informed the exchange about a material corporate event."
+    titles = ["first", "second", "third"]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(lambda title: summarizer.summarize_text(title, title, padding), titles))
+
+    assert results == ["summary of first", "summary of second", "summary of third"]
+    assert pauses == [0.0]
+    assert sum(seen.values()) == 4
+
+
+def test_summarize_many_keeps_order_and_honours_retry_after(monkeypatch):
+    lock = threading.Lock()
+    seen = {}
+    pauses = []
+
+    def fake_post(url, headers, json, timeout):
+        text = json["messages"][1]["content"]
+        with lock:
+            seen[text] = seen.get(text, 0) + 1
+            first_try = seen[text] == 1
+        if "second" in text and first_try:
+            return FakeResponse(429, headers={"Retry-After": "0"})
+        return FakeResponse(200, content="summary of " + text.split("\n\n")[-1].split(".")[0])
+
+    class FakeSession:
+        post = staticmethod(fake_post)
+
+    monkeypatch.setattr(summarizer, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(summarizer, "get_summary_cache", lambda: None)
+    monkeypatch.setattr(summarizer, "get_groq_session", lambda: FakeSession)
+    monkeypatch.setattr(summarizer, "_limiter", GroqRateLimiter(rpm=1000, tpm=10**6))
+    monkeypatch.setattr(summarizer._limiter, "pause", pauses.append)
+
+    padding = "has informed the exchange about a material corporate event."
+    items = [
+        ("first", "first", padding),
+        ("second", "second", padding),
+        ("short", "short", None),
+        ("first", "first", padding),
+    ]
+    results = summarizer.summarize_many(items, concurrency=3)
+
+    assert results[0] == results[3] == "summary of first"
+    assert results[1] == "summary of second"
+    assert results[2] == "short"
+    assert pauses == [0.0]
+    # Duplicate inputs are only sent once
+    assert sum(seen.values()) == 3
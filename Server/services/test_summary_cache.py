@@ -0,0 +1,123 @@
+import pytest
+
+import summarizer
+from summary_cache import SummaryCache, cache_key
+
+
+class FakeResponse:
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"choices": [{"message": {"content": "Cached summary text."}}]}
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    def make(**kwargs):
+        return SummaryCache(path=str(tmp_path / "summaries.sqlite3"), **kwargs)
+    return make
+
+
+def test_hit_and_miss_counters(make_cache):
+    cache = make_cache()
+    key = cache_key("model", "prompt", "text")
+
+    assert cache.get(key) is None
+    cache.put(key, "summary")
+    assert cache.get(key) == "summary"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(clock, make_cache):
+    cache = make_cache(ttl=60, clock=clock)
+    cache.put("k", "summary")
+
+    clock.now += 61
+    assert cache.get("k") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(clock, make_cache):
+    cache = make_cache(max_entries=2, clock=clock)
+    cache.put("a", "1")
+    clock.now += 1
+    cache.put("b", "2")
+    clock.now += 1
+    cache.get("a")  # "b" is now the least recently used
+    clock.now += 1
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_summarize_text_calls_groq_once_per_input(monkeypatch, make_cache):
+    calls = []
+
+    def fake_post(*args, **kwargs):
+        calls.append(kwargs["json"])
+        return FakeResponse()
+
+    class FakeSession:
+        post = staticmethod(fake_post)
+
+    cache = make_cache()
+    monkeypatch.setattr(summarizer, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(summarizer, "get_summary_cache", lambda: cache)
+    monkeypatch.setattr(summarizer, "get_groq_session", lambda: FakeSession)
+
+    description = "The bank has informed the exchange that its board will consider quarterly results."
+    first = summarizer.summarize_text("Board Meeting", "Board Meeting", description)
+    second = summarizer.summarize_text("Board Meeting", "Board Meeting", description)
+
+    assert first == second == "Cached summary text."
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_summary_is_returned_when_the_cache_cannot_be_written(monkeypatch):
+    class BrokenCache:
+        def get(self, key):
+            return None
+
+        def put(self, key, summary):
+            raise OSError("disk full")
+
+    class FakeSession:
+        post = staticmethod(lambda *args, **kwargs: FakeResponse())
+
+    monkeypatch.setattr(summarizer, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(summarizer, "get_summary_cache", lambda: BrokenCache())
+    monkeypatch.setattr(summarizer, "get_groq_session", lambda: FakeSession)
+
+    description = "The bank has informed the exchange that its board will consider quarterly results."
+    summary = summarizer.summarize_text("Board Meeting", "Board Meeting", description)
+
+    assert summary == "Cached summary text."
+
+
+def test_batch_summaries_survive_a_broken_cache(monkeypatch):
+    class BrokenCache:
+        def get(self, key):
+            raise OSError("database is locked")
+
+        def put(self, key, summary):
+            raise OSError("disk full")
+
+    class FakeSession:
+        post = staticmethod(lambda *args, **kwargs: FakeResponse())
+
+    monkeypatch.setattr(summarizer, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(summarizer, "get_summary_cache", lambda: BrokenCache())
+    monkeypatch.setattr(summarizer, "get_groq_session", lambda: FakeSession)
+
+    description = "The bank has informed the exchange that its board will consider quarterly results."
+    summaries = summarizer.summarize_many([("Board Meeting", "Board Meeting", description)])
+
+    assert summaries == ["Cached summary text."]